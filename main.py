@@ -4,11 +4,17 @@
 # if no command line args are given, it is gui operation
 # but don't try to import any Tk/Gui stuff unless we are doing GUI operation
 
+from multiprocessing import freeze_support
 from sys import argv
 
-if len(argv) == 1:  # GUI
-    from my_app.gui import MyApp
-    app = MyApp()
-    app.run()
-else:  # Non-GUI operation, execute some command
-    ...
+# the run engine uses a process pool; on spawn platforms the workers re-import this file, so it must be guarded,
+# and freeze_support is needed when running from a frozen (pyinstaller) executable
+if __name__ == '__main__':
+    freeze_support()
+    if len(argv) == 1:  # GUI
+        from my_app.gui import MyApp
+        app = MyApp()
+        app.run()
+    else:  # Non-GUI operation, execute a headless suite run
+        from my_app.cli import main
+        raise SystemExit(main(argv[1:]))
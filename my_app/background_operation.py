@@ -1,55 +1,532 @@
-from time import sleep
-from typing import Callable, Dict, List, Union
+from contextlib import suppress
+from functools import partial
+from hashlib import sha1
+import json
+from pathlib import Path, PurePath
+from shutil import rmtree
+from time import perf_counter, sleep
+from typing import Callable, Dict, List, Tuple, Union
+from uuid import uuid4
+
+from my_app.concurrency import AdaptiveConcurrency
+from my_app.constants import PipelineStages, ReportingFrequency, ResultsTreeRoots, RunOptions
+from my_app.idf_index import dummy_get_idf_dir
+from my_app.output_store import OutputStore
+from my_app.pipeline_stats import PipelineStats
+from my_app.result_cache import fingerprint_build, ResultCache
+from my_app.results_store import ResultsStore
+from my_app.run_engine import RunEngine
+from my_app.run_journal import RunJournal
+from my_app.runtime_history import RuntimeHistory
+from my_app.tracing import tracer
+
+
+# the simulation stages, in side order, with the ResultsTreeRoots they report into
+SIMULATION_STAGES = [PipelineStages.Case1, PipelineStages.Case2]
+SIMULATION_CATEGORIES = [
+    (ResultsTreeRoots.Case1Success, ResultsTreeRoots.Case1Fail),
+    (ResultsTreeRoots.Case2Success, ResultsTreeRoots.Case2Fail),
+]
+
+
+class RunConfiguration:
+    """Everything about a suite that applies to every IDF in it, this gets shipped to each worker process"""
+
+    def __init__(self, build_dir_1: Union[None, Path] = None, build_dir_2: Union[None, Path] = None,
+                 run_option: str = RunOptions.DONT_FORCE, reporting_frequency: str = ReportingFrequency.HOURLY,
+                 output_dir: Union[None, Path] = None, cache_dir: Union[None, Path] = None,
+                 history_file: Union[None, Path] = None, journal_dir: Union[None, Path] = None,
+                 results_db: Union[None, Path] = None, output_store: Union[None, Path] = None):
+        self.build_dir_1 = build_dir_1
+        self.build_dir_2 = build_dir_2
+        self.run_option = run_option
+        self.reporting_frequency = reporting_frequency
+        self.output_dir = output_dir  # if None, outputs are not kept and nothing is compared
+        self.cache_dir = cache_dir  # if None, simulation results are not cached
+        self.history_file = history_file  # if None, runtimes are not remembered from one suite to the next
+        self.journal_dir = journal_dir  # if None, there is no journal of completed IDFs, so no resuming either
+        self.results_db = results_db  # if None, results are only handed to the callbacks, not stored
+        self.output_store = output_store  # if None, outputs are kept as plain files, with no sharing between them
+        self.build_fingerprints: Tuple[str, str] = ('', '')  # filled in by the coordinator when caching
+        self.run_key = ''  # filled in by the coordinator when outputs go to the output store
+
+    def idf_output_dirs(self, idf: str) -> Tuple[Path, Path]:
+        """Where the outputs of one IDF go for build 1 and build 2"""
+        stem = PurePath(idf).with_suffix('')
+        return self.output_dir / 'build_1' / stem, self.output_dir / 'build_2' / stem
+
+    def as_dict(self) -> Dict:
+        return {
+            'build_dir_1': str(self.build_dir_1) if self.build_dir_1 else None,
+            'build_dir_2': str(self.build_dir_2) if self.build_dir_2 else None,
+            'run_option': self.run_option,
+            'reporting_frequency': self.reporting_frequency,
+            'output_dir': str(self.output_dir) if self.output_dir else None,
+            'cache_dir': str(self.cache_dir) if self.cache_dir else None,
+            'history_file': str(self.history_file) if self.history_file else None,
+            'journal_dir': str(self.journal_dir) if self.journal_dir else None,
+            'results_db': str(self.results_db) if self.results_db else None,
+            'output_store': str(self.output_store) if self.output_store else None,
+        }
+
+    def signature(self) -> str:
+        """Hash of everything that affects the results of a run, builds included if they have been fingerprinted"""
+        significant = [
+            str(self.build_dir_1), str(self.build_dir_2), self.run_option, self.reporting_frequency,
+            list(self.build_fingerprints)
+        ]
+        return sha1(json.dumps(significant).encode('utf-8')).hexdigest()
+
+    def caching(self) -> bool:
+        return bool(self.cache_dir and self.build_dir_1 and self.build_dir_2)
+
+    def journaling(self) -> bool:
+        return bool(self.journal_dir and self.build_dir_1 and self.build_dir_2)
+
+    def storing_outputs(self) -> bool:
+        return bool(self.output_store and self.output_dir)
+
+
+def simulate(_build_dir: Union[None, Path], _idf: str, _out_dir: Union[None, Path], _config: RunConfiguration) -> Dict:
+    """Runs one IDF with one build, writing its outputs into out_dir"""
+    sleep(0.5)
+    return {'success': True}
+
+
+def simulate_side(idf: str, side: int, config: RunConfiguration) -> Dict:
+    """Runs one IDF with one build (side 0 or 1), from the cache if it can, and returns how that went"""
+    build_dir = (config.build_dir_1, config.build_dir_2)[side]
+    out_dir = config.idf_output_dirs(idf)[side] if config.output_dir else None
+    outcome = {'success': False, 'cache_hit': False, 'cache_miss': False, 'runtime': None}
+    cache = ResultCache(config.cache_dir) if config.caching() else None
+    store = OutputStore(config.output_store) if config.storing_outputs() else None
+    if store:
+        store.prepare(out_dir)
+    key = ''
+    simulation = None
+    if cache:
+        try:
+            key = ResultCache.key(
+                config.build_fingerprints[side], dummy_get_idf_dir(build_dir) / idf, config.run_option,
+                config.reporting_frequency
+            )
+        except OSError:
+            pass  # without the IDF itself there is no telling what the run depends on, so don't cache it
+        simulation = cache.lookup(key, out_dir) if key else None
+    if simulation is None:
+        start = perf_counter()
+        simulation = simulate(build_dir, idf, out_dir, config)
+        outcome['runtime'] = perf_counter() - start
+        if key:
+            outcome['cache_miss'] = True
+            if simulation['success']:  # a failure may well be down to this machine, so it's worth running again
+                cache.store(key, simulation, out_dir)
+    else:
+        outcome['cache_hit'] = True
+    if store:
+        store.ingest(out_dir, config.run_key, idf, side)
+        store.close()
+    outcome['success'] = simulation['success']
+    return outcome
+
+
+def compare_idf(idf: str, config: RunConfiguration) -> Dict:
+    """Diffs the outputs of one IDF from both builds"""
+    # imported here so the diff engines (and numpy) only get loaded by the workers that need them
+    from my_app.comparison import compare_outputs
+    identical_files = set()
+    if config.storing_outputs():
+        store = OutputStore(config.output_store)
+        identical_files = store.identical_files(config.run_key, idf)
+        store.close()
+    return compare_outputs(
+        *config.idf_output_dirs(idf), reporting_frequency=config.reporting_frequency, identical_files=identical_files
+    )
+
+
+def run_task(task: Tuple[str, str], config: RunConfiguration) -> Dict:
+    """Operates in a worker process, runs one (stage, idf) task of the pipeline and returns its results"""
+    stage, idf = task
+    if stage == PipelineStages.Compare:
+        return compare_idf(idf, config)
+    return simulate_side(idf, SIMULATION_STAGES.index(stage), config)
+
+
+class _IdfInProgress:
+    """The coordinator's view of an IDF whose tasks aren't all done yet"""
+
+    def __init__(self, idf: str):
+        self.result = {
+            'idf': idf, 'categories': [ResultsTreeRoots.AllFiles], 'cache_hits': 0, 'cache_misses': 0,
+            'runtimes': [None, None]  # measured seconds per build, None if the simulation didn't actually run
+        }
+        self.sides_done = 0
+        self.all_succeeded = True
+        self.errors: List[str] = list()
 
 
 class BackgroundOperation:
+    """Runs a suite as a pipeline: each IDF's Case 1 and Case 2 simulations are sibling tasks, and its compare task
+    is queued the moment both have finished, ahead of any simulation still waiting.  So the first diffs come in
+    with the first simulations rather than after all of them, and no worker sits idle between phases.
+
+    Compares that pile up faster than they are done hold back the simulations of IDFs that haven't been started
+    yet, so at most max_pending_compares sets of outputs are ever waiting on disk to be diffed.
+
+    Given an AdaptiveConcurrency instead of a fixed num_threads, the number of local workers follows the load on the
+    machine, and each of its decisions shows up as a message alongside the per-IDF ones."""
 
-    def __init__(self, num_threads: int, idfs_to_run: List[str]):
+    # once asked to stop, the max seconds to wait for in-flight runs to die before they are killed outright
+    STOP_DEADLINE = 2.0
+
+    def __init__(self, num_threads: int, idfs_to_run: List[str], config: Union[None, RunConfiguration] = None,
+                 resume: bool = False, max_pending_compares: Union[None, int] = None, remote_workers=None,
+                 concurrency: Union[None, AdaptiveConcurrency] = None):
         self._cancel_me = True  # need to make sure to call 'get_ready_to_go' prior to running
         self.callback_iteration_complete: Union[None, Callable[[str, str, float], None]] = None
         self.callback_finished: Union[None, Callable[[Dict], None]] = None
-        self.callback_cancelled: Union[None, Callable[[], None]] = None
+        self.callback_cancelled: Union[None, Callable[[Dict], None]] = None
+        self.callback_idf_result: Union[None, Callable[[Dict], None]] = None
+        self.concurrency = concurrency
+        if concurrency:
+            num_threads = concurrency.max_workers
+            concurrency.log = self._concurrency_decision
         self.num_threads = num_threads
         self.idfs_to_run = idfs_to_run
+        self.config = config if config else RunConfiguration()
+        self.resume = resume  # skip the IDFs the journal says an interrupted run of the same configuration finished
+        self.max_pending_compares = max_pending_compares if max_pending_compares else 2 * max(1, num_threads)
+        self.remote_workers = remote_workers  # a RemoteWorkerListener whose workers join in alongside the local ones
+        # runs in a child process, so must be module level
+        self.worker: Callable[[Tuple[str, str], RunConfiguration], Dict] = run_task
+        self.stats = PipelineStats(PipelineStages.get_all())  # read by the GUI while the run goes on
+        self._in_progress: Dict[str, _IdfInProgress] = dict()  # IDFs started and not finished, in start order
+        self._num_completed = 0
+        self._idf_results: List[Dict] = list()
+        self._history = RuntimeHistory()
+        self._idf_sizes: Dict[str, int] = dict()
+        self._expected: Dict[str, float] = dict()  # expected seconds per IDF, for both builds together
+        self._total_expected = 0.0
+        self._completed_expected = 0.0
+        self._resumed: Dict[str, Dict] = dict()
+        self._resumed_expected = 0.0
+        self._journal: Union[None, RunJournal] = None
+        self._store: Union[None, ResultsStore] = None
+        self._run_id: Union[None, int] = None
+        self._start_time = 0.0
+        self._reported = False  # whether this run's outcome has gone to a callback yet
+        self._status: Tuple[str, float] = ('', 0.0)  # the latest status and percent complete, repeated with messages
 
     def please_stop(self):
         self._cancel_me = True
 
-    def get_ready_to_go(self, f_iteration_complete=None, f_finished=None, f_cancelled=None):
+    def get_ready_to_go(self, f_iteration_complete=None, f_finished=None, f_cancelled=None, f_idf_result=None):
         self._cancel_me = False
         self.callback_iteration_complete = f_iteration_complete
         self.callback_finished = f_finished
         self.callback_cancelled = f_cancelled
+        self.callback_idf_result = f_idf_result
 
     def run(self):
-        i = 0
-        n = len(self.idfs_to_run)
-        for idf in self.idfs_to_run:
-            i += 1
+        """Runs the suite, always ending in one of the finished or cancelled callbacks: anything going wrong outside
+        of the IDFs themselves, like a full disk or a locked database, ends it cancelled with an 'error' in the
+        results"""
+        self._reported = False
+        try:
+            self._run()
+        except Exception as e:
+            if self._reported:
+                raise  # from the callback itself, there's no reporting that
+            self._fail(e)
+
+    def _fail(self, error: Exception):
+        for resource in (self._journal, self._store):
+            if resource:
+                with suppress(Exception):  # it's likely what failed, either way it's no longer any use
+                    resource.close()
+        results = {
+            'result_string': 'PRETEND I AM RESULTS', 'idf_results': self._idf_results,
+            'cancelled_idfs': list(self._in_progress), 'error': f"{type(error).__name__}: {error}"
+        }
+        self._reported = True
+        if self.callback_cancelled:
+            self.callback_cancelled(results)
+        else:
+            print(f"Background thread failed: {results['error']}")
 
+    def _run(self):
+        self._num_completed = 0
+        self._idf_results = list()
+        self._in_progress = dict()
+        cache = ResultCache(self.config.cache_dir) if self.config.caching() and not self._cancel_me else None
+        if cache or self.config.journaling():  # a journal resumed after a rebuild mustn't keep the old build's results
+            self.config.build_fingerprints = (
+                fingerprint_build(self.config.build_dir_1), fingerprint_build(self.config.build_dir_2)
+            )
+        output_store = None
+        if self.config.storing_outputs() and not self._cancel_me:
+            output_store = OutputStore(self.config.output_store)
+            self.config.run_key = uuid4().hex
+            output_store.start_run(self.config.run_key)
+        self._open_journal()
+        self._open_store()
+        for seq, result in enumerate(self._idf_results, 1):  # anything resumed from the journal is part of this run
+            self._publish_result(seq, result)
+        engine = RunEngine(
+            self.num_threads, partial(self.worker, config=self.config), stop_deadline=self.STOP_DEADLINE,
+            remote=self.remote_workers, concurrency=self.concurrency
+        )
+        self._start_time = perf_counter()
+        self._status = (
+            f"{self._num_completed}/{len(self.idfs_to_run)} of the way there",
+            100.0 * self._num_completed / len(self.idfs_to_run) if self.idfs_to_run else 0.0
+        )
+        tasks = [(stage, idf) for idf in self.schedule() for stage in SIMULATION_STAGES]
+        self.stats = PipelineStats(PipelineStages.get_all())
+        for stage in SIMULATION_STAGES:
+            self.stats.queue(stage, len(tasks) // len(SIMULATION_STAGES))
+        completed = False
+        try:
             # background thread code should check for cancellation as often as possible
-            if self._cancel_me:
-                if self.callback_cancelled:
-                    self.callback_cancelled()
-                else:
-                    print("Background thread cancelled")
-                return
-
-            # run one single iteration
-            sleep(1)
-
-            # then broadcast the message to any listeners
-            if self.callback_iteration_complete:
-                self.callback_iteration_complete(
-                    f"{i}/{n} of the way there",
-                    f"Run {idf} Completed Successfully",
-                    100.0 * float(i) / float(n)
+            with tracer.span('Run engine', 'run', num_idfs=len(tasks) // len(SIMULATION_STAGES)):
+                completed = not self._cancel_me and engine.run(
+                    tasks, self._task_complete, lambda: self._cancel_me, self._admit, self._task_started
                 )
+        finally:
+            if self._journal:
+                self._journal.close()
+            if self._store:
+                self._store.finish_run(self._run_id, 'finished' if completed else 'cancelled')
+                self._store.close()
+        self._history.save()
+        if output_store:
+            output_store.collect_garbage()
+            output_store.compress_cold()
+            output_store.close()
+        results = {'result_string': 'PRETEND I AM RESULTS', 'idf_results': self._idf_results}
+        if self._store:
+            results['run_id'] = self._run_id
+        if not completed:
+            # whatever was in flight got killed part way through, so its outputs can't be trusted
+            cancelled_idfs = list(self._in_progress)
+            self._clean_up_outputs(cancelled_idfs)
+            results['cancelled_idfs'] = cancelled_idfs
+            self._reported = True
+            if self.callback_cancelled:
+                self.callback_cancelled(results)
             else:
-                print(f"Iteration ({i}/{n}) completed")
+                print("Background thread cancelled")
+            return
 
         # once totally complete just broadcast the completion
         if self.callback_finished:
-            self.callback_finished({'result_string': 'PRETEND I AM RESULTS'})
+            if cache:
+                # resumed IDFs had their cache lookups counted by the run that actually did them
+                ran = [r for r in self._idf_results if r['idf'] not in self._resumed]
+                hits = sum(r.get('cache_hits', 0) for r in ran)
+                misses = sum(r.get('cache_misses', 0) for r in ran)
+                results['cache_stats'] = {'hits': hits, 'misses': misses, 'totals': cache.record_stats(hits, misses)}
+                cache.evict()
+            self._reported = True
+            self.callback_finished(results)
         else:
             print("Finished!")
+
+    def _open_journal(self):
+        self._journal = None
+        self._resumed = dict()
+        if not self.config.journaling() or self._cancel_me:
+            return
+        signature = self.config.signature()
+        self._journal = RunJournal(RunJournal.path_for(self.config.journal_dir, signature), signature)
+        completed = self._journal.open(resume=self.resume)
+        wanted = set(self.idfs_to_run)
+        self._resumed = {idf: result for idf, result in completed.items() if idf in wanted}
+        self._idf_results = list(self._resumed.values())
+        self._num_completed = len(self._resumed)
+        if self.callback_iteration_complete and self._resumed:
+            n = len(self.idfs_to_run)
+            self.callback_iteration_complete(
+                f"{self._num_completed}/{n} resumed from the run journal",
+                f"Resumed {self._num_completed} IDFs completed by a previous run of this configuration",
+                100.0 * self._num_completed / n
+            )
+
+    def _open_store(self):
+        self._store = None
+        self._run_id = None
+        if not self.config.results_db or self._cancel_me:
+            return
+        # opened here, on the thread that writes to it, sqlite connections can't be shared between threads
+        self._store = ResultsStore(self.config.results_db)
+        self._run_id = self._store.start_run(self.config.as_dict())
+
+    def _publish_result(self, seq: int, result: Dict):
+        """Hands one IDF's result to the store and to whoever is showing results as they come in"""
+        if self._store:
+            self._store.add_idf_result(self._run_id, seq, result)
+        if self.callback_idf_result:
+            self.callback_idf_result({
+                'run_id': self._run_id, 'seq': seq, 'idf': result['idf'], 'categories': result.get('categories', []),
+                'base_file': result.get('base_file', ''), 'mod_file': result.get('mod_file', ''),
+                'diff_file': result.get('diff_file', '')
+            })
+
+    def _clean_up_outputs(self, idfs: List[str]):
+        if not self.config.output_dir:
+            return
+        for idf in idfs:
+            for out_dir in self.config.idf_output_dirs(idf):
+                rmtree(str(out_dir), ignore_errors=True)
+
+    def _build_keys(self) -> Tuple[str, str]:
+        return str(self.config.build_dir_1), str(self.config.build_dir_2)
+
+    def _idf_size(self, idf: str) -> int:
+        if not self.config.build_dir_1:
+            return 0
+        try:
+            return (dummy_get_idf_dir(self.config.build_dir_1) / idf).stat().st_size
+        except OSError:
+            return 0
+
+    def schedule(self) -> List[str]:
+        """Orders the IDFs longest expected runtime first, so the long runs don't end up trailing at the end"""
+        self._history = RuntimeHistory(self.config.history_file)
+        self._idf_sizes = {idf: self._idf_size(idf) for idf in self.idfs_to_run}
+        self._expected = {
+            idf: sum(
+                self._history.expected(idf, build, self.config.run_option, self._idf_sizes[idf])
+                for build in self._build_keys()
+            )
+            for idf in self.idfs_to_run
+        }
+        self._total_expected = sum(self._expected.values())
+        self._resumed_expected = sum(self._expected[idf] for idf in self._resumed)
+        self._completed_expected = self._resumed_expected
+        remaining = [idf for idf in self.idfs_to_run if idf not in self._resumed]
+        return sorted(remaining, key=lambda idf: self._expected[idf], reverse=True)
+
+    def _record_runtimes(self, idf: str, result: Dict):
+        for build, seconds in zip(self._build_keys(), result.get('runtimes', [])):
+            if seconds is not None:
+                self._history.record(idf, build, self.config.run_option, seconds, self._idf_sizes[idf])
+
+    def _progress(self, idf: str) -> Tuple[float, str]:
+        """Percent complete weighted by expected runtime, and a rough estimate of the time remaining"""
+        self._completed_expected += self._expected[idf]
+        if self._num_completed == len(self.idfs_to_run):
+            return 100.0, ''
+        fraction = self._completed_expected / self._total_expected if self._total_expected > 0.0 else 0.0
+        # resumed IDFs took no time in this run, so leave them out of the rate the estimate is based on
+        fraction_this_run = fraction - self._resumed_expected / self._total_expected if fraction > 0.0 else 0.0
+        if fraction_this_run <= 0.0 or fraction >= 1.0:
+            return 100.0 * self._num_completed / len(self.idfs_to_run), ''
+        remaining_seconds = (perf_counter() - self._start_time) * (1.0 - fraction) / fraction_this_run
+        minutes, seconds = divmod(int(remaining_seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return 100.0 * fraction, f", about {hours}:{minutes:02d}:{seconds:02d} remaining"
+
+    def _admit(self, task: Tuple[str, str]) -> bool:
+        """Backpressure: a new IDF only gets started while the compares waiting to run are under the limit"""
+        self._trace_pipeline()
+        return task[1] in self._in_progress or \
+            self.stats.stages[PipelineStages.Compare].queued < self.max_pending_compares
+
+    def _trace_pipeline(self):
+        """Samples how full the pipeline is into the trace, to set the spans against"""
+        if tracer.enabled:
+            stages = self.stats.stages
+            tracer.counter(
+                'Pipeline', idfs_in_progress=len(self._in_progress),
+                simulations_running=sum(stages[stage].running for stage in SIMULATION_STAGES),
+                compares_queued=stages[PipelineStages.Compare].queued,
+                compares_running=stages[PipelineStages.Compare].running
+            )
+
+    def _task_started(self, task: Tuple[str, str]):
+        stage, idf = task
+        self.stats.start(stage, task)
+        if idf not in self._in_progress:
+            self._in_progress[idf] = _IdfInProgress(idf)
+            self.stats.idf_started(idf)
+            tracer.begin(idf, 'IDF', 'idf', idf=idf)
+        tracer.end(('queued', task))
+        tracer.begin(task, stage, 'stage', idf=idf)
+
+    def _task_complete(self, task: Tuple[str, str], outcome: Dict, error: Union[None, BaseException]) -> List:
+        """Folds one task's outcome into its IDF, returning the compare task once both simulations are in"""
+        # tasks finish in any order, but this is only ever called from the engine's run loop on our thread
+        stage, idf = task
+        self.stats.finish(stage, task)
+        tracer.end(task, failed=error is not None)
+        self._trace_pipeline()
+        progress = self._in_progress[idf]
+        result = progress.result
+        if stage == PipelineStages.Compare:
+            if error:
+                progress.errors.append(f"{stage}: {error}")
+            else:
+                result['categories'].extend(outcome['categories'])
+                for key in ('diff_file', 'diffs', 'magnitudes'):
+                    result[key] = outcome[key]
+            self._idf_complete(idf)
+            return []
+        side = SIMULATION_STAGES.index(stage)
+        succeeded = error is None and outcome['success']
+        result['categories'].append(SIMULATION_CATEGORIES[side][0 if succeeded else 1])
+        if error:
+            progress.errors.append(f"{stage}: {error}")
+        else:
+            result['runtimes'][side] = outcome['runtime']
+            result['cache_hits'] += int(outcome['cache_hit'])
+            result['cache_misses'] += int(outcome['cache_miss'])
+        progress.all_succeeded = progress.all_succeeded and succeeded
+        progress.sides_done += 1
+        if progress.sides_done < len(SIMULATION_STAGES):
+            return []
+        if progress.all_succeeded and self.config.output_dir:
+            self.stats.queue(PipelineStages.Compare)
+            compare = (PipelineStages.Compare, idf)
+            tracer.begin(('queued', compare), 'Compare queued', 'queue', idf=idf)
+            return [compare]
+        if progress.all_succeeded:
+            result['categories'].append(ResultsTreeRoots.AllCompared)  # nothing kept to compare, so nothing differs
+        self._idf_complete(idf)
+        return []
+
+    def _idf_complete(self, idf: str):
+        progress = self._in_progress.pop(idf)
+        self.stats.idf_finished(idf)
+        tracer.end(idf)
+        result = progress.result
+        # keep the tree's ordering however the tasks happened to finish
+        in_categories = set(result['categories'])
+        result['categories'] = [c for c in ResultsTreeRoots.get_all() if c in in_categories]
+        self._record_runtimes(idf, result)
+        if self._journal and not progress.errors:
+            self._journal.record(idf, result)
+        self._idf_results.append(result)
+        self._num_completed += 1
+        with tracer.span('Publish result', 'callback', idf=idf):
+            self._publish_result(self._num_completed, result)
+        i = self._num_completed
+        n = len(self.idfs_to_run)
+        percent_complete, time_remaining = self._progress(idf)
+        if progress.errors:
+            message = f"Run {idf} Failed: {'; '.join(progress.errors)}"
+        elif result.get('cache_hits'):
+            message = f"Run {idf} Completed Successfully ({result['cache_hits']} of 2 runs from cache)"
+        else:
+            message = f"Run {idf} Completed Successfully"
+        self._status = (f"{i}/{n} of the way there{time_remaining}", percent_complete)
+        if self.callback_iteration_complete:
+            self.callback_iteration_complete(self._status[0], message, percent_complete)
+        else:
+            print(f"Iteration ({i}/{n}) completed")
+
+    def _concurrency_decision(self, decision: str):
+        if self.callback_iteration_complete:
+            self.callback_iteration_complete(self._status[0], f"Concurrency: {decision}", self._status[1])
+        else:
+            print(f"Concurrency: {decision}")
@@ -0,0 +1,194 @@
+from argparse import ArgumentParser, ArgumentTypeError
+import csv
+from fnmatch import fnmatch
+import json
+import os
+from pathlib import Path
+import signal
+import sys
+from typing import Dict, List, Union
+
+# this module is the headless entry point, so it must never import tkinter or pubsub, directly or indirectly
+from my_app.background_operation import BackgroundOperation, RunConfiguration
+from my_app.concurrency import AdaptiveConcurrency
+from my_app.constants import ReportingFrequency, ResultsTreeRoots, RunOptions
+from my_app.data_dir import get_data_dir
+from my_app.idf_index import IdfDiscoveryIndex, dummy_get_idf_dir
+from my_app.idf_selection import IdfSelectionModel
+from my_app.tracing import Tracer, tracer
+
+# short command line spellings of the RunOptions
+RUN_OPTION_NAMES = {
+    'dont-force': RunOptions.DONT_FORCE,
+    'dd-only': RunOptions.FORCE_DD_ONLY,
+    'annual': RunOptions.FORCE_ANNUAL,
+}
+
+
+def thread_count(value: str) -> Union[str, int]:
+    """-j takes a number of workers, or 'auto' to let the machine's load decide"""
+    if value == 'auto':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise ArgumentTypeError(f"expected a number or 'auto', not {value!r}")
+
+
+def build_parser() -> ArgumentParser:
+    parser = ArgumentParser(description="Run an EnergyPlus regression suite without the GUI")
+    parser.add_argument('build_dir_1', type=Path, help="First build directory")
+    parser.add_argument('build_dir_2', type=Path, help="Second build directory")
+    parser.add_argument('-j', '--threads', type=thread_count, default=os.cpu_count() or 1,
+                        help="Number of parallel runs on this machine, can be 0 with --listen, or 'auto' to grow and "
+                             "shrink with CPU and memory pressure, up to one per CPU")
+    parser.add_argument('--memory-headroom', type=int, default=2048, metavar='MB',
+                        help="With -j auto, hold back new runs while less than this much memory is available")
+    parser.add_argument('--listen', metavar='[HOST:]PORT',
+                        help="Also run on worker daemons (python -m my_app.remote_worker) that register here; "
+                             "without a HOST only this machine's can, 0.0.0.0:PORT lets other machines' register too")
+    parser.add_argument('--run-option', choices=sorted(RUN_OPTION_NAMES), default='dont-force')
+    parser.add_argument(
+        '--reporting-frequency', choices=sorted(ReportingFrequency.get_all()), default=ReportingFrequency.HOURLY
+    )
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument('--glob', action='append', help="Only run IDFs whose relative path matches (repeatable)")
+    selection.add_argument('--idf-list', type=Path, help="File listing the IDFs to run, one relative path per line")
+    selection.add_argument('--random', type=int, metavar='N', help="Run N randomly chosen IDFs")
+    parser.add_argument('-o', '--results', type=Path, default=Path('results.json'),
+                        help="Results file to write, .csv for CSV, anything else for JSON")
+    parser.add_argument('--trace', type=Path, metavar='JSON',
+                        help="Record a trace of the run to this Chrome trace file, and print where the time went")
+    parser.add_argument('--output-dir', type=Path, help="Folder to keep simulation outputs in and compare them from")
+    parser.add_argument('--cache-dir', type=Path, help="Simulation result cache folder (default: in the tool's data)")
+    parser.add_argument('--no-cache', action='store_true', help="Run every simulation, even if its result is cached")
+    parser.add_argument('--output-store', type=Path, metavar='DIR',
+                        help="With --output-dir, keep each distinct output file once in this store, shared between "
+                             "builds and runs, and skip diffing files that came out the same from both builds")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip the IDFs an interrupted run of the same configuration already finished")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Don't print progress")
+    return parser
+
+
+def find_common_idfs(build_dir_1: Path, build_dir_2: Path) -> List[str]:
+    idfs_1 = IdfDiscoveryIndex(dummy_get_idf_dir(build_dir_1)).scan()
+    idfs_2 = IdfDiscoveryIndex(dummy_get_idf_dir(build_dir_2)).scan()
+    return sorted(str(idf) for idf in idfs_1.intersection(idfs_2))
+
+
+def select_idfs(available: List[str], globs: Union[None, List[str]], idf_list: Union[None, Path],
+                random_count: Union[None, int]) -> List[str]:
+    if globs:
+        return [idf for idf in available if any(fnmatch(idf, pattern) for pattern in globs)]
+    if idf_list:
+        available_set = set(available)
+        requested = [line.strip() for line in idf_list.read_text().splitlines() if line.strip()]
+        missing = [idf for idf in requested if idf not in available_set]
+        if missing:
+            print(f"Skipping {len(missing)} IDFs not found in both builds: {', '.join(missing)}", file=sys.stderr)
+        return [idf for idf in requested if idf in available_set]
+    if random_count is not None:
+        model = IdfSelectionModel()
+        model.available = available
+        model.select_random(random_count)
+        return model.active
+    return available
+
+
+def write_results(path: Path, config: RunConfiguration, results: Dict, completed: bool):
+    idf_results = results.get('idf_results', [])
+    if path.suffix.lower() == '.csv':
+        categories = ResultsTreeRoots.get_all()
+        with path.open('w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['IDF'] + categories + ['Diff Files'])
+            for result in sorted(idf_results, key=lambda r: r['idf']):
+                in_categories = set(result.get('categories', []))
+                writer.writerow(
+                    [result['idf']] + [int(c in in_categories) for c in categories] + [result.get('diff_file', '')]
+                )
+        return
+    summary = {category: 0 for category in ResultsTreeRoots.get_all()}
+    for result in idf_results:
+        for category in result.get('categories', []):
+            summary[category] += 1
+    with path.open('w') as f:
+        json.dump({
+            'configuration': config.as_dict(), 'run_id': results.get('run_id'), 'completed': completed,
+            'summary': summary, 'cache_stats': results.get('cache_stats'),
+            'idf_results': sorted(idf_results, key=lambda r: r['idf'])
+        }, f, indent=2)
+
+
+def main(args: List[str]) -> int:
+    options = build_parser().parse_args(args)
+    for build_dir in (options.build_dir_1, options.build_dir_2):
+        if not build_dir.is_dir():
+            print(f"Build directory does not exist: {build_dir}", file=sys.stderr)
+            return 2
+    idfs_to_run = select_idfs(
+        find_common_idfs(options.build_dir_1, options.build_dir_2), options.glob, options.idf_list, options.random
+    )
+    if not idfs_to_run:
+        print("No IDFs selected to run", file=sys.stderr)
+        return 2
+    config = RunConfiguration(
+        options.build_dir_1, options.build_dir_2, RUN_OPTION_NAMES[options.run_option],
+        options.reporting_frequency, options.output_dir,
+        None if options.no_cache else (options.cache_dir or get_data_dir('result_cache')),
+        get_data_dir() / 'runtime_history.json', get_data_dir('journals'), get_data_dir() / 'results.sqlite3',
+        options.output_store
+    )
+    outcome = dict()
+
+    def status(status_string, object_completed, _percent_complete):
+        if not options.quiet:
+            print(f"[{status_string}] {object_completed}", file=sys.stderr)
+
+    def finished(results):
+        outcome.update(results, completed=True)
+
+    remote_workers = None
+    if options.listen:
+        from my_app.remote_worker import RemoteWorkerListener, parse_address
+        remote_workers = RemoteWorkerListener(parse_address(options.listen))
+        if not options.quiet:
+            print(f"Listening for remote workers on {remote_workers.address[0]}:{remote_workers.address[1]}",
+                  file=sys.stderr)
+    concurrency = None
+    if options.threads == 'auto':
+        concurrency = AdaptiveConcurrency(memory_headroom=options.memory_headroom * 1024 ** 2)
+    background_operator = BackgroundOperation(
+        0 if concurrency else options.threads, idfs_to_run, config, options.resume, remote_workers=remote_workers,
+        concurrency=concurrency
+    )
+    background_operator.get_ready_to_go(status, finished, outcome.update)
+
+    def interrupted(_signal_number, _frame):
+        print("Interrupted, stopping and keeping the results so far", file=sys.stderr)
+        background_operator.please_stop()
+
+    # Ctrl-C stops the suite like the GUI's Stop button does, so the partial results still get written
+    previous_handler = signal.signal(signal.SIGINT, interrupted)
+    if options.trace:
+        tracer.enable()
+    try:
+        background_operator.run()
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        if remote_workers:
+            remote_workers.close()
+        if options.trace:
+            tracer.disable()
+            tracer.write(options.trace)
+    if options.trace and not options.quiet:
+        print('\n'.join(Tracer.format_summary(tracer.summary())), file=sys.stderr)
+    completed = outcome.get('completed', False)
+    if 'error' in outcome:
+        print(f"The run failed: {outcome['error']}", file=sys.stderr)
+    if 'cache_stats' in outcome and not options.quiet:
+        stats = outcome['cache_stats']
+        print(f"Result cache: {stats['hits']} hits, {stats['misses']} misses", file=sys.stderr)
+    write_results(options.results, config, outcome, completed)
+    return 0 if completed else 1
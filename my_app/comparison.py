@@ -0,0 +1,72 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Union
+
+from my_app.constants import ResultsTreeRoots
+from my_app.diff_thresholds import DiffThresholds
+from my_app.math_diff import MathDiffResult, math_diff
+from my_app.table_diff import TableDiffResult, table_diff
+from my_app.text_diff import DEFAULT_VOLATILE_PATTERNS, TextDiffResult, text_diff
+
+# which output files each diff stage looks at, a file missing from either side is skipped
+MATH_DIFF_FILES = ['eplusout.csv', 'eplusmtr.csv']
+TABLE_DIFF_FILES = ['eplustbl.htm']
+TEXT_DIFF_FILES = ['eplusout.err', 'eplusout.audit', 'eplusout.eio', 'eplusout.mtd', 'eplusout.bnd']
+
+
+def diff_magnitude(result: Union[MathDiffResult, TableDiffResult, TextDiffResult]) -> Dict:
+    """How big a diff is: the largest absolute and relative differences where they apply, and how many diffs"""
+    if isinstance(result, MathDiffResult):
+        return {
+            'max_abs_diff': float(result.max_abs_diff.max()) if len(result.columns) else None,
+            'max_rel_diff': float(result.max_rel_diff.max()) if len(result.columns) else None,
+            'num_diffs': int(result.big_count.sum() + result.small_count.sum()),
+        }
+    if isinstance(result, TableDiffResult):
+        return {
+            'max_abs_diff': None, 'max_rel_diff': None,
+            'num_diffs': result.big_diffs + result.small_diffs + result.string_diffs + len(result.unmatched_tables),
+        }
+    return {'max_abs_diff': None, 'max_rel_diff': None, 'num_diffs': result.num_diff_lines}
+
+
+def compare_outputs(
+        out_dir_1: Path, out_dir_2: Path, math_thresholds: Union[None, DiffThresholds] = None,
+        table_thresholds: Union[None, DiffThresholds] = None, volatile_patterns: List[str] = None,
+        reporting_frequency: Union[None, str] = None, identical_files: Iterable[str] = ()
+) -> Dict:
+    """Runs every diff stage over the outputs of one IDF from both builds.
+
+    Time-series outputs are compared at reporting_frequency, a ReportingFrequency, aggregating finer outputs to it.
+    The files in identical_files are already known to be the same from both builds, by their hashes in the output
+    store, so they are not read at all.
+
+    Returns the ResultsTreeRoots categories the IDF lands in, beyond AllCompared, along with a map of each output file
+    that differed to the category it caused, and to the magnitude of its diff."""
+    patterns = volatile_patterns if volatile_patterns is not None else DEFAULT_VOLATILE_PATTERNS
+    identical_files = set(identical_files)
+    diffs: Dict[str, str] = dict()
+    magnitudes: Dict[str, Dict] = dict()
+    stages = [
+        (MATH_DIFF_FILES, lambda a, b: math_diff(a, b, math_thresholds, frequency=reporting_frequency)),
+        (TABLE_DIFF_FILES, lambda a, b: table_diff(a, b, table_thresholds)),
+        (TEXT_DIFF_FILES, lambda a, b: text_diff(a, b, patterns)),
+    ]
+    for file_names, diff_function in stages:
+        for file_name in file_names:
+            if file_name in identical_files:
+                continue
+            file_1 = out_dir_1 / file_name
+            file_2 = out_dir_2 / file_name
+            if not (file_1.is_file() and file_2.is_file()):
+                continue
+            result = diff_function(file_1, file_2)
+            if result.category:
+                diffs[file_name] = result.category
+                magnitudes[file_name] = diff_magnitude(result)
+    categories = [ResultsTreeRoots.AllCompared]
+    for category in ResultsTreeRoots.get_all():  # keep the tree's ordering, and each category only once
+        if category in diffs.values():
+            categories.append(category)
+    return {
+        'categories': categories, 'diffs': diffs, 'magnitudes': magnitudes, 'diff_file': ', '.join(sorted(diffs))
+    }
@@ -0,0 +1,126 @@
+import os
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Iterable, List, Union
+
+
+def read_load_average() -> float:
+    """One minute load average per CPU, 1.0 meaning every core has something to run, or 0.0 where there's no telling,
+    like on Windows"""
+    if not hasattr(os, 'getloadavg'):
+        return 0.0
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return 0.0
+
+
+def read_available_memory() -> Union[None, int]:
+    """Bytes of memory available to new work without swapping, from /proc/meminfo, or None off Linux"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _child_pids(pid: int) -> List[int]:
+    children = list()
+    for task in Path(f'/proc/{pid}/task').glob('*'):
+        try:
+            children.extend(int(child) for child in (task / 'children').read_text().split())
+        except (OSError, ValueError):
+            pass
+    return children
+
+
+def read_rss(pid: int) -> int:
+    """Resident bytes of a process along with everything it has started, e.g. the simulation a worker is running"""
+    total = 0
+    to_visit = [pid]
+    page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+    while to_visit:
+        current = to_visit.pop()
+        try:
+            total += int(Path(f'/proc/{current}/statm').read_text().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue  # it finished while we were looking, or this isn't Linux
+        to_visit.extend(_child_pids(current))
+    return total
+
+
+class AdaptiveConcurrency:
+    """Decides how many local workers should be running, within min_workers..max_workers, from how loaded the
+    machine is.
+
+    Every sample_interval seconds the run engine hands over the pids of its busy workers.  The limit then moves by one
+    worker at a time, with these rules:
+
+    * It shrinks when free memory drops below memory_headroom bytes, or when the load average is above
+      high_load per CPU.
+    * It grows when the load is under low_load per CPU and there is room in memory for one more worker of the size
+      the running ones are.
+
+    While free memory is below the headroom no new jobs start at all.  Every change is passed to log, so the
+    thresholds can be tuned from what a run actually did.  The probes default to /proc, and can be swapped for
+    tests."""
+
+    def __init__(self, min_workers: int = 1, max_workers: Union[None, int] = None,
+                 memory_headroom: int = 2 * 1024 ** 3, high_load: float = 1.0, low_load: float = 0.75,
+                 sample_interval: float = 2.0, log: Union[None, Callable[[str], None]] = None,
+                 load_average: Callable[[], float] = read_load_average,
+                 available_memory: Callable[[], Union[None, int]] = read_available_memory,
+                 rss: Callable[[int], int] = read_rss):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers or os.cpu_count() or 1)
+        self.memory_headroom = memory_headroom
+        self.high_load = high_load
+        self.low_load = low_load
+        self.sample_interval = sample_interval
+        self.log = log
+        self.load_average = load_average
+        self.available_memory = available_memory
+        self.rss = rss
+        self.limit = self.min_workers
+        self.holding = False  # True while new jobs are held back for lack of memory
+        self.decisions: List[str] = list()
+        self._last_sample = None
+
+    def update(self, busy_pids: Iterable[int]):
+        """Takes a fresh sample, if it's time for one, and moves the limit accordingly"""
+        now = perf_counter()
+        if self._last_sample is not None and now - self._last_sample < self.sample_interval:
+            return
+        self._last_sample = now
+        busy_pids = list(busy_pids)
+        load = self.load_average()
+        available = self.available_memory()
+        worker_rss = max((self.rss(pid) for pid in busy_pids), default=0)
+        low_memory = available is not None and available < self.memory_headroom
+        reading = (
+            f"load {load:.2f}/CPU, {self._megabytes(available)} available, "
+            f"{len(busy_pids)} busy at up to {self._megabytes(worker_rss)} each"
+        )
+        if low_memory != self.holding:
+            self.holding = low_memory
+            self._decide(f"{'Holding back' if low_memory else 'Resuming'} new jobs: {reading}")
+        if low_memory or load > self.high_load:
+            if self.limit > self.min_workers:
+                self.limit -= 1
+                self._decide(f"Down to {self.limit} workers: {reading}")
+        elif load < self.low_load and len(busy_pids) >= self.limit and self.limit < self.max_workers:
+            if available is None or available - worker_rss >= self.memory_headroom:
+                self.limit += 1
+                self._decide(f"Up to {self.limit} workers: {reading}")
+
+    def _decide(self, decision: str):
+        self.decisions.append(decision)
+        if self.log:
+            self.log(decision)
+
+    @staticmethod
+    def _megabytes(num_bytes: Union[None, int]) -> str:
+        return 'unknown memory' if num_bytes is None else f"{num_bytes / 1024 ** 2:.0f} MB"
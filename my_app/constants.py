@@ -0,0 +1,77 @@
+class ResultsTreeRoots:
+    AllFiles = "All Files Run"
+    Case1Success = "Case 1 Successful Runs"
+    Case1Fail = "Case 1 Failed Runs"
+    Case2Success = "Case 2 Successful Runs"
+    Case2Fail = "Case 2 Failed Runs"
+    AllCompared = "All Files Compared"
+    BigMathDiff = "Big Math Diffs"
+    SmallMathDiff = "Small Math Diffs"
+    BigTableDiff = "Big Table Diffs"
+    SmallTableDiff = "Small Table Diffs"
+    TextDiff = "Text Diffs"
+
+    @staticmethod
+    def get_all():
+        return [
+            ResultsTreeRoots.AllFiles,
+            ResultsTreeRoots.Case1Success,
+            ResultsTreeRoots.Case1Fail,
+            ResultsTreeRoots.Case2Success,
+            ResultsTreeRoots.Case2Fail,
+            ResultsTreeRoots.AllCompared,
+            ResultsTreeRoots.BigMathDiff,
+            ResultsTreeRoots.SmallMathDiff,
+            ResultsTreeRoots.BigTableDiff,
+            ResultsTreeRoots.SmallTableDiff,
+            ResultsTreeRoots.TextDiff,
+        ]
+
+
+class RunOptions:
+    DONT_FORCE = 'Don\'t force anything'
+    FORCE_DD_ONLY = 'Force design-day-only simulations'
+    FORCE_ANNUAL = 'Force annual simulations'
+
+    @staticmethod
+    def get_all():
+        return {RunOptions.DONT_FORCE, RunOptions.FORCE_DD_ONLY, RunOptions.FORCE_ANNUAL}
+
+
+class ReportingFrequency:
+    DETAILED = 'Detailed'
+    TIMESTEP = 'TimeStep'
+    HOURLY = 'Hourly'
+    DAILY = 'Daily'
+    MONTHLY = 'Monthly'
+    RUNPERIOD = 'RunPeriod'
+    ENVIRONMENT = 'Environment'
+    ANNUAL = 'Annual'
+
+    @staticmethod
+    def get_all():
+        return {
+            ReportingFrequency.DETAILED, ReportingFrequency.TIMESTEP, ReportingFrequency.HOURLY,
+            ReportingFrequency.DAILY, ReportingFrequency.MONTHLY, ReportingFrequency.RUNPERIOD,
+            ReportingFrequency.ENVIRONMENT, ReportingFrequency.ANNUAL
+        }
+
+
+class PipelineStages:
+    Case1 = 'Case 1'
+    Case2 = 'Case 2'
+    Compare = 'Compare'
+
+    @staticmethod
+    def get_all():
+        return [PipelineStages.Case1, PipelineStages.Case2, PipelineStages.Compare]
+
+
+class IdfFilterModes:
+    CONTAINS = 'Contains'
+    WORD_STARTS = 'Word starts with'
+    GLOB = 'Glob'
+
+    @staticmethod
+    def get_all():
+        return [IdfFilterModes.CONTAINS, IdfFilterModes.WORD_STARTS, IdfFilterModes.GLOB]
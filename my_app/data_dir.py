@@ -0,0 +1,13 @@
+from os import environ
+from pathlib import Path
+
+
+def get_data_dir(*sub_dirs: str) -> Path:
+    """Returns (and creates) a folder for the tool's persistent local data, such as caches and indexes
+
+    The base folder can be moved with the EPLUS_REGRESSION_TOOL_DATA environment variable."""
+    base = environ.get('EPLUS_REGRESSION_TOOL_DATA')
+    data_dir = Path(base) if base else Path.home() / '.eplus_regression_tool'
+    data_dir = data_dir.joinpath(*sub_dirs)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir
@@ -0,0 +1,20 @@
+class DiffThresholds:
+    """A value is a big diff if it exceeds both big thresholds, and a small diff if it exceeds both small ones"""
+
+    def __init__(self, big_abs: float = 0.01, big_rel: float = 0.005, small_abs: float = 0.001,
+                 small_rel: float = 0.001):
+        self.big_abs = big_abs
+        self.big_rel = big_rel
+        self.small_abs = small_abs
+        self.small_rel = small_rel
+
+    def classify(self, a: float, b: float) -> int:
+        """Compares one pair of values, returning 2 for a big diff, 1 for a small diff or 0 for no diff"""
+        abs_diff = abs(a - b)
+        scale = max(abs(a), abs(b))
+        rel_diff = abs_diff / scale if scale > 0 else 0.0
+        if abs_diff > self.big_abs and rel_diff > self.big_rel:
+            return 2
+        if abs_diff > self.small_abs and rel_diff > self.small_rel:
+            return 1
+        return 0
@@ -1,101 +1,73 @@
 from datetime import datetime
 from pathlib import Path
-import random
+from shutil import rmtree
 from threading import Thread
 from tkinter import (
     Tk, ttk,  # Core pieces
-    Button, Frame, Label, LabelFrame, Listbox, Menu, OptionMenu, Scrollbar, Spinbox,  # Widgets
-    StringVar,  # Special Types
+    Button, Checkbutton, Entry, Frame, Label, LabelFrame, Menu, OptionMenu, Scrollbar, Spinbox,  # Widgets
+    BooleanVar, StringVar,  # Special Types
     messagebox,  # Dialog boxes
     E, W,  # Cardinal directions N, S,
     X, Y, BOTH,  # Orthogonal directions (for fill)
-    END, LEFT, TOP,  # relative directions (RIGHT, TOP)
+    LEFT, TOP, BOTTOM,  # relative directions (RIGHT)
     filedialog, simpledialog,  # system dialogs
 )
-from typing import Set
-
+from typing import List, Tuple, Union
 from pubsub import pub
 
-from my_app.background_operation import BackgroundOperation
-
-
-class ResultsTreeRoots:
-    AllFiles = "All Files Run"
-    Case1Success = "Case 1 Successful Runs"
-    Case1Fail = "Case 1 Failed Runs"
-    Case2Success = "Case 2 Successful Runs"
-    Case2Fail = "Case 2 Failed Runs"
-    AllCompared = "All Files Compared"
-    BigMathDiff = "Big Math Diffs"
-    SmallMathDiff = "Small Math Diffs"
-    BigTableDiff = "Big Table Diffs"
-    SmallTableDiff = "Small Table Diffs"
-    TextDiff = "Text Diffs"
-
-    @staticmethod
-    def get_all():
-        return [
-            ResultsTreeRoots.AllFiles,
-            ResultsTreeRoots.Case1Success,
-            ResultsTreeRoots.Case1Fail,
-            ResultsTreeRoots.Case2Success,
-            ResultsTreeRoots.Case2Fail,
-            ResultsTreeRoots.AllCompared,
-            ResultsTreeRoots.BigMathDiff,
-            ResultsTreeRoots.SmallMathDiff,
-            ResultsTreeRoots.BigTableDiff,
-            ResultsTreeRoots.SmallTableDiff,
-            ResultsTreeRoots.TextDiff,
-        ]
+from my_app.constants import IdfFilterModes
+from my_app.constants import ReportingFrequency, ResultsTreeRoots, RunOptions  # noqa: F401 -- re-exported
+from my_app.data_dir import get_data_dir
+from my_app.gui_dispatch import GuiDispatcher
+from my_app.idf_index import CommonIdfTracker, IdfDiscoveryIndex, dummy_get_idf_dir
+from my_app.idf_index import dummy_get_idfs_in_dir  # noqa: F401 -- re-exported
+from my_app.idf_search import IdfSearchIndex
+from my_app.idf_selection import IdfSelectionModel
+from my_app.log_buffer import LogBuffer
+from my_app.pipeline_stats import PipelineStats
+from my_app.tracing import Tracer, tracer
+from my_app.virtual_listbox import VirtualListbox
 
 
 class PubSubMessageTypes:
     STATUS = '10'
     FINISHED = '20'
     CANCELLED = '30'
-
-
-class RunOptions:
-    DONT_FORCE = 'Don\'t force anything'
-    FORCE_DD_ONLY = 'Force design-day-only simulations'
-    FORCE_ANNUAL = 'Force annual simulations'
-
-    @staticmethod
-    def get_all():
-        return {RunOptions.DONT_FORCE, RunOptions.FORCE_DD_ONLY, RunOptions.FORCE_ANNUAL}
-
-
-class ReportingFrequency:
-    DETAILED = 'Detailed'
-    TIMESTEP = 'TimeStep'
-    HOURLY = 'Hourly'
-    DAILY = 'Daily'
-    MONTHLY = 'Monthly'
-    RUNPERIOD = 'RunPeriod'
-    ENVIRONMENT = 'Environment'
-    ANNUAL = 'Annual'
+    IDFS_FOUND = '40'
+    IDF_DISCOVERY_DONE = '50'
+    IDF_RESULTS = '60'
+    BUILD_DIRS_INVALID = '70'
+    OUTPUT_STORE_CLEANED = '80'
+    IDF_SEARCH_INDEX_BUILT = '90'
 
     @staticmethod
-    def get_all():
-        return {
-            ReportingFrequency.DETAILED, ReportingFrequency.TIMESTEP, ReportingFrequency.HOURLY,
-            ReportingFrequency.DAILY, ReportingFrequency.MONTHLY, ReportingFrequency.RUNPERIOD,
-            ReportingFrequency.ENVIRONMENT, ReportingFrequency.ANNUAL
+    def name(message_type: str) -> str:
+        """What a message type is called in traces"""
+        names = {
+            PubSubMessageTypes.STATUS: 'status', PubSubMessageTypes.FINISHED: 'finished',
+            PubSubMessageTypes.CANCELLED: 'cancelled', PubSubMessageTypes.IDFS_FOUND: 'IDFs found',
+            PubSubMessageTypes.IDF_DISCOVERY_DONE: 'IDF discovery done', PubSubMessageTypes.IDF_RESULTS: 'IDF results',
+            PubSubMessageTypes.BUILD_DIRS_INVALID: 'build folders invalid',
+            PubSubMessageTypes.OUTPUT_STORE_CLEANED: 'output store cleaned',
+            PubSubMessageTypes.IDF_SEARCH_INDEX_BUILT: 'IDF search index built',
         }
-
-
-def dummy_get_idf_dir(build_dir: Path) -> Path:
-    return build_dir.parent / 'testfiles'
-
-
-def dummy_get_idfs_in_dir(idf_dir: Path) -> Set[Path]:
-    all_idfs_absolute_path = list(idf_dir.rglob('*.idf'))
-    all_idfs_relative_path = set([idf.relative_to(idf_dir) for idf in all_idfs_absolute_path])
-    return all_idfs_relative_path
+        return names.get(message_type, message_type)
 
 
 class MyApp(Frame):
 
+    # max time the Tk thread spends applying background updates per frame, keeps the GUI responsive under load
+    GUI_FRAME_BUDGET_MS = 15.0
+    # number of log lines kept in memory for the log view, the full log is always spilled to disk
+    LOG_CAPACITY = 10000
+    RESULTS_DB_NAME = 'results.sqlite3'
+    PIPELINE_STATS_INTERVAL_MS = 500
+    # each run's simulation outputs are kept in the tool's data for this many runs, for looking into its diffs
+    KEEP_RUN_OUTPUTS = 3
+    # cleaning up the output store forgets runs older than this, then gzips what's gone unused for the other
+    OUTPUT_STORE_MAX_AGE_DAYS = 30
+    OUTPUT_STORE_COMPRESS_AFTER_DAYS = 7
+
     def __init__(self):
         self.root = Tk()
         Frame.__init__(self, self.root)
@@ -108,15 +80,27 @@ class MyApp(Frame):
         # members related to the background thread and operator instance
         self.long_thread = None
         self.background_operator = None
+        self.running = False
 
         # tk variables we can access later
         self.label_string = StringVar()
         self.build_dir_1_var = StringVar()
         self.build_dir_2_var = StringVar()
+        self.pipeline_string = StringVar()
+        self.performance_string = StringVar()
+        self.trace_var = BooleanVar()
         self.run_period_option = StringVar()
         self.run_period_option.set(RunOptions.DONT_FORCE)
         self.reporting_frequency = StringVar()
         self.reporting_frequency.set(ReportingFrequency.HOURLY)
+        self.resume_var = BooleanVar()
+        self.remote_port_var = StringVar()
+        self.remote_expose_var = BooleanVar()  # listen on every interface, not just for workers on this machine
+        self.idf_filter_var = StringVar()
+        self.idf_filter_mode_var = StringVar()
+        self.idf_filter_mode_var.set(IdfFilterModes.CONTAINS)
+        self.idf_filter_var.trace_add('write', self.idf_filter_changed)
+        self.idf_filter_mode_var.trace_add('write', self.idf_filter_changed)
 
         # widgets that we might want to access later
         self.build_dir_1_button = None
@@ -130,6 +114,7 @@ class MyApp(Frame):
         self.progress = None
         self.log_message_listbox = None
         self.results_tree = None
+        self.results_tree_view = None
         self.num_threads_spinner = None
         self.full_idf_listbox = None
         self.move_idf_to_active_button = None
@@ -138,21 +123,50 @@ class MyApp(Frame):
         self.idf_select_all_button = None
         self.idf_deselect_all_button = None
         self.idf_select_n_random_button = None
+        self.idf_filter_entry = None
+        self.idf_add_matches_button = None
+        self.idf_select_n_random_matches_button = None
         self.run_period_option_menu = None
         self.reporting_frequency_option_menu = None
+        self.resume_check = None
+        self.remote_port_entry = None
+        self.remote_expose_check = None
+        self.trace_check = None
+        self.main_notebook = None
+        self.unbuilt_tabs = dict()  # Tk path name of each tab's frame to (frame, function that fills it in)
 
         # some data holders
-        self.tree_folders = dict()
+        self.results_store = None  # opened the first time there are results to show or store, see open_results
+        self.results_model = None
+        self.remote_workers = None  # a RemoteWorkerListener, once a remote worker port has been given
         self.valid_idfs_in_listing = False
         self.run_button_color = '#008000'
-
-        # initialize the GUI
-        self.init_window()
-
-        # wire up the background thread
+        self.full_idf_listing = None  # what the full IDF list shows, None until the build folders have been looked at
+        self.idf_discovery_generation = 0  # bumped on each refresh so batches from a stale scan are dropped
+        self.common_idf_tracker = CommonIdfTracker()
+        self.idf_selection = IdfSelectionModel()
+        self.trace_summary = list()  # the summary table of the last traced run, for the Performance tab
+        self.log_buffer = LogBuffer(self.LOG_CAPACITY, LogBuffer.new_spill_path(get_data_dir('logs')))
+
+        # wire up the background threads: their callbacks post to the dispatcher, which hands them to pubsub on the
+        # Tk thread, coalesced so that a burst of completions costs one GUI update per frame
+        self.dispatcher = GuiDispatcher(
+            self.root, self.dispatch_handler, PubSubMessageTypes.STATUS, frame_budget_ms=self.GUI_FRAME_BUDGET_MS,
+            batched_message_types=(PubSubMessageTypes.IDF_RESULTS,)
+        )
         pub.subscribe(self.status_handler, PubSubMessageTypes.STATUS)
         pub.subscribe(self.finished_handler, PubSubMessageTypes.FINISHED)
         pub.subscribe(self.cancelled_handler, PubSubMessageTypes.CANCELLED)
+        pub.subscribe(self.idf_results_handler, PubSubMessageTypes.IDF_RESULTS)
+        pub.subscribe(self.idfs_found_handler, PubSubMessageTypes.IDFS_FOUND)
+        pub.subscribe(self.idf_discovery_done_handler, PubSubMessageTypes.IDF_DISCOVERY_DONE)
+        pub.subscribe(self.build_dirs_invalid_handler, PubSubMessageTypes.BUILD_DIRS_INVALID)
+        pub.subscribe(self.output_store_cleaned_handler, PubSubMessageTypes.OUTPUT_STORE_CLEANED)
+        pub.subscribe(self.idf_search_index_built_handler, PubSubMessageTypes.IDF_SEARCH_INDEX_BUILT)
+
+        # initialize the GUI
+        self.init_window()
+        self.dispatcher.start()
 
     def init_window(self):
         # changing the title of our master widget
@@ -163,11 +177,14 @@ class MyApp(Frame):
         menu = Menu(self.root)
         self.root.config(menu=menu)
         file_menu = Menu(menu)
+        file_menu.add_command(label="Clean Up Output Store", command=self.client_clean_output_store)
+        file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.client_exit)
         menu.add_cascade(label="File", menu=file_menu)
 
         # main notebook holding everything
         main_notebook = ttk.Notebook(self.root)
+        self.main_notebook = main_notebook
 
         # run configuration
         pane_run = Frame(main_notebook)
@@ -186,7 +203,8 @@ class MyApp(Frame):
         group_run_options = LabelFrame(pane_run, text="Run Options")
         group_run_options.pack(fill=X, padx=5)
         Label(group_run_options, text="Number of threads for suite: ").grid(row=1, column=1, sticky=E)
-        self.num_threads_spinner = Spinbox(group_run_options, from_=1, to_=48)  # validate later
+        # 'auto' lets the CPU and memory pressure on this machine decide, up to one per CPU
+        self.num_threads_spinner = Spinbox(group_run_options, values=[str(n) for n in range(1, 49)] + ['auto'])
         self.num_threads_spinner.grid(row=1, column=2, sticky=W)
         Label(group_run_options, text="Test suite run configuration: ").grid(row=2, column=1, sticky=E)
         self.run_period_option_menu = OptionMenu(group_run_options, self.run_period_option, *RunOptions.get_all())
@@ -196,10 +214,59 @@ class MyApp(Frame):
             group_run_options, self.reporting_frequency, *ReportingFrequency.get_all()
         )
         self.reporting_frequency_option_menu.grid(row=3, column=2, sticky=W)
+        self.resume_check = Checkbutton(
+            group_run_options, text="Resume previous run of this configuration", variable=self.resume_var
+        )
+        self.resume_check.grid(row=4, column=1, columnspan=2, sticky=W)
+        Label(group_run_options, text="Listen for remote workers on port: ").grid(row=5, column=1, sticky=E)
+        self.remote_port_entry = Entry(group_run_options, textvariable=self.remote_port_var, width=8)
+        self.remote_port_entry.grid(row=5, column=2, sticky=W)
+        self.remote_expose_check = Checkbutton(
+            group_run_options, text="Accept workers on other machines", variable=self.remote_expose_var
+        )
+        self.remote_expose_check.grid(row=6, column=1, columnspan=2, sticky=W)
         main_notebook.add(pane_run, text='Configuration')
 
+        # the other tabs are only built the first time they are shown, keeping them off the startup path
+        for text, build_tab in (
+                ("IDF Selection", self.build_idf_tab), ("Log Messages", self.build_log_tab),
+                ("Run Control and Results", self.build_results_tab), ("Performance", self.build_performance_tab)
+        ):
+            frame = Frame(main_notebook)
+            main_notebook.add(frame, text=text)
+            self.unbuilt_tabs[str(frame)] = (frame, build_tab)
+        main_notebook.bind('<<NotebookTabChanged>>', self.tab_changed)
+
+        # pack the main notebook on the window
+        main_notebook.pack(fill=BOTH, expand=1)
+
+        # status bar at the bottom
+        frame_status = Frame(self.root)
+        self.run_button = Button(frame_status, text="Run", bg=self.run_button_color, command=self.client_run)
+        self.run_button.pack(side=LEFT, expand=0)
+        self.stop_button = Button(frame_status, text="Stop", command=self.client_stop, state='disabled')
+        self.stop_button.pack(side=LEFT, expand=0)
+        self.progress = ttk.Progressbar(frame_status)
+        self.progress.pack(side=LEFT, expand=0)
+        label = Label(frame_status, textvariable=self.label_string)
+        self.label_string.set("Initialized")
+        label.pack(side=LEFT, anchor=W)
+        frame_status.pack(fill=X)
+        self.add_to_log("Program started!")
+
+    def tab_changed(self, _=None):
+        self.build_tab(self.main_notebook.select())
+
+    def build_tab(self, name: str):
+        """Builds a notebook tab the first time it's needed, name being its frame's Tk path name"""
+        if name not in self.unbuilt_tabs:
+            return
+        frame, build = self.unbuilt_tabs.pop(name)
+        build(frame)
+        self.set_widget_states()  # a tab built part way through a run starts out like the rest of the window
+
+    def build_idf_tab(self, pane_idfs):
         # now let's set up a list of checkboxes for selecting IDFs to run
-        pane_idfs = Frame(main_notebook)
         group_idf_tools = LabelFrame(pane_idfs, text="IDF Selection Tools")
         group_idf_tools.pack(fill=X, padx=5)
         self.idf_select_all_button = Button(
@@ -219,14 +286,26 @@ class MyApp(Frame):
         )
         self.idf_select_n_random_button.pack(side=LEFT, expand=1)
 
+        # filters the full list as you type, the matches come from the selection model's search index
+        group_idf_filter = LabelFrame(pane_idfs, text="Filter IDFs")
+        group_idf_filter.pack(fill=X, padx=5)
+        self.idf_filter_entry = Entry(group_idf_filter, textvariable=self.idf_filter_var)
+        self.idf_filter_entry.pack(side=LEFT, fill=X, expand=True)
+        OptionMenu(group_idf_filter, self.idf_filter_mode_var, *IdfFilterModes.get_all()).pack(side=LEFT)
+        self.idf_add_matches_button = Button(
+            group_idf_filter, text="Add Matches to Active", command=self.idf_add_matches_to_active
+        )
+        self.idf_add_matches_button.pack(side=LEFT)
+        self.idf_select_n_random_matches_button = Button(
+            group_idf_filter, text="Select N Random Matches", command=self.idf_select_random_matches
+        )
+        self.idf_select_n_random_matches_button.pack(side=LEFT)
+
+        # both lists only render the rows in view, the actual lists of IDFs live in self.idf_selection
         group_full_idf_list = LabelFrame(pane_idfs, text="Full IDF List")
         group_full_idf_list.pack(fill=X, padx=5)
-        scrollbar = Scrollbar(group_full_idf_list)
-        self.full_idf_listbox = Listbox(group_full_idf_list, yscrollcommand=scrollbar.set)
-        self.full_idf_listbox.bind('<Double-1>', self.idf_move_to_active)
+        self.full_idf_listbox = VirtualListbox(group_full_idf_list, on_double_click=self.idf_move_to_active)
         self.full_idf_listbox.pack(fill=BOTH, side=LEFT, expand=True)
-        scrollbar.pack(fill=Y, side=LEFT)
-        scrollbar.config(command=self.full_idf_listbox.yview)
 
         self.move_idf_to_active_button = Button(
             pane_idfs, text="↓ Add to Active List ↓", command=self.idf_move_to_active
@@ -240,33 +319,29 @@ class MyApp(Frame):
 
         group_active_idf_list = LabelFrame(pane_idfs, text="Active IDF List")
         group_active_idf_list.pack(fill=X, padx=5)
-        scrollbar = Scrollbar(group_active_idf_list)
-        self.active_idf_listbox = Listbox(group_active_idf_list, yscrollcommand=scrollbar.set)
-        self.active_idf_listbox.bind('<Double-1>', self.idf_remove_from_active)
+        self.active_idf_listbox = VirtualListbox(group_active_idf_list, on_double_click=self.idf_remove_from_active)
         self.active_idf_listbox.pack(fill=BOTH, side=LEFT, expand=True)
-        scrollbar.pack(fill=Y, side=LEFT)
-        scrollbar.config(command=self.active_idf_listbox.yview)
-
-        self.build_idf_listing(initialize=True)
 
-        main_notebook.add(pane_idfs, text="IDF Selection")
+        # the build folders are only looked at once there's a listing to show them in, or they are changed
+        if self.full_idf_listing is None:
+            self.build_idf_listing(initialize=True)
+        else:
+            self.full_idf_listbox.show(self.full_idf_listing)
+            self.active_idf_listbox.show(self.idf_selection.active)
 
+    def build_log_tab(self, frame_log_messages):
         # set up a scrolled listbox for the log messages
-        frame_log_messages = Frame(main_notebook)
         group_log_messages = LabelFrame(frame_log_messages, text="Log Message Tools")
         group_log_messages.pack(fill=X, padx=5)
         Button(group_log_messages, text="Clear Log Messages", command=self.clear_log).pack(side=LEFT, expand=1)
         Button(group_log_messages, text="Copy Log Messages", command=self.copy_log).pack(side=LEFT, expand=1)
-        scrollbar = Scrollbar(frame_log_messages)
-        self.log_message_listbox = Listbox(frame_log_messages, yscrollcommand=scrollbar.set)
-        self.add_to_log("Program started!")
+        Button(group_log_messages, text="Export Full Log...", command=self.export_log).pack(side=LEFT, expand=1)
+        self.log_message_listbox = VirtualListbox(frame_log_messages, self.log_buffer, follow_tail=True)
         self.log_message_listbox.pack(fill=BOTH, side=LEFT, expand=True)
-        scrollbar.pack(fill=Y, side=LEFT)
-        scrollbar.config(command=self.log_message_listbox.yview)
-        main_notebook.add(frame_log_messages, text="Log Messages")
 
+    def build_results_tab(self, frame_results):
+        from my_app.results_tree import LazyResultsTree
         # set up a tree-view for the results
-        frame_results = Frame(main_notebook)
         scrollbar = Scrollbar(frame_results)
         self.results_tree = ttk.Treeview(frame_results, columns=("Base File", "Mod File", "Diff File"))
         self.results_tree.heading("#0", text="Results")
@@ -277,116 +352,209 @@ class MyApp(Frame):
         self.results_tree.column("Mod File", minwidth=100, width=100)
         self.results_tree.heading("Diff File", text="Diff File")
         self.results_tree.column("Diff File", minwidth=100, width=100)
-        self.build_results_tree()
+        # whatever the model already holds, like a run that started before the tab was first shown, shows up
+        self.results_tree_view = LazyResultsTree(self.results_tree, self.open_results())
+        Label(frame_results, textvariable=self.pipeline_string, anchor=W).pack(fill=X, side=BOTTOM)
         self.results_tree.pack(fill=BOTH, side=LEFT, expand=True)
         scrollbar.pack(fill=Y, side=LEFT)
         scrollbar.config(command=self.results_tree.yview)
-        main_notebook.add(frame_results, text="Run Control and Results")
 
-        # pack the main notebook on the window
-        main_notebook.pack(fill=BOTH, expand=1)
-
-        # status bar at the bottom
-        frame_status = Frame(self.root)
-        self.run_button = Button(frame_status, text="Run", bg=self.run_button_color, command=self.client_run)
-        self.run_button.pack(side=LEFT, expand=0)
-        self.stop_button = Button(frame_status, text="Stop", command=self.client_stop, state='disabled')
-        self.stop_button.pack(side=LEFT, expand=0)
-        self.progress = ttk.Progressbar(frame_status)
-        self.progress.pack(side=LEFT, expand=0)
-        label = Label(frame_status, textvariable=self.label_string)
-        self.label_string.set("Initialized")
-        label.pack(side=LEFT, anchor=W)
-        frame_status.pack(fill=X)
+    def build_performance_tab(self, frame_performance):
+        # live figures for the run, and tracing to find out where the time goes
+        group_trace = LabelFrame(frame_performance, text="Tracing")
+        group_trace.pack(fill=X, padx=5)
+        self.trace_check = Checkbutton(group_trace, text="Record a trace of the next run", variable=self.trace_var)
+        self.trace_check.pack(side=LEFT, expand=1)
+        Button(group_trace, text="Export Trace...", command=self.export_trace).pack(side=LEFT, expand=1)
+        Label(
+            frame_performance, textvariable=self.performance_string, anchor='nw', justify=LEFT, font='TkFixedFont'
+        ).pack(fill=BOTH, expand=True, padx=5)
+
+    def open_results(self):
+        """The results model, opening the results store behind it the first time it's needed"""
+        if self.results_model is None:
+            from my_app.results_model import ResultsModel
+            from my_app.results_store import ResultsStore
+            self.results_store = ResultsStore(get_data_dir() / self.RESULTS_DB_NAME)
+            self.results_model = ResultsModel(self.results_store)
+        return self.results_model
 
     def run(self):
         self.root.mainloop()
 
     def build_idf_listing(self, initialize=False, desired_selected_idfs=None):
+        with tracer.span('Build IDF listing', 'gui'):
+            self._build_idf_listing(initialize, desired_selected_idfs)
+
+    def _build_idf_listing(self, initialize, desired_selected_idfs):
         # clear any existing ones
-        self.active_idf_listbox.delete(0, END)
-        self.full_idf_listbox.delete(0, END)
+        self.idf_selection.clear()
+        if self.active_idf_listbox:
+            self.active_idf_listbox.show(self.idf_selection.active)
 
-        # now rebuild them
+        # now rebuild them, any scan still running from a previous refresh is abandoned
         self.valid_idfs_in_listing = False
-        path_1 = Path(self.build_dir_1_var.get())
-        path_2 = Path(self.build_dir_2_var.get())
-        if path_1.exists() and path_2.exists():
-            idf_dir_1 = dummy_get_idf_dir(path_1)
-            idfs_dir_1 = dummy_get_idfs_in_dir(idf_dir_1)
-            idf_dir_2 = dummy_get_idf_dir(path_2)
-            idfs_dir_2 = dummy_get_idfs_in_dir(idf_dir_2)
-            common_idfs = idfs_dir_1.intersection(idfs_dir_2)
-            for idf in sorted(common_idfs):
-                self.full_idf_listbox.insert(END, str(idf))
-            self.valid_idfs_in_listing = True
-        elif initialize:
-            self.full_idf_listbox.insert(END, "This will be the master list")
-            self.full_idf_listbox.insert(END, "Select build folders to fill listing")
-        elif path_1.exists():
-            self.full_idf_listbox.insert(END, "Cannot update master list master list")
-            self.full_idf_listbox.insert(END, "Build folder path #2 is invalid")
-            self.full_idf_listbox.insert(END, "Select build folders to fill listing")
-        elif path_2.exists():
-            self.full_idf_listbox.insert(END, "Cannot update master list master list")
-            self.full_idf_listbox.insert(END, "Build folder path #1 is invalid")
-            self.full_idf_listbox.insert(END, "Select build folders to fill listing")
-        else:
-            self.full_idf_listbox.insert(END, "Cannot update master list master list")
-            self.full_idf_listbox.insert(END, "Both build folders are invalid")
-            self.full_idf_listbox.insert(END, "Select build folders to fill listing")
+        self.idf_discovery_generation += 1
+        self.common_idf_tracker = CommonIdfTracker()
+        # the build folders are checked by the background scan, they may be on a slow network drive, and the listing
+        # is taken to be fine until it says otherwise
+        self.start_idf_discovery(Path(self.build_dir_1_var.get()), Path(self.build_dir_2_var.get()), initialize)
+        self.label_string.set("Searching for IDFs...")
+        self.valid_idfs_in_listing = True
+        self.apply_idf_filter()
 
         if desired_selected_idfs is None:
             ...
             # add things to the listbox
 
-    def build_results_tree(self, results=None):
-        self.results_tree.delete(*self.results_tree.get_children())
-        for root in ResultsTreeRoots.get_all():
-            self.tree_folders[root] = self.results_tree.insert(
-                parent="", index='end', text=root, values=("", "", "")
-            )
-            if results:
-                self.results_tree.insert(
-                    parent=self.tree_folders[root], index="end", text="Pretend",
-                    values=("These", "Are", "Real")
+    def show_full_idf_listing(self, listing):
+        self.full_idf_listing = listing
+        if self.full_idf_listbox:
+            self.full_idf_listbox.show(listing)
+
+    @staticmethod
+    def invalid_build_dirs_listing(path_1: Path, path_2: Path, initialize: bool) -> Union[None, List[str]]:
+        """What the master list says when either build folder doesn't exist, None if they both do"""
+        exists_1 = path_1.exists()
+        exists_2 = path_2.exists()
+        if exists_1 and exists_2:
+            return None
+        if initialize:
+            return ["This will be the master list", "Select build folders to fill listing"]
+        if exists_1:
+            problem = "Build folder path #2 is invalid"
+        elif exists_2:
+            problem = "Build folder path #1 is invalid"
+        else:
+            problem = "Both build folders are invalid"
+        return ["Cannot update master list master list", problem, "Select build folders to fill listing"]
+
+    def start_idf_discovery(self, build_dir_1: Path, build_dir_2: Path, initialize: bool = False):
+        generation = self.idf_discovery_generation
+
+        def is_stale():
+            return generation != self.idf_discovery_generation
+
+        def discover(idf_dir: Path, sides):
+            with tracer.span('Discover IDFs', 'discovery', idf_dir=str(idf_dir)):
+                IdfDiscoveryIndex(idf_dir).scan(
+                    lambda found: self.dispatcher.post(
+                        PubSubMessageTypes.IDFS_FOUND, generation=generation, sides=sides, idfs=found
+                    ),
+                    should_stop=is_stale
                 )
+
+        def discover_all():
+            listing = self.invalid_build_dirs_listing(build_dir_1, build_dir_2, initialize)
+            if listing:
+                self.dispatcher.post(PubSubMessageTypes.BUILD_DIRS_INVALID, generation=generation, listing=listing)
+                return
+            idf_dir_1 = dummy_get_idf_dir(build_dir_1)
+            idf_dir_2 = dummy_get_idf_dir(build_dir_2)
+            if idf_dir_1.resolve() == idf_dir_2.resolve():
+                discover(idf_dir_1, (0, 1))  # both builds share one testfiles folder, only walk it once
             else:
-                self.results_tree.insert(
-                    parent=self.tree_folders[root], index="end", text="Run test for results",
-                    values=("", "", "")
-                )
+                other_side = Thread(target=discover, args=(idf_dir_2, (1,)), daemon=True)
+                other_side.start()
+                discover(idf_dir_1, (0,))
+                other_side.join()
+            self.dispatcher.post(PubSubMessageTypes.IDF_DISCOVERY_DONE, generation=generation)
+
+        Thread(target=discover_all, daemon=True).start()
+
+    def build_dirs_invalid_handler(self, generation, listing):
+        if generation != self.idf_discovery_generation:
+            return
+        self.valid_idfs_in_listing = False
+        self.label_string.set(listing[1] if len(listing) > 2 else "Initialized")
+        self.show_full_idf_listing(listing)
+
+    def idfs_found_handler(self, generation, sides, idfs):
+        if generation != self.idf_discovery_generation:
+            return
+        for side in sides:
+            # the model keeps the listing sorted as the results trickle in
+            self.idf_selection.add_available(str(idf) for idf in self.common_idf_tracker.add(side, idfs))
+        if self.full_idf_listbox and not self.idf_filter_var.get().strip():
+            self.full_idf_listbox.refresh()  # while it's filtered, the matches are found again once the scan is done
+
+    def idf_discovery_done_handler(self, generation):
+        if generation != self.idf_discovery_generation:
+            return
+        self.label_string.set(f"Found {len(self.idf_selection.available)} IDFs common to both builds")
+        # the listing is complete, so its search index is built now, in the background, ready for the first keystroke
+        available = list(self.idf_selection.available)
+
+        def build_search_index():
+            with tracer.span('Build IDF search index', 'discovery', num_idfs=len(available)):
+                index = IdfSearchIndex(available)
+            self.dispatcher.post(PubSubMessageTypes.IDF_SEARCH_INDEX_BUILT, generation=generation, index=index)
+
+        Thread(target=build_search_index, daemon=True).start()
+
+    def idf_search_index_built_handler(self, generation, index):
+        if generation != self.idf_discovery_generation or not self.idf_selection.set_search_index(index):
+            return
+        if self.idf_filter_var.get().strip():
+            self.apply_idf_filter()  # typed while the scan was running, the matches among all the IDFs are in now
+
+    def build_results_tree(self, run_id=None):
+        # the rows themselves are only read from the store and inserted into the tree when a category gets opened
+        with tracer.span('Build results tree', 'gui'):
+            results_model = self.open_results()
+            results_model.clear()
+            if run_id is not None:
+                results_model.show_run(run_id)
+            if self.results_tree_view:
+                self.results_tree_view.reset()
+
+    def show_final_results(self, run_id):
+        # the results already streamed into the tree as they came in, unless there weren't any at all
+        if self.open_results().run_id != run_id:
+            self.build_results_tree(run_id)
 
     def add_to_log(self, message):
-        self.log_message_listbox.insert(END, f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]: {message}")
+        self.log_buffer.append(message)
+        if self.log_message_listbox:
+            self.log_message_listbox.refresh()
+
+    def add_many_to_log(self, messages):
+        self.log_buffer.extend(messages)
+        if self.log_message_listbox:
+            self.log_message_listbox.refresh()
 
     def clear_log(self):
-        self.log_message_listbox.delete(0, END)
+        self.log_buffer.clear()
+        if self.log_message_listbox:
+            self.log_message_listbox.refresh()
 
     def copy_log(self):
-        messages = self.log_message_listbox.get(0, END)
-        message_string = '\n'.join(messages)
-        self.root.clipboard_append(message_string)
+        # only the in-memory lines go to the clipboard, use export for the full history
+        self.root.clipboard_append(self.log_buffer.text())
+
+    def export_log(self):
+        file_name = filedialog.asksaveasfilename(defaultextension='.log', title="Export Full Log")
+        if not file_name:
+            return
+        with open(file_name, 'wb') as f:
+            self.log_buffer.export(f)
 
     def client_idf_refresh(self):
         self.build_idf_listing()
 
-    def idf_move_to_active(self, _):
+    def idf_move_to_active(self, _=None):
         if not self.valid_idfs_in_listing:
             simpledialog.messagebox.showerror("IDF Selection Error", "Invalid build folders or IDF list")
             return
         current_selection = self.full_idf_listbox.curselection()
-        if not current_selection:
+        if current_selection is None:
             simpledialog.messagebox.showerror("IDF Selection Error", "No IDF Selected")
             return
-        currently_selected_idf = self.full_idf_listbox.get(current_selection)
-        try:
-            self.active_idf_listbox.get(0, "end").index(currently_selected_idf)
+        currently_selected_idf = self.full_idf_listing[current_selection]
+        if not self.idf_selection.activate(currently_selected_idf):
             simpledialog.messagebox.showwarning("IDF Selection Warning", "IDF already exists in active list")
             return
-        except ValueError:
-            pass  # the value error indicates it was _not_ found, so this is success
-        self.active_idf_listbox.insert(END, currently_selected_idf)
+        self.active_idf_listbox.refresh()
         self.idf_refresh_count_status(currently_selected_idf, True)
 
     def idf_remove_from_active(self, event=None):
@@ -394,29 +562,30 @@ class MyApp(Frame):
             simpledialog.messagebox.showerror("IDF Selection Error", "Invalid build folders or IDF list")
             return
         current_selection = self.active_idf_listbox.curselection()
-        if not current_selection:
+        if current_selection is None:
             if event:
                 return
             simpledialog.messagebox.showerror("IDF Selection Error", "No IDF Selected")
             return
-        self.active_idf_listbox.delete(current_selection)
-        self.idf_refresh_count_status(current_selection, False)
+        removed_idf = self.idf_selection.deactivate_index(current_selection)
+        self.active_idf_listbox.refresh()
+        self.idf_refresh_count_status(removed_idf, False)
 
     def idf_select_all(self):
         self.idf_deselect_all()
         if not self.valid_idfs_in_listing:
             simpledialog.messagebox.showerror("IDF Selection Error", "Invalid build folders or IDF list")
             return
-        all_idfs = self.full_idf_listbox.get(0, END)
-        for idf in all_idfs:
-            self.active_idf_listbox.insert(END, idf)
+        self.idf_selection.select_all()
+        self.active_idf_listbox.show(self.idf_selection.active)
         self.idf_refresh_count_status()
 
     def idf_deselect_all(self):
         if not self.valid_idfs_in_listing:
             simpledialog.messagebox.showerror("IDF Selection Error", "Invalid build folders or IDF list")
             return
-        self.active_idf_listbox.delete(0, END)
+        self.idf_selection.deselect_all()
+        self.active_idf_listbox.show(self.idf_selection.active)
         self.idf_refresh_count_status()
 
     def idf_select_random(self):
@@ -426,26 +595,47 @@ class MyApp(Frame):
         potential_number_to_select = simpledialog.askinteger("Input Amount", "How many would you like to select?")
         if not potential_number_to_select:
             return
-        self.idf_deselect_all()
-        number_to_select = int(potential_number_to_select)
-        number_of_idf_files = self.full_idf_listbox.size()
-        if number_of_idf_files <= number_to_select:  # just take all of them
-            self.idf_select_all()
-        else:  # down select randomly
-            indices_to_take = random.sample(range(number_of_idf_files), number_to_select)
-            idfs_to_take = list()
-            for i in indices_to_take:
-                idf_to_get = self.full_idf_listbox.get(i)
-                idfs_to_take.append(idf_to_get)
-            for idf_to_get in sorted(idfs_to_take):
-                self.active_idf_listbox.insert(END, idf_to_get)
+        self.idf_selection.select_random(int(potential_number_to_select))
+        self.active_idf_listbox.show(self.idf_selection.active)
+        self.idf_refresh_count_status()
+
+    def idf_filter_changed(self, *_):
+        self.apply_idf_filter()
+        if self.valid_idfs_in_listing and self.idf_filter_var.get().strip():
+            self.label_string.set(f"{len(self.full_idf_listing)}/{len(self.idf_selection.available)} IDFs match")
+
+    def apply_idf_filter(self):
+        if not self.valid_idfs_in_listing:
+            return
+        with tracer.span('Filter IDFs', 'gui'):
+            self.show_full_idf_listing(
+                self.idf_selection.filter(self.idf_filter_var.get(), self.idf_filter_mode_var.get())
+            )
+
+    def idf_add_matches_to_active(self):
+        if not self.valid_idfs_in_listing:
+            simpledialog.messagebox.showerror("IDF Selection Error", "Invalid build folders or IDF list")
+            return
+        self.idf_selection.activate_all(self.full_idf_listing)
+        self.active_idf_listbox.refresh()
+        self.idf_refresh_count_status()
+
+    def idf_select_random_matches(self):
+        if not self.valid_idfs_in_listing:
+            simpledialog.messagebox.showerror("IDF Selection Error", "Invalid build folders or IDF list")
+            return
+        potential_number_to_select = simpledialog.askinteger("Input Amount", "How many would you like to select?")
+        if not potential_number_to_select:
+            return
+        self.idf_selection.select_random(int(potential_number_to_select), among=self.full_idf_listing)
+        self.active_idf_listbox.show(self.idf_selection.active)
         self.idf_refresh_count_status()
 
     def idf_refresh_count_status(self, test_case=None, checked=False):
         if not self.valid_idfs_in_listing:
             return
-        num_total = self.full_idf_listbox.size()
-        num_active = self.active_idf_listbox.size()
+        num_total = len(self.idf_selection.available)
+        num_active = len(self.idf_selection.active)
         if test_case:
             chk_string = "Checked" if checked else "Unchecked"
             if checked:
@@ -454,23 +644,27 @@ class MyApp(Frame):
             self.label_string.set(f"{num_active}/{num_total} selected")
 
     def set_gui_status_for_run(self, is_running: bool):
-        if is_running:
+        self.running = is_running
+        self.set_widget_states()
+
+    def set_widget_states(self):
+        if self.running:
             run_button_state = 'disabled'
             stop_button_state = 'normal'
         else:
             run_button_state = 'normal'
             stop_button_state = 'disabled'
-        self.build_dir_1_button.configure(state=run_button_state)
-        self.build_dir_2_button.configure(state=run_button_state)
-        self.run_button.configure(state=run_button_state)
-        self.idf_select_all_button.configure(state=run_button_state)
-        self.idf_deselect_all_button.configure(state=run_button_state)
-        self.idf_select_n_random_button.configure(state=run_button_state)
-        self.move_idf_to_active_button.configure(state=run_button_state)
-        self.remove_idf_from_active_button.configure(state=run_button_state)
-        self.run_period_option_menu.configure(state=run_button_state)
-        self.reporting_frequency_option_menu.configure(state=run_button_state)
-        self.num_threads_spinner.configure(state=run_button_state)
+        run_widgets = [
+            self.build_dir_1_button, self.build_dir_2_button, self.run_button, self.idf_select_all_button,
+            self.idf_deselect_all_button, self.idf_select_n_random_button, self.idf_add_matches_button,
+            self.idf_select_n_random_matches_button, self.move_idf_to_active_button,
+            self.remove_idf_from_active_button, self.run_period_option_menu, self.reporting_frequency_option_menu,
+            self.resume_check, self.remote_port_entry, self.remote_expose_check, self.trace_check,
+            self.num_threads_spinner,
+        ]
+        for widget in run_widgets:
+            if widget:  # not there yet if its tab hasn't been built
+                widget.configure(state=run_button_state)
         self.stop_button.configure(state=stop_button_state)
 
     def client_build_dir_1(self):
@@ -486,26 +680,118 @@ class MyApp(Frame):
         self.build_idf_listing()
 
     def client_run(self):
+        from my_app.background_operation import BackgroundOperation
+        from my_app.concurrency import AdaptiveConcurrency
         if self.long_thread:
             messagebox.showerror("Cannot run another thread, wait for the current to finish -- how'd you get here?!?")
             return
         potential_num_threads = self.num_threads_spinner.get()
-        try:
-            num_threads = int(potential_num_threads)
-        except ValueError:
-            messagebox.showerror("Invalid Configuration", "Number of threads must be an integer")
+        concurrency = None
+        if potential_num_threads.strip() == 'auto':
+            num_threads = 0
+            concurrency = AdaptiveConcurrency()
+        else:
+            try:
+                num_threads = int(potential_num_threads)
+            except ValueError:
+                messagebox.showerror("Invalid Configuration", "Number of threads must be an integer or 'auto'")
+                return
+        if not self.listen_for_remote_workers():
             return
-        idfs_to_run = list()
-        for i in self.active_idf_listbox.get(0, END):
-            idfs_to_run.append(i)
-        self.background_operator = BackgroundOperation(num_threads, idfs_to_run)
+        idfs_to_run = list(self.idf_selection.active)
+        config = self.run_configuration(
+            Path(self.build_dir_1_var.get()), Path(self.build_dir_2_var.get()), self.run_period_option.get(),
+            self.reporting_frequency.get()
+        )
+        self.background_operator = BackgroundOperation(
+            num_threads, idfs_to_run, config, self.resume_var.get(), remote_workers=self.remote_workers,
+            concurrency=concurrency
+        )
         self.background_operator.get_ready_to_go(
-            MyApp.status_listener, MyApp.finished_listener, MyApp.cancelled_listener
+            self.status_listener, self.finished_listener, self.cancelled_listener, self.idf_result_listener
         )
+        if self.trace_var.get():
+            tracer.enable()
+        else:
+            tracer.disable()
+        self.build_results_tree()
         self.set_gui_status_for_run(True)
         self.long_thread = Thread(target=self.background_operator.run)
         self.add_to_log("Starting a new set of tests")
         self.long_thread.start()
+        self.update_pipeline_stats()
+
+    @staticmethod
+    def run_configuration(build_dir_1: Path, build_dir_2: Path, run_option: str, reporting_frequency: str):
+        """The RunConfiguration for a run started from the GUI, everything it keeps goes in the tool's data"""
+        from my_app.background_operation import RunConfiguration
+        return RunConfiguration(
+            build_dir_1, build_dir_2, run_option, reporting_frequency, MyApp.new_run_output_dir(),
+            cache_dir=get_data_dir('result_cache'), history_file=get_data_dir() / 'runtime_history.json',
+            journal_dir=get_data_dir('journals'), results_db=get_data_dir() / MyApp.RESULTS_DB_NAME,
+            output_store=get_data_dir('store')
+        )
+
+    @staticmethod
+    def new_run_output_dir(keep: int = KEEP_RUN_OUTPUTS) -> Path:
+        """A new folder for one run's outputs, deleting all but the most recent of the older ones"""
+        outputs_dir = get_data_dir('outputs')
+        old_runs = sorted(path for path in outputs_dir.glob('run-*') if path.is_dir())
+        for old_run in old_runs[:max(0, len(old_runs) - keep + 1)]:
+            rmtree(str(old_run), ignore_errors=True)
+        return outputs_dir / f"run-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+
+    @staticmethod
+    def clean_output_store(max_age_days: float = OUTPUT_STORE_MAX_AGE_DAYS,
+                           compress_after_days: float = OUTPUT_STORE_COMPRESS_AFTER_DAYS) -> Tuple[int, int]:
+        """Collects the garbage in the GUI's output store and compresses its cold blobs, returning how many of each"""
+        from my_app.output_store import OutputStore
+        store = OutputStore(get_data_dir('store'))
+        try:
+            return store.collect_garbage(max_age_days), store.compress_cold(compress_after_days)
+        finally:
+            store.close()
+
+    def client_clean_output_store(self):
+        if self.long_thread:
+            messagebox.showerror("Uh oh!", "Cannot clean up the output store while a run is going")
+            return
+        self.add_to_log("Cleaning up the output store...")
+
+        def clean_up():
+            num_deleted, num_compressed = self.clean_output_store()
+            self.dispatcher.post(
+                PubSubMessageTypes.OUTPUT_STORE_CLEANED, num_deleted=num_deleted, num_compressed=num_compressed
+            )
+
+        Thread(target=clean_up, daemon=True).start()
+
+    def output_store_cleaned_handler(self, num_deleted, num_compressed):
+        message = f"Output store cleaned up: {num_deleted} files deleted, {num_compressed} compressed"
+        self.add_to_log(message)
+        self.label_string.set(message)
+
+    def listen_for_remote_workers(self) -> bool:
+        """Starts, moves or stops the remote worker listener to match the port option, False if that can't be done"""
+        port_text = self.remote_port_var.get().strip()
+        try:
+            port = int(port_text) if port_text else None
+        except ValueError:
+            messagebox.showerror("Invalid Configuration", "Remote worker port must be a number, or blank for none")
+            return False
+        address = ('0.0.0.0' if self.remote_expose_var.get() else '127.0.0.1', port)
+        if self.remote_workers and (port is None or self.remote_workers.address != address):
+            self.remote_workers.close()
+            self.remote_workers = None
+        if port is not None and not self.remote_workers:
+            from my_app.remote_worker import RemoteWorkerListener
+            try:
+                self.remote_workers = RemoteWorkerListener(address)
+            except OSError as e:
+                messagebox.showerror("Invalid Configuration", f"Could not listen on port {port}: {e}")
+                return False
+            self.add_to_log(f"Listening for remote workers on {address[0]}:{port}")
+        return True
 
     def client_stop(self):
         self.add_to_log("Attempting to cancel")
@@ -516,43 +802,125 @@ class MyApp(Frame):
         if self.long_thread:
             messagebox.showerror("Uh oh!", "Cannot exit program while operations are running; abort them then exit")
             return
+        self.log_buffer.close()
+        if self.results_store:
+            self.results_store.close()
+        if self.remote_workers:
+            self.remote_workers.close()
         exit()
 
     def client_done(self):
         self.set_gui_status_for_run(False)
         self.long_thread = None
+        if tracer.enabled:
+            self.save_trace()
+        self.update_pipeline_stats()
+
+    def save_trace(self):
+        tracer.disable()  # what was recorded stays around for exporting
+        trace_file = get_data_dir('traces') / f"trace_{datetime.now():%Y%m%d_%H%M%S}.json"
+        tracer.write(trace_file)
+        self.trace_summary = Tracer.format_summary(tracer.summary())
+        self.add_to_log(f"Trace written to {trace_file}")
+        self.add_many_to_log(self.trace_summary)
+
+    def export_trace(self):
+        file_name = filedialog.asksaveasfilename(defaultextension='.json', title="Export Trace")
+        if file_name:
+            tracer.write(Path(file_name))
+
+    def update_pipeline_stats(self):
+        # the run thread only ever bumps the counters, so reading a snapshot of them from here is safe
+        stats = self.background_operator.stats
+        snapshot = stats.snapshot()
+        self.pipeline_string.set(PipelineStats.describe(snapshot))
+        overview = stats.overview(self.background_operator.num_threads)
+        lines = [
+            f"Throughput:          {overview['idfs_per_minute']:.1f} IDFs/min",
+            f"Per-IDF latency:     p50 {overview['p50_seconds']:.2f} s, p95 {overview['p95_seconds']:.2f} s",
+            f"Worker utilization:  {100.0 * overview['utilization']:.0f}%",
+            '',
+        ]
+        lines.extend(
+            f"{stage:<10} {s['completed']:>6} done, {s['mean_seconds']:7.2f} s each, {s['per_minute']:7.1f}/min"
+            for stage, s in snapshot.items()
+        )
+        if self.trace_summary:
+            lines.extend(['', 'Last trace:'] + self.trace_summary)
+        self.performance_string.set('\n'.join(lines))
+        if self.long_thread:
+            self.root.after(self.PIPELINE_STATS_INTERVAL_MS, self.update_pipeline_stats)
 
-    # -- Callbacks from the background thread coming via PyPubSub
+    # -- Callbacks from the background thread, coming through the dispatcher then via PyPubSub
 
     @staticmethod
-    def status_listener(status, object_completed, percent_complete):
-        """Operates on background thread, just issues a pubsub message"""
-        pub.sendMessage(
-            PubSubMessageTypes.STATUS, status=status,
-            object_completed=object_completed, percent_complete=percent_complete)
-
-    def status_handler(self, status, object_completed, percent_complete):
-        self.add_to_log(object_completed)
+    def dispatch_handler(message_type, kwargs):
+        """Operates on the Tk thread, called by the dispatcher for each (coalesced) message"""
+        with tracer.span(f"Handle {PubSubMessageTypes.name(message_type)}", 'gui'):
+            pub.sendMessage(message_type, **kwargs)
+
+    def status_listener(self, status, object_completed, percent_complete):
+        """Operates on background thread, just posts a message to the dispatcher"""
+        self.dispatcher.post_status(status, object_completed, percent_complete)
+
+    def status_handler(self, status, objects_completed, percent_complete):
+        self.add_many_to_log(objects_completed)
         self.progress['value'] = percent_complete
         self.label_string.set(f"Hey, status update: {str(status)}")
 
-    @staticmethod
-    def finished_listener(results_dict):
-        """Operates on background thread, just issues a pubsub message"""
-        pub.sendMessage(PubSubMessageTypes.FINISHED, results=results_dict)
+    def idf_result_listener(self, idf_result):
+        """Operates on background thread, just posts a message to the dispatcher"""
+        self.dispatcher.post_batched(PubSubMessageTypes.IDF_RESULTS, idf_result)
+
+    def idf_results_handler(self, items):
+        from my_app.results_store import ResultRow
+        results_model = self.open_results()
+        for idf_result in items:
+            if results_model.run_id != idf_result['run_id']:
+                # the first result of a run, the tree is still empty so starting it over costs next to nothing
+                results_model.start_live_run(idf_result['run_id'])
+                if self.results_tree_view:
+                    self.results_tree_view.reset()
+            results_model.add_live_result(idf_result['categories'])
+            if self.results_tree_view:
+                self.results_tree_view.add_result(ResultRow.from_result(idf_result, idf_result['seq']),
+                                                  idf_result['categories'])
+
+    def finished_listener(self, results_dict):
+        """Operates on background thread, just posts a message to the dispatcher"""
+        self.dispatcher.post(PubSubMessageTypes.FINISHED, results=results_dict)
 
     def finished_handler(self, results):
         self.add_to_log("All done, finished")
+        if 'cache_stats' in results:
+            stats = results['cache_stats']
+            self.add_to_log(f"Result cache: {stats['hits']} hits, {stats['misses']} misses")
         self.label_string.set("Hey, all done!")
-        self.build_results_tree(results)
+        self.log_regressions(results.get('run_id'))
+        self.show_final_results(results.get('run_id'))
         self.client_done()
 
-    @staticmethod
-    def cancelled_listener():
-        """Operates on background thread, just issues a pubsub message"""
-        pub.sendMessage(PubSubMessageTypes.CANCELLED)
-
-    def cancelled_handler(self):
-        self.add_to_log("Cancelled!")
-        self.label_string.set("Properly cancelled!")
+    def log_regressions(self, run_id):
+        self.open_results()
+        previous_run_id = self.results_store.previous_finished_run(run_id) if run_id is not None else None
+        if previous_run_id is None:
+            return
+        regressions = self.results_store.regressions(previous_run_id, run_id)
+        self.add_to_log(f"{len(regressions)} new problems since run {previous_run_id}")
+        self.add_many_to_log([f"  {idf}: {category}" for idf, category in regressions])
+
+    def cancelled_listener(self, partial_results_dict):
+        """Operates on background thread, just posts a message to the dispatcher"""
+        self.dispatcher.post(PubSubMessageTypes.CANCELLED, results=partial_results_dict)
+
+    def cancelled_handler(self, results):
+        if 'error' in results:
+            self.add_to_log(f"The run failed: {results['error']}")
+            messagebox.showerror("Run Failed", results['error'])
+        num_finished = len(results.get('idf_results', []))
+        self.add_to_log(f"Cancelled! Keeping the results of the {num_finished} IDFs that finished")
+        for idf in results.get('cancelled_idfs', []):
+            self.add_to_log(f"Run {idf} was stopped part way through")
+        self.label_string.set("Run failed!" if 'error' in results else "Properly cancelled!")
+        self.show_final_results(results.get('run_id'))
         self.client_done()
@@ -0,0 +1,121 @@
+from collections import deque
+from threading import get_ident
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from my_app.tracing import tracer
+
+
+class GuiDispatcher:
+    """Thread-safe channel from background threads to the Tk main loop.
+
+    Background threads post messages, which land on a deque (appends and pops are atomic, so no lock is needed).
+    The Tk thread drains the deque on a root.after timer, spending at most frame_budget_ms per frame.  Status
+    messages are coalesced so each frame applies only the latest status/percentage along with one batch of the
+    log lines that arrived since the last frame.  Messages of the batched types are collected the same way and
+    delivered once per frame as an 'items' list; every other message is delivered as-is, in order.
+
+    While tracing, each message is stamped as it's posted, so the trace shows how long it waited for the Tk thread,
+    and every drain adds a sample of how many messages it got through and how many it left waiting."""
+
+    def __init__(
+            self, root, deliver: Callable[[str, Dict[str, Any]], None], status_message_type: str = 'status',
+            frame_budget_ms: float = 15.0, poll_interval_ms: int = 50, max_log_lines_per_frame: int = 2000,
+            batched_message_types: Tuple[str, ...] = ()
+    ):
+        self.root = root  # anything with a Tk-style after(ms, func) method
+        self.deliver = deliver  # called on the Tk thread with a message type and keyword arguments
+        self.status_message_type = status_message_type
+        self.frame_budget_ms = frame_budget_ms
+        self.poll_interval_ms = poll_interval_ms
+        self.max_log_lines_per_frame = max_log_lines_per_frame  # bounds the cost of the one batched log insert
+        self._messages = deque()
+        self._running = False
+        # coalesced status state, applied once per frame
+        self._pending_status: Union[None, str] = None
+        self._pending_percent: Union[None, float] = None
+        self._pending_log_lines: List[str] = []
+        # batched messages, per type, in the order the types first showed up
+        self._pending_batches: Dict[str, List[Any]] = {message_type: [] for message_type in batched_message_types}
+
+    # -- called from any thread
+
+    def post_status(self, status: str, object_completed: str, percent_complete: float):
+        self._messages.append((
+            self.status_message_type, (status, object_completed, percent_complete),
+            perf_counter() if tracer.enabled else 0.0
+        ))
+
+    def post(self, message_type: str, **kwargs):
+        self._messages.append((message_type, kwargs, perf_counter() if tracer.enabled else 0.0))
+
+    def post_batched(self, message_type: str, item: Any):
+        """Posts one item of a batched message type, message_type must be one given to the constructor"""
+        self._messages.append((message_type, item, perf_counter() if tracer.enabled else 0.0))
+
+    # -- called on the Tk thread
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.root.after(self.poll_interval_ms, self._frame)
+
+    def stop(self):
+        self._running = False
+
+    def drain(self) -> bool:
+        """Processes queued messages until the queue is empty or the frame budget is spent.
+
+        Returns True if messages are still waiting."""
+        deadline = perf_counter() + self.frame_budget_ms / 1000.0
+        messages = self._messages
+        processed = 0
+        tracing = tracer.enabled
+        thread = get_ident()
+        while messages:
+            message_type, payload, posted = messages.popleft()
+            if tracing and posted:  # not stamped if it was posted before tracing started
+                tracer.record('Waiting for the GUI', 'queue', posted, perf_counter(), thread, {'type': message_type})
+            if message_type == self.status_message_type:
+                self._pending_status, object_completed, self._pending_percent = payload
+                self._pending_log_lines.append(object_completed)
+                if len(self._pending_log_lines) >= self.max_log_lines_per_frame:
+                    break
+            elif message_type in self._pending_batches:
+                self._pending_batches[message_type].append(payload)
+            else:
+                # anything else must observe the statuses and batches that were posted before it
+                self._flush_status()
+                self._flush_batches()
+                self.deliver(message_type, payload)
+            processed += 1
+            # a handler can take any amount of time, so the clock is checked after every message
+            if perf_counter() > deadline:
+                break
+        self._flush_status()
+        self._flush_batches()
+        if tracing:
+            tracer.counter('GUI queue', drained=processed, waiting=len(messages))
+        return bool(messages)
+
+    def _frame(self):
+        if not self._running:
+            return
+        more_waiting = self.drain()
+        # if we ran out of budget, come back almost immediately, but still let Tk process its own events first
+        self.root.after(1 if more_waiting else self.poll_interval_ms, self._frame)
+
+    def _flush_status(self):
+        if not self._pending_log_lines:
+            return
+        log_lines = self._pending_log_lines
+        self._pending_log_lines = []
+        self.deliver(self.status_message_type, {
+            'status': self._pending_status, 'objects_completed': log_lines, 'percent_complete': self._pending_percent
+        })
+
+    def _flush_batches(self):
+        for message_type, items in self._pending_batches.items():
+            if items:
+                self._pending_batches[message_type] = []
+                self.deliver(message_type, {'items': items})
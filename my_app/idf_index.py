@@ -0,0 +1,130 @@
+from hashlib import sha1
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Union
+
+from my_app.data_dir import get_data_dir
+
+
+def dummy_get_idf_dir(build_dir: Path) -> Path:
+    return build_dir.parent / 'testfiles'
+
+
+def dummy_get_idfs_in_dir(idf_dir: Path) -> Set[Path]:
+    all_idfs_absolute_path = list(idf_dir.rglob('*.idf'))
+    all_idfs_relative_path = set([idf.relative_to(idf_dir) for idf in all_idfs_absolute_path])
+    return all_idfs_relative_path
+
+
+class IdfDiscoveryIndex:
+    """Persistent listing of the IDFs under one directory tree.
+
+    For every directory in the tree the index stores the directory mtime along with the IDF files and child
+    directories it held at that time.  A directory's mtime changes whenever an entry is added, removed or renamed
+    directly inside it, so a rescan only stats each directory and re-lists the ones whose mtime moved; unchanged
+    directories are served from the index.  The index is saved as JSON in the tool's data folder, one file per
+    scanned directory."""
+
+    VERSION = 1
+
+    def __init__(self, idf_dir: Path, index_dir: Union[None, Path] = None):
+        self.idf_dir = idf_dir
+        index_dir = index_dir if index_dir else get_data_dir('idf_index')
+        key = sha1(str(idf_dir.resolve()).encode('utf-8')).hexdigest()
+        self.index_file = index_dir / f"{key}.json"
+        self.num_dirs_listed = 0  # how many directories the last scan actually had to list, vs reuse from the index
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with self.index_file.open() as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != self.VERSION or data.get('root') != str(self.idf_dir):
+            return {}
+        return data.get('dirs', {})
+
+    def _save(self, dirs: Dict[str, Dict]):
+        temp_file = self.index_file.with_suffix('.tmp')
+        try:
+            with temp_file.open('w') as f:
+                json.dump({'version': self.VERSION, 'root': str(self.idf_dir), 'dirs': dirs}, f)
+            os.replace(str(temp_file), str(self.index_file))
+        except OSError:
+            pass  # the index is only an accelerator, the next scan will just have more work to do
+
+    def scan(
+            self, on_found: Union[None, Callable[[List[Path]], None]] = None,
+            should_stop: Union[None, Callable[[], bool]] = None
+    ) -> Set[Path]:
+        """Walks the tree, returning every IDF relative to idf_dir, and calling on_found with each batch found.
+
+        If should_stop returns True the scan is abandoned, and the partial results are not saved."""
+        cached_dirs = self._load()
+        scanned_dirs = dict()
+        all_idfs = set()
+        self.num_dirs_listed = 0
+        if not self.idf_dir.is_dir():
+            return all_idfs
+        pending = ['']
+        while pending:
+            if should_stop and should_stop():
+                return all_idfs
+            rel_dir = pending.pop()
+            abs_dir = self.idf_dir / rel_dir
+            try:
+                mtime = os.stat(str(abs_dir)).st_mtime_ns
+            except OSError:
+                continue  # it vanished while we were walking
+            entry = cached_dirs.get(rel_dir)
+            if not entry or entry['mtime'] != mtime:
+                entry = self._list_dir(abs_dir, mtime)
+                self.num_dirs_listed += 1
+            scanned_dirs[rel_dir] = entry
+            pending.extend(f"{rel_dir}/{d}" if rel_dir else d for d in entry['subdirs'])
+            found = [Path(rel_dir, f) for f in entry['idfs']]
+            if found:
+                all_idfs.update(found)
+                if on_found:
+                    on_found(found)
+        self._save(scanned_dirs)
+        return all_idfs
+
+    @staticmethod
+    def _list_dir(abs_dir: Path, mtime: int) -> Dict:
+        idfs = list()
+        subdirs = list()
+        try:
+            with os.scandir(str(abs_dir)) as it:
+                for dir_entry in it:
+                    # like Path.rglob, don't recurse through symlinked directories
+                    if dir_entry.is_dir(follow_symlinks=False):
+                        subdirs.append(dir_entry.name)
+                    elif dir_entry.name.endswith('.idf') and dir_entry.is_file():
+                        idfs.append(dir_entry.name)
+        except OSError:
+            pass
+        return {'mtime': mtime, 'idfs': idfs, 'subdirs': subdirs}
+
+
+class CommonIdfTracker:
+    """Incrementally maintains the intersection of the IDFs found for build 1 (side 0) and build 2 (side 1)"""
+
+    def __init__(self):
+        self._found = (set(), set())
+        self.common: Set[Path] = set()
+
+    def add(self, side: int, idfs: Iterable[Path]) -> List[Path]:
+        """Records IDFs found on one side, returning the ones that just became common to both"""
+        mine = self._found[side]
+        other = self._found[1 - side]
+        newly_common = list()
+        for idf in idfs:
+            if idf in mine:
+                continue
+            mine.add(idf)
+            if idf in other:
+                newly_common.append(idf)
+        self.common.update(newly_common)
+        return newly_common
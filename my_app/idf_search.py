@@ -0,0 +1,138 @@
+from bisect import bisect_left, bisect_right
+from fnmatch import translate
+from itertools import compress
+import re
+from typing import Dict, List, Sequence, Set, Tuple
+
+from my_app.constants import IdfFilterModes
+
+# path separators and the punctuation IDF names are usually split up with
+_SEPARATORS = re.compile(r'[\\/_\-. ]+')
+# words within a path component: runs of capitals, capitalized or lower case words, and numbers
+_WORDS = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+_FOLDER_SEPARATORS = re.compile(r'[\\/]')
+_GLOB_CHARACTERS = re.compile(r'[*?\[]')
+# the literal parts of a glob, between its wildcards and character sets
+_GLOB_WILDCARDS = re.compile(r'\*|\?|\[[^\]]*\]?')
+
+
+def path_tokens(path: str) -> Set[str]:
+    """The lower case words a path can be found by: each component between separators, and the words inside those,
+    so 5ZoneAirCooled.idf gives 5zoneaircooled, 5, zone, air, cooled and idf"""
+    tokens = set()
+    for component in _SEPARATORS.split(path):
+        if component:
+            tokens.add(component.lower())
+            tokens.update(word.lower() for word in _WORDS.findall(component))
+    return tokens
+
+
+class IdfSearchIndex:
+    """In-memory index of a sorted list of IDF paths, for filtering it as the user types.
+
+    Built once per listing, after which each query is answered without touching every path in Python:
+
+    * contains: str.find over all the paths joined into one lower case string, then a bisect to map each hit back to
+      its path, so the cost goes with the number of matches rather than the number of paths
+    * word starts with: a sorted list of every token of every path (see path_tokens) with the paths holding each one,
+      so all the tokens with a prefix are one contiguous slice found by two bisects; several words must all match
+    * glob: fnmatch style, against the file name, or against the whole path if the pattern has a folder in it; only
+      the paths containing the pattern's longest literal part are tried
+
+    All of them ignore case, and return indices into the paths, in order.  A contains query that extends the one
+    before it, as each keystroke does, only looks through the previous matches."""
+
+    SAMPLE_STEP = 16
+
+    def __init__(self, paths: Sequence[str]):
+        self.paths = list(paths)
+        lowered = [path.lower() for path in self.paths]
+        self._lowered = lowered
+        self._names = [_FOLDER_SEPARATORS.split(path)[-1] for path in lowered]
+        self._text = '\n'.join(lowered)
+        # every SAMPLE_STEP-th path, to guess cheaply how many paths a fragment is in
+        self._sample = '\n'.join(lowered[::self.SAMPLE_STEP])
+        self._starts: List[int] = list()
+        offset = 0
+        for path in lowered:
+            self._starts.append(offset)
+            offset += len(path) + 1
+        postings: Dict[str, List[int]] = dict()
+        for i, path in enumerate(self.paths):
+            for token in path_tokens(path):
+                postings.setdefault(token, list()).append(i)
+        self._tokens = sorted(postings)
+        self._postings = [postings[token] for token in self._tokens]
+        self._last: Tuple[str, str, List[int]] = ('', '', list())  # mode, query and matches of the last search
+
+    def __len__(self):
+        return len(self.paths)
+
+    def search(self, query: str, mode: str = IdfFilterModes.CONTAINS) -> List[int]:
+        query = query.strip().lower()
+        if not query:
+            self._last = ('', '', list())
+            return list(range(len(self.paths)))
+        last_mode, last_query, last_found = self._last
+        if mode == IdfFilterModes.GLOB:
+            found = self.glob(query)
+        elif mode == IdfFilterModes.WORD_STARTS:
+            found = self.word_prefixes(query.split())
+        elif last_mode == mode and last_query and last_query in query:
+            # typing one more character only ever narrows the matches, so only the last ones need looking at again
+            found = [i for i in last_found if query in self._lowered[i]]
+        else:
+            found = self.contains(query)
+        self._last = (mode, query, found)
+        return found
+
+    def matches(self, query: str, mode: str = IdfFilterModes.CONTAINS) -> List[str]:
+        if not query.strip():
+            return self.paths
+        return [self.paths[i] for i in self.search(query, mode)]
+
+    def contains(self, fragment: str) -> List[int]:
+        if self._common(fragment):  # like the first letter typed
+            return list(compress(range(len(self.paths)), [fragment in path for path in self._lowered]))
+        found = list()
+        position = self._text.find(fragment)
+        while position >= 0:
+            i = bisect_right(self._starts, position) - 1
+            found.append(i)
+            if i + 1 == len(self._starts):
+                break
+            position = self._text.find(fragment, self._starts[i + 1])  # one hit per path is enough
+        return found
+
+    def word_prefixes(self, prefixes: List[str]) -> List[int]:
+        found = None
+        for prefix in prefixes:
+            first = bisect_left(self._tokens, prefix)
+            last = bisect_left(self._tokens, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+            with_prefix = set()
+            for postings in self._postings[first:last]:
+                with_prefix.update(postings)
+            found = with_prefix if found is None else found & with_prefix
+            if not found:
+                return list()
+        return sorted(found)
+
+    def glob(self, pattern: str) -> List[int]:
+        if not _GLOB_CHARACTERS.search(pattern):
+            return self.contains(pattern)
+        regex = re.compile(translate(pattern))
+        targets = self._lowered if _FOLDER_SEPARATORS.search(pattern) else self._names
+        literals = [part for part in _GLOB_WILDCARDS.split(pattern) if part]
+        rarest = min(literals, key=self._sample.count) if literals else ''
+        if not rarest or self._sample.count(rarest) * self.SAMPLE_STEP > len(self.paths) // 2:
+            return [i for i, target in enumerate(targets) if regex.match(target)]
+        # every literal part of the pattern has to be in the path for it to match, which is far quicker to check, so
+        # the pattern only gets tried on the paths with the rarest of them, that have all the others too
+        found = self.contains(rarest)
+        for literal in literals:
+            found = [i for i in found if literal in targets[i]]
+        return [i for i in found if regex.match(targets[i])]
+
+    def _common(self, fragment: str) -> bool:
+        """Whether fragment is in so many paths that looking for it path by path is quicker than hit by hit"""
+        return self._sample.count(fragment) * self.SAMPLE_STEP > len(self.paths) // 20
@@ -0,0 +1,100 @@
+from bisect import bisect_left
+import random
+from typing import Iterable, List, Set, Union
+
+from my_app.constants import IdfFilterModes
+from my_app.idf_search import IdfSearchIndex
+from my_app.tracing import tracer
+
+
+class IdfSelectionModel:
+    """The state behind the IDF Selection tab, kept in Python rather than in the listbox widgets.
+
+    The available IDFs are a sorted list and the active IDFs are an ordered set (a list for display order plus a set
+    for O(1) membership), so the widgets only ever need to render a window of rows from each.  The available IDFs
+    are searched through an IdfSearchIndex, built off the Tk thread once they are all in and handed over with
+    set_search_index; one is only built here if they are filtered before it arrives."""
+
+    def __init__(self):
+        self.available: List[str] = list()
+        self.active: List[str] = list()
+        self._active_set: Set[str] = set()
+        self._search_index: Union[None, IdfSearchIndex] = None
+
+    def clear(self):
+        self.available = list()
+        self._search_index = None
+        self.deselect_all()
+
+    def add_available(self, idfs: Iterable[str]):
+        """Adds IDFs to the available list, keeping it sorted"""
+        for idf in idfs:
+            index = bisect_left(self.available, idf)
+            if index == len(self.available) or self.available[index] != idf:
+                self.available.insert(index, idf)
+                self._search_index = None
+
+    def search_index(self) -> IdfSearchIndex:
+        if self._search_index is None:
+            with tracer.span('Build IDF search index', 'gui', num_idfs=len(self.available)):
+                self._search_index = IdfSearchIndex(self.available)
+        return self._search_index
+
+    def set_search_index(self, index: IdfSearchIndex) -> bool:
+        """Takes an index built elsewhere, False if the available IDFs have changed since it was built from them"""
+        if index.paths != self.available:
+            return False
+        self._search_index = index
+        return True
+
+    def filter(self, query: str, mode: str = IdfFilterModes.CONTAINS) -> List[str]:
+        """The available IDFs matching query, see IdfSearchIndex for how each mode matches"""
+        if not query.strip():
+            return self.available
+        return self.search_index().matches(query, mode)
+
+    def is_active(self, idf: str) -> bool:
+        return idf in self._active_set
+
+    def activate(self, idf: str) -> bool:
+        """Appends an IDF to the active list, returning False if it was already there"""
+        if idf in self._active_set:
+            return False
+        self._active_set.add(idf)
+        self.active.append(idf)
+        return True
+
+    def activate_all(self, idfs: Iterable[str]) -> int:
+        """Appends the IDFs not already active to the active list, returning how many that was"""
+        num_activated = 0
+        for idf in idfs:
+            if idf not in self._active_set:
+                self._active_set.add(idf)
+                self.active.append(idf)
+                num_activated += 1
+        return num_activated
+
+    def deactivate_index(self, index: int) -> str:
+        idf = self.active.pop(index)
+        self._active_set.discard(idf)
+        return idf
+
+    def select_all(self):
+        self.active = list(self.available)
+        self._active_set = set(self.active)
+
+    def deselect_all(self):
+        self.active = list()
+        self._active_set = set()
+
+    def select_random(self, number_to_select: int, among: Union[None, List[str]] = None):
+        """Makes number_to_select random IDFs active, from all the available ones or just those among (in order)"""
+        candidates = self.available if among is None else among
+        if number_to_select >= len(candidates):  # just take all of them
+            self.active = list(candidates)
+            self._active_set = set(self.active)
+            return
+        # down select randomly, sampling indices means no copy of the candidates is needed
+        indices_to_take = sorted(random.sample(range(len(candidates)), number_to_select))
+        self.active = [candidates[i] for i in indices_to_take]
+        self._active_set = set(self.active)
@@ -0,0 +1,83 @@
+from collections import deque
+from datetime import datetime
+from os import getpid
+from pathlib import Path
+from shutil import copyfileobj
+from time import time
+from typing import BinaryIO, Iterable, List, Union
+
+
+class LogBuffer:
+    """Log messages held in a fixed size in-memory ring, with every line also appended to a spill file on disk.
+
+    The ring is what the GUI shows (it supports len and slicing, so it can back a VirtualListbox), while the spill file
+    keeps the complete history and is what exports stream from."""
+
+    def __init__(self, capacity: int = 10000, spill_path: Union[None, Path] = None):
+        self._lines = deque(maxlen=capacity)
+        self.spill_path = spill_path
+        self._spill = spill_path.open('a', encoding='utf-8') if spill_path else None
+        self._stamp_second = -1
+        self._stamp = ''
+
+    def _time_stamp(self) -> str:
+        # formatting a datetime is slow relative to everything else here, so only do it once per second
+        second = int(time())
+        if second != self._stamp_second:
+            self._stamp_second = second
+            self._stamp = datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S')
+        return self._stamp
+
+    def append(self, message: str):
+        self.extend([message])
+
+    def extend(self, messages: Iterable[str]):
+        time_stamp = self._time_stamp()
+        lines = [f"[{time_stamp}]: {message}" for message in messages]
+        if not lines:
+            return
+        self._lines.extend(lines)
+        if self._spill:
+            self._spill.write('\n'.join(lines) + '\n')
+
+    def clear(self):
+        """Clears the lines in view, the spill file keeps them, so an export still has the full history"""
+        self._lines.clear()
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(item, slice):
+            # deque indexing is fast near either end, which is where a log view almost always is
+            return [self._lines[i] for i in range(*item.indices(len(self._lines)))]
+        return self._lines[item]
+
+    def text(self) -> str:
+        """The in-memory lines as a single string"""
+        return '\n'.join(self._lines)
+
+    def export(self, destination: BinaryIO):
+        """Streams the complete log from the spill file, falling back to the in-memory lines if there isn't one"""
+        if not self._spill:
+            destination.write((self.text() + '\n').encode('utf-8'))
+            return
+        self._spill.flush()
+        with self.spill_path.open('rb') as f:
+            copyfileobj(f, destination)
+
+    def close(self):
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+    @staticmethod
+    def new_spill_path(log_dir: Path, keep: int = 10) -> Path:
+        """Returns a new session log file path in log_dir, deleting all but the most recent older ones"""
+        old_logs = sorted(log_dir.glob('session-*.log'))
+        for old_log in old_logs[:max(0, len(old_logs) - keep + 1)]:
+            try:
+                old_log.unlink()
+            except OSError:
+                pass
+        return log_dir / f"session-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{getpid()}.log"
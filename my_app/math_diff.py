@@ -0,0 +1,137 @@
+from io import StringIO
+from itertools import islice
+from pathlib import Path
+import re
+from typing import Iterator, List, TextIO, Tuple, Union
+
+import numpy as np
+
+from my_app.constants import ResultsTreeRoots
+from my_app.diff_thresholds import DiffThresholds
+from my_app.resample import needs_resampling, resample
+
+# blank fields, empty or just spaces, show up when variables are reported at different frequencies, numpy needs
+# something to parse
+_EMPTY_FIELD = re.compile(r'(?<=,)[ \t]*(?=,|\r?\n|$)', re.MULTILINE)
+
+
+class MathDiffResult:
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns  # the numeric columns common to both files, in file 1 order
+        self.unmatched_columns: List[str] = list()
+        self.num_rows = 0
+        self.row_count_mismatch = False
+        self.max_abs_diff = np.zeros(len(columns))
+        self.max_rel_diff = np.zeros(len(columns))
+        self.big_count = np.zeros(len(columns), dtype=np.int64)
+        self.small_count = np.zeros(len(columns), dtype=np.int64)
+
+    @property
+    def category(self) -> Union[None, str]:
+        """The ResultsTreeRoots category this comparison lands in, or None if there were no diffs"""
+        if self.row_count_mismatch or self.unmatched_columns or self.big_count.any():
+            return ResultsTreeRoots.BigMathDiff
+        if self.small_count.any():
+            return ResultsTreeRoots.SmallMathDiff
+        return None
+
+
+def _read_header(f: TextIO) -> List[str]:
+    return [column.strip() for column in f.readline().rstrip('\r\n').split(',')]
+
+
+def _read_chunks(f: TextIO, column_indices: List[int], chunk_rows: int) -> Iterator[np.ndarray]:
+    """Yields 2D float arrays of at most chunk_rows rows, holding only the requested columns"""
+    while True:
+        lines = list(islice(f, chunk_rows))
+        if not lines:
+            return
+        text = _EMPTY_FIELD.sub('nan', ''.join(lines))
+        yield np.loadtxt(StringIO(text), delimiter=',', usecols=column_indices, ndmin=2, dtype=np.float64)
+
+
+def _compare_chunk(result: MathDiffResult, a: np.ndarray, b: np.ndarray, thresholds: DiffThresholds):
+    abs_diff = np.abs(a - b)
+    scale = np.maximum(np.abs(a), np.abs(b))
+    rel_diff = np.divide(abs_diff, scale, out=np.zeros_like(abs_diff), where=scale > 0)
+    # a value that is missing on only one side is as big a diff as it gets, missing on both sides is no diff at all
+    nan_a = np.isnan(a)
+    nan_b = np.isnan(b)
+    one_sided = nan_a ^ nan_b
+    both_missing = nan_a & nan_b
+    abs_diff[both_missing] = 0.0
+    rel_diff[both_missing] = 0.0
+    abs_diff[one_sided] = np.inf
+    rel_diff[one_sided] = np.inf
+    big = (abs_diff > thresholds.big_abs) & (rel_diff > thresholds.big_rel)
+    small = (abs_diff > thresholds.small_abs) & (rel_diff > thresholds.small_rel) & ~big
+    np.maximum(result.max_abs_diff, abs_diff.max(axis=0), out=result.max_abs_diff)
+    np.maximum(result.max_rel_diff, rel_diff.max(axis=0), out=result.max_rel_diff)
+    result.big_count += big.sum(axis=0)
+    result.small_count += small.sum(axis=0)
+
+
+def _match_columns(header_1: List[str], header_2: List[str]) -> Tuple[List[str], List[int], List[int], List[str]]:
+    # the first column is the Date/Time stamp, everything after it is numeric
+    index_2 = {name: i for i, name in enumerate(header_2) if i > 0}
+    columns, indices_1, indices_2 = list(), list(), list()
+    for i, name in enumerate(header_1):
+        if i > 0 and name in index_2:
+            columns.append(name)
+            indices_1.append(i)
+            indices_2.append(index_2.pop(name))
+    unmatched = [name for i, name in enumerate(header_1) if i > 0 and name not in columns] + list(index_2)
+    return columns, indices_1, indices_2, unmatched
+
+
+def _math_diff_resampled(csv_1: Path, csv_2: Path, thresholds: DiffThresholds, frequency: str,
+                         chunk_rows: int) -> MathDiffResult:
+    columns_1, values_1 = resample(csv_1, frequency, chunk_rows)
+    columns_2, values_2 = resample(csv_2, frequency, chunk_rows)
+    # the stamp column is gone from the aggregates, so the indices _match_columns gives back are one too many
+    columns, indices_1, indices_2, unmatched = _match_columns(['Date/Time'] + columns_1, ['Date/Time'] + columns_2)
+    result = MathDiffResult(columns)
+    result.unmatched_columns = unmatched
+    if not columns:
+        return result
+    if values_1.shape[0] != values_2.shape[0]:
+        result.row_count_mismatch = True
+        return result
+    a = values_1[:, [i - 1 for i in indices_1]]
+    b = values_2[:, [i - 1 for i in indices_2]]
+    _compare_chunk(result, a, b, thresholds)
+    result.num_rows = a.shape[0]
+    return result
+
+
+def math_diff(csv_1: Path, csv_2: Path, thresholds: Union[None, DiffThresholds] = None,
+              chunk_rows: int = 8760, frequency: Union[None, str] = None) -> MathDiffResult:
+    """Compares two time-series CSV outputs column by column, matching columns by header.
+
+    Both files are streamed in lockstep chunks of chunk_rows rows, so memory use is bounded by chunk_rows times the
+    number of columns no matter how long the files are.
+
+    With a ReportingFrequency coarser than TimeStep, both files are first aggregated to one row per period at that
+    frequency (see my_app.resample), and it's the aggregates that get compared.  num_rows then counts periods."""
+    thresholds = thresholds if thresholds else DiffThresholds()
+    if needs_resampling(frequency):
+        return _math_diff_resampled(csv_1, csv_2, thresholds, frequency, chunk_rows)
+    with csv_1.open() as f_1, csv_2.open() as f_2:
+        columns, indices_1, indices_2, unmatched = _match_columns(_read_header(f_1), _read_header(f_2))
+        result = MathDiffResult(columns)
+        result.unmatched_columns = unmatched
+        if not columns:
+            return result
+        chunks_1 = _read_chunks(f_1, indices_1, chunk_rows)
+        chunks_2 = _read_chunks(f_2, indices_2, chunk_rows)
+        for a in chunks_1:
+            b = next(chunks_2, None)
+            if b is None or a.shape[0] != b.shape[0]:
+                result.row_count_mismatch = True
+                return result
+            _compare_chunk(result, a, b, thresholds)
+            result.num_rows += a.shape[0]
+        if next(chunks_2, None) is not None:
+            result.row_count_mismatch = True
+    return result
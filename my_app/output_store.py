@@ -0,0 +1,305 @@
+from contextlib import contextmanager
+import gzip
+from hashlib import sha256
+import os
+from pathlib import Path
+import shutil
+import sqlite3
+from time import time
+from typing import Dict, Iterator, List, Set, Union
+from uuid import uuid4
+
+from my_app.text_diff import file_digest
+
+try:
+    import fcntl
+except ImportError:  # Windows, which has no reflinks to offer here anyway
+    fcntl = None
+    import msvcrt
+
+# the FICLONE ioctl, which makes dest share src's extents on filesystems that can (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_key TEXT PRIMARY KEY,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    run_key TEXT NOT NULL,
+    idf TEXT NOT NULL,
+    side INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (run_key, idf, side, file_name)
+);
+CREATE INDEX IF NOT EXISTS refs_by_hash ON refs (hash);
+"""
+
+
+def _reflink(src: Path, dest: Path) -> bool:
+    """Makes dest a copy-on-write clone of src, if the filesystem can, without copying any data"""
+    if fcntl is None:
+        return False
+    with src.open('rb') as source, dest.open('xb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            return True
+        except OSError:
+            pass
+    dest.unlink()
+    return False
+
+
+def _share(src: Path, dest: Path) -> bool:
+    """Makes dest the same content as src without a second copy of it on disk: a hard link, or failing that a reflink.
+
+    False if neither works here, e.g. across devices without reflinks.  FileExistsError if dest already exists."""
+    try:
+        os.link(str(src), str(dest))
+        return True
+    except FileExistsError:
+        raise
+    except OSError:
+        pass
+    return _reflink(src, dest)
+
+
+@contextmanager
+def _locked(lock_file: Path, exclusive: bool) -> Iterator[None]:
+    """Holds an advisory lock on lock_file, shared or exclusive, across every process using it.  Windows has no
+    shared locks, so there it's always exclusive."""
+    with lock_file.open('a+b') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after 10 seconds, but whoever has it will be done eventually
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class OutputStore:
+    """Content addressed store of simulation outputs, shared by every run and both builds.
+
+    Each output file is ingested by its sha256 into blobs/<first two hex digits>/<hash>, and the file in the output
+    folder becomes a hard link to that blob (or a reflink, where hard links can't be made), so an output that is the
+    same for both builds, or the same as the last run's, takes up disk space once.  Blobs are read only, so an output
+    folder must be prepared before anything writes into it again, which unlinks its files rather than writing
+    through to the shared blob.
+
+    An SQLite index, in WAL mode so every worker process can ingest at once, records which (run, IDF, build, file)
+    refers to which blob; a blob's reference count is the number of those rows.  collect_garbage drops whole runs,
+    by age and then oldest first down to a size cap, and deletes the blobs nothing refers to any more.
+    compress_cold gzips blobs that haven't been used for a while and are no longer linked from any output folder,
+    and materialize gets any blob back out, compressed or not.
+
+    Ingesting finds a blob that's already stored, links to it and only then adds its reference, so a process
+    collecting garbage at the same time could delete that blob in between.  Ingests hold a shared lock on the store's
+    lock file and garbage collection and compression an exclusive one, which keeps them apart."""
+
+    def __init__(self, store_dir: Path, max_bytes: int = 20 * 1024 ** 3):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.blob_dir = store_dir / 'blobs'
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.lock_file = store_dir / 'lock'
+        self._connection = sqlite3.connect(str(store_dir / 'index.sqlite3'), timeout=30.0)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def blob_path(self, digest: str, compressed: bool = False) -> Path:
+        return self.blob_dir / digest[:2] / (digest + '.gz' if compressed else digest)
+
+    def start_run(self, run_key: str):
+        with self._connection:
+            self._connection.execute('INSERT OR IGNORE INTO runs (run_key, started) VALUES (?, ?)', (run_key, time()))
+
+    @staticmethod
+    def prepare(out_dir: Union[None, Path]):
+        """Unlinks the files in out_dir, so whatever writes them next makes new files instead of overwriting blobs"""
+        if not out_dir or not out_dir.is_dir():
+            return
+        for output_file in out_dir.iterdir():
+            if output_file.is_file():
+                output_file.unlink()
+
+    def ingest(self, out_dir: Path, run_key: str, idf: str, side: int) -> Dict[str, str]:
+        """Moves every file in out_dir into the store, leaving links in their place, and returns their hashes"""
+        if not out_dir.is_dir():
+            return dict()
+        with _locked(self.lock_file, exclusive=False):
+            return self._ingest(out_dir, run_key, idf, side)
+
+    def _ingest(self, out_dir: Path, run_key: str, idf: str, side: int) -> Dict[str, str]:
+        hashes = dict()
+        for output_file in sorted(out_dir.iterdir()):
+            if output_file.is_file() and not output_file.is_symlink():
+                hashes[output_file.name] = self._ingest_file(output_file)
+        now = time()
+        with self._connection:
+            self._connection.execute('INSERT OR IGNORE INTO runs (run_key, started) VALUES (?, ?)', (run_key, now))
+            for file_name, digest in hashes.items():
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO refs (run_key, idf, side, file_name, hash) VALUES (?, ?, ?, ?, ?)',
+                    (run_key, idf, side, file_name, digest)
+                )
+                self._connection.execute(
+                    'INSERT OR IGNORE INTO blobs (hash, size, last_used) VALUES (?, ?, ?)',
+                    (digest, (out_dir / file_name).stat().st_size, now)
+                )
+                self._connection.execute('UPDATE blobs SET last_used = ? WHERE hash = ?', (now, digest))
+        return hashes
+
+    def _ingest_file(self, output_file: Path) -> str:
+        digest = file_digest(output_file, algorithm=sha256)
+        blob = self.blob_path(digest)
+        blob.parent.mkdir(exist_ok=True)
+        try:
+            shared = _share(output_file, blob)
+        except FileExistsError:
+            # already in the store, from the other build or an earlier run, so the output becomes another link to it
+            if not os.path.samefile(str(output_file), str(blob)):
+                temp_link = output_file.with_name(f".tmp-{uuid4().hex}")
+                if _share(blob, temp_link):
+                    os.replace(str(temp_link), str(output_file))
+            return digest
+        if shared:
+            blob.chmod(0o444)
+        else:
+            # no links or reflinks from here to the store, so the store holds a copy, moved into place whole
+            temp_blob = blob.with_name(f".tmp-{uuid4().hex}")
+            shutil.copy2(str(output_file), str(temp_blob))
+            temp_blob.chmod(0o444)
+            os.replace(str(temp_blob), str(blob))
+        compressed_blob = self.blob_path(digest, compressed=True)
+        if compressed_blob.exists():
+            # it had gone cold, now that it's being used again it's worth having uncompressed
+            compressed_blob.unlink()
+            self._set_compressed(digest, False)
+        return digest
+
+    def _set_compressed(self, digest: str, compressed: bool):
+        with self._connection:
+            self._connection.execute('UPDATE blobs SET compressed = ? WHERE hash = ?', (int(compressed), digest))
+
+    def hashes(self, run_key: str, idf: str, side: int) -> Dict[str, str]:
+        rows = self._connection.execute(
+            'SELECT file_name, hash FROM refs WHERE run_key = ? AND idf = ? AND side = ?', (run_key, idf, side)
+        )
+        return dict(rows.fetchall())
+
+    def identical_files(self, run_key: str, idf: str) -> Set[str]:
+        """The output files of an IDF that came out byte for byte the same from both builds"""
+        hashes_1 = self.hashes(run_key, idf, 0)
+        hashes_2 = self.hashes(run_key, idf, 1)
+        return {file_name for file_name, digest in hashes_1.items() if hashes_2.get(file_name) == digest}
+
+    def ref_count(self, digest: str) -> int:
+        return self._connection.execute('SELECT COUNT(*) FROM refs WHERE hash = ?', (digest,)).fetchone()[0]
+
+    def total_bytes(self) -> int:
+        return self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+
+    def materialize(self, digest: str, dest: Path):
+        """Writes the content of a blob to dest, as a new file that is safe to change"""
+        blob = self.blob_path(digest)
+        if blob.exists():
+            shutil.copyfile(str(blob), str(dest))
+        else:
+            with gzip.open(str(self.blob_path(digest, compressed=True)), 'rb') as source, dest.open('wb') as target:
+                shutil.copyfileobj(source, target)
+        with self._connection:
+            self._connection.execute('UPDATE blobs SET last_used = ? WHERE hash = ?', (time(), digest))
+
+    def compress_cold(self, min_age_days: float = 7.0) -> int:
+        """Gzips the blobs unused for min_age_days that no output folder links to any more, returning how many"""
+        with _locked(self.lock_file, exclusive=True):
+            return self._compress_cold(min_age_days)
+
+    def _compress_cold(self, min_age_days: float) -> int:
+        cutoff = time() - min_age_days * 86400.0
+        rows = self._connection.execute(
+            'SELECT hash FROM blobs WHERE compressed = 0 AND last_used < ?', (cutoff,)
+        ).fetchall()
+        num_compressed = 0
+        for (digest,) in rows:
+            blob = self.blob_path(digest)
+            try:
+                if blob.stat().st_nlink > 1:
+                    continue  # still linked from an output folder, where it costs nothing extra
+                temp_blob = blob.with_name(f".tmp-{uuid4().hex}")
+                with blob.open('rb') as source, gzip.open(str(temp_blob), 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                os.replace(str(temp_blob), str(self.blob_path(digest, compressed=True)))
+                blob.unlink()
+            except OSError:
+                continue
+            self._set_compressed(digest, True)
+            num_compressed += 1
+        return num_compressed
+
+    def collect_garbage(self, max_age_days: Union[None, float] = 30.0) -> int:
+        """Forgets runs older than max_age_days, then the oldest runs until the blobs fit in max_bytes, and deletes
+        every blob no remaining run refers to, returning the number of blobs deleted"""
+        with _locked(self.lock_file, exclusive=True):
+            return self._collect_garbage(max_age_days)
+
+    def _collect_garbage(self, max_age_days: Union[None, float]) -> int:
+        runs = self._connection.execute('SELECT run_key, started FROM runs ORDER BY started').fetchall()
+        dropped: List[str] = list()
+        if max_age_days is not None:
+            cutoff = time() - max_age_days * 86400.0
+            dropped.extend(run_key for run_key, started in runs if started < cutoff)
+        self._drop_runs(dropped)
+        num_deleted = self._delete_unreferenced()
+        for run_key, _ in runs[len(dropped):-1]:  # the newest run is kept, however big it is
+            if self.total_bytes() <= self.max_bytes:
+                break
+            self._drop_runs([run_key])
+            num_deleted += self._delete_unreferenced()
+        return num_deleted
+
+    def _drop_runs(self, run_keys: List[str]):
+        with self._connection:
+            for run_key in run_keys:
+                self._connection.execute('DELETE FROM refs WHERE run_key = ?', (run_key,))
+                self._connection.execute('DELETE FROM runs WHERE run_key = ?', (run_key,))
+
+    def _delete_unreferenced(self) -> int:
+        rows = self._connection.execute(
+            'SELECT hash, compressed FROM blobs WHERE hash NOT IN (SELECT hash FROM refs)'
+        ).fetchall()
+        for digest, compressed in rows:
+            if self.ref_count(digest):
+                continue  # referred to again since, which the lock rules out, but an unlink can't be undone
+            try:
+                self.blob_path(digest, compressed=bool(compressed)).unlink()
+            except OSError:
+                pass  # already gone, the output folders that linked to it keep their own copy of the content
+        with self._connection:
+            deleted = self._connection.executemany(
+                'DELETE FROM blobs WHERE hash = ? AND hash NOT IN (SELECT hash FROM refs)',
+                [(digest,) for digest, _ in rows]
+            )
+        return deleted.rowcount
@@ -0,0 +1,79 @@
+from time import perf_counter
+from typing import Dict, List
+
+from my_app.tracing import percentile
+
+
+class StageStats:
+
+    def __init__(self):
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.busy_seconds = 0.0  # summed over all the tasks of the stage, so it can exceed the elapsed time
+
+
+class PipelineStats:
+    """Counters for each stage of the run pipeline: queue depth, tasks running, and completions per minute.
+
+    Only the run thread updates these, anything else (the GUI) just reads a snapshot of them."""
+
+    def __init__(self, stages: List[str]):
+        self.stages = {stage: StageStats() for stage in stages}
+        self._start_time = perf_counter()
+        self._task_start: Dict[object, float] = dict()
+        self._idf_start: Dict[str, float] = dict()
+        self.idf_seconds: List[float] = list()  # start of an IDF's first task to the end of its last, per IDF
+
+    def queue(self, stage: str, num_tasks: int = 1):
+        self.stages[stage].queued += num_tasks
+
+    def start(self, stage: str, task: object):
+        stats = self.stages[stage]
+        stats.queued -= 1
+        stats.running += 1
+        self._task_start[task] = perf_counter()
+
+    def finish(self, stage: str, task: object):
+        stats = self.stages[stage]
+        stats.running -= 1
+        stats.completed += 1
+        stats.busy_seconds += perf_counter() - self._task_start.pop(task, perf_counter())
+
+    def idf_started(self, idf: str):
+        self._idf_start[idf] = perf_counter()
+
+    def idf_finished(self, idf: str):
+        self.idf_seconds.append(perf_counter() - self._idf_start.pop(idf, perf_counter()))
+
+    def overview(self, num_workers: int) -> Dict[str, float]:
+        """Whole run figures: IDFs finished per minute, p50 and p95 seconds per IDF, and the fraction of the
+        workers' time spent running tasks"""
+        elapsed = max(perf_counter() - self._start_time, 1e-6)
+        seconds = sorted(self.idf_seconds)
+        now = perf_counter()
+        busy = sum(stats.busy_seconds for stats in list(self.stages.values()))
+        busy += sum(now - start for start in list(self._task_start.values()))  # the tasks running right now
+        return {
+            'idfs_per_minute': len(seconds) / elapsed * 60.0,
+            'p50_seconds': percentile(seconds, 0.5), 'p95_seconds': percentile(seconds, 0.95),
+            'utilization': min(1.0, busy / (elapsed * max(1, num_workers))),
+        }
+
+    def snapshot(self) -> Dict[str, Dict]:
+        minutes = max(perf_counter() - self._start_time, 1e-6) / 60.0
+        return {
+            stage: {
+                'queued': stats.queued, 'running': stats.running, 'completed': stats.completed,
+                'per_minute': stats.completed / minutes,
+                'mean_seconds': stats.busy_seconds / stats.completed if stats.completed else 0.0,
+            }
+            for stage, stats in list(self.stages.items())
+        }
+
+    @staticmethod
+    def describe(snapshot: Dict[str, Dict]) -> str:
+        return ' | '.join(
+            f"{stage}: {s['running']} running, {s['queued']} queued, {s['per_minute']:.1f}/min"
+            for stage, s in snapshot.items()
+        )
@@ -0,0 +1,218 @@
+"""Running suite jobs on other machines: the coordinator's listener, and the worker daemon that registers with it.
+
+Start a worker daemon on each machine with::
+
+    python -m my_app.remote_worker coordinator-host:port
+
+The coordinator only listens on the loopback interface unless it is told a host to listen on, e.g. 0.0.0.0 for every
+interface, which has to be done for workers on other machines to reach it.
+
+The build folders and output folder must be at the same paths on every machine (a shared filesystem), since jobs
+refer to them by path.  Coordinator and workers share a secret key, read from EPLUS_REGRESSION_TOOL_AUTHKEY if set,
+otherwise from remote_worker.key in the tool's data folder, which the coordinator creates on first use.
+
+The protocol runs over a multiprocessing connection, so messages are pickled tuples:
+
+* worker to coordinator: ('hello', name) once on connecting, then ('heartbeat', seconds) every few seconds while a
+  job runs, ending with ('result', result, error), or ('cancelled',) if the coordinator cancelled the job
+* coordinator to worker: ('worker', function) with the function to run jobs with, then ('job', job) one at a time,
+  ('cancel',) to kill the running job, or ('bye',) to shut the worker down
+"""
+from argparse import ArgumentParser
+from collections import deque
+from multiprocessing.connection import (
+    answer_challenge, AuthenticationError, Client, deliver_challenge, Listener
+)
+import os
+import secrets
+import socket
+import sys
+from threading import Condition, Thread, Timer
+from time import perf_counter
+from typing import Any, List, Tuple, Union
+
+from my_app.data_dir import get_data_dir
+from my_app.run_engine import RunEngine
+
+AUTHKEY_ENVIRONMENT_VARIABLE = 'EPLUS_REGRESSION_TOOL_AUTHKEY'
+
+
+def load_authkey() -> bytes:
+    """The secret shared by the coordinator and its workers, created the first time it's needed"""
+    from_environment = os.environ.get(AUTHKEY_ENVIRONMENT_VARIABLE)
+    if from_environment:
+        return from_environment.encode('utf-8')
+    key_file = get_data_dir() / 'remote_worker.key'
+    if not key_file.exists():
+        key_file.write_text(secrets.token_hex(32))
+        key_file.chmod(0o600)
+    return key_file.read_text().strip().encode('utf-8')
+
+
+# how long a new connection has to authenticate and say hello before it's dropped
+HELLO_TIMEOUT = 10.0
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """(host, port) from host:port, or from a bare port, which means this machine only"""
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class RemoteWorkerListener:
+    """The coordinator's end: accepts worker daemons registering over TCP and keeps the idle ones for the RunEngine.
+
+    Connections are accepted on a background thread, so workers can register at any time, between runs or part way
+    through one; each one is authenticated and waits for its hello on a thread of its own, so one that never says
+    anything holds up no other, and is hung up on after HELLO_TIMEOUT.  The RunEngine takes the idle workers when it
+    starts a run, or as they arrive during it, and gives the ones still in good shape back when the run is over."""
+
+    def __init__(self, address: Tuple[str, int] = ('127.0.0.1', 0), authkey: Union[None, bytes] = None):
+        # the listener itself doesn't authenticate, that would hold up accepting the next connection until it's done
+        self._listener = Listener(address)
+        self._authkey = authkey if authkey is not None else load_authkey()
+        self.address: Tuple[str, int] = self._listener.address
+        self._idle: deque = deque()
+        self._condition = Condition()
+        self._closed = False
+        self._thread = Thread(target=self._accept_loop, daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except ConnectionError:
+                continue  # a client that gave up before it was accepted, the next one may be fine
+            except OSError:
+                return  # the listener has been closed
+            Thread(target=self._register, args=(connection,), daemon=True).start()
+
+    def _register(self, connection):
+        timer = Timer(HELLO_TIMEOUT, _hang_up, (connection,))
+        timer.start()
+        try:
+            deliver_challenge(connection, self._authkey)
+            answer_challenge(connection, self._authkey)
+            kind, name = connection.recv()
+        except (AuthenticationError, EOFError, OSError, ValueError, TypeError):
+            kind, name = 'refused', ''  # a bad key, a client that gave up part way, or one too slow to say hello
+        finally:
+            timer.cancel()
+        if kind == 'hello' and not self._closed:
+            self.give_back(connection, name)
+        else:
+            connection.close()
+
+    def take(self) -> List[Tuple[Any, str]]:
+        """Every idle worker as (connection, name), they belong to the caller until given back"""
+        with self._condition:
+            workers = list(self._idle)
+            self._idle.clear()
+        return workers
+
+    def give_back(self, connection, name: str):
+        with self._condition:
+            self._idle.append((connection, name))
+            self._condition.notify_all()
+
+    def wait_for_worker(self, timeout: float) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: bool(self._idle), timeout)
+
+    @property
+    def num_idle(self) -> int:
+        return len(self._idle)
+
+    def close(self):
+        """Stops listening and tells the idle workers to shut down"""
+        self._closed = True
+        # closing the socket doesn't wake up a thread blocked accepting on it, a connection does
+        host, port = self.address
+        try:
+            socket.create_connection(('127.0.0.1' if host in ('0.0.0.0', '') else host, port), timeout=1.0).close()
+        except OSError:
+            pass
+        self._thread.join(1.0)
+        self._listener.close()
+        for connection, _ in self.take():
+            try:
+                connection.send(('bye',))
+            except OSError:
+                pass
+            connection.close()
+
+
+def _hang_up(connection):
+    """Shuts a connection down under whatever is blocked reading it, which closing it wouldn't wake"""
+    try:
+        with socket.socket(fileno=os.dup(connection.fileno())) as duplicate:
+            duplicate.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass  # closed already
+
+
+def serve(address: Tuple[str, int], authkey: bytes, name: Union[None, str] = None, heartbeat_interval: float = 5.0,
+          poll_interval: float = 0.1):
+    """The worker daemon's end: registers with the coordinator, then runs the jobs it sends until it goes away.
+
+    Each job runs in a child process, through a single worker RunEngine, so a cancelled job can be killed outright
+    the same way a local one is."""
+    connection = Client(address, authkey=authkey)
+    connection.send(('hello', name or f"{socket.gethostname()}:{os.getpid()}"))
+    worker = None
+    pending: deque = deque()  # messages that came in while a job was running, other than a cancel for it
+    while True:
+        try:
+            message = pending.popleft() if pending else connection.recv()
+        except (EOFError, OSError):
+            return
+        if message[0] == 'worker':
+            worker = message[1]
+        elif message[0] == 'job':
+            connection.send(_run_job(connection, worker, message[1], pending, heartbeat_interval, poll_interval))
+        elif message[0] == 'cancel':
+            connection.send(('cancelled',))  # the job it was meant for had already finished
+        elif message[0] == 'bye':
+            connection.close()
+            return
+
+
+def _run_job(connection, worker, job: Any, pending: deque, heartbeat_interval: float, poll_interval: float) -> Tuple:
+    outcome = list()
+    cancelled = list()
+    start = last_heartbeat = perf_counter()
+
+    def should_stop() -> bool:
+        nonlocal last_heartbeat
+        while not cancelled and connection.poll():
+            message = connection.recv()
+            if message[0] == 'cancel':
+                cancelled.append(True)
+            else:
+                pending.append(message)  # e.g. a bye, which is seen to once the job is over
+        if perf_counter() - last_heartbeat >= heartbeat_interval:
+            connection.send(('heartbeat', perf_counter() - start))
+            last_heartbeat = perf_counter()
+        return bool(cancelled)
+
+    engine = RunEngine(1, worker, poll_interval=poll_interval)
+    engine.run([job], lambda _, result, error: outcome.append(('result', result, error)), should_stop)
+    return ('cancelled',) if cancelled else outcome[0]
+
+
+def main(args: List[str]) -> int:
+    parser = ArgumentParser(description="Run suite jobs for a regression tool coordinator on another machine")
+    parser.add_argument('coordinator', help="host:port the coordinator is listening for workers on")
+    parser.add_argument('--name', help="How this worker shows up at the coordinator (default: host:pid)")
+    options = parser.parse_args(args)
+    try:
+        serve(parse_address(options.coordinator), load_authkey(), options.name)
+    except (ConnectionError, AuthenticationError) as e:
+        print(f"Could not register with {options.coordinator}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,195 @@
+from io import StringIO
+from itertools import islice
+from pathlib import Path
+import re
+from typing import Iterator, List, Tuple, Union
+
+import numpy as np
+
+from my_app.constants import ReportingFrequency
+
+# how finely each reporting frequency divides up the run, None meaning rows are compared as they are
+_PERIODS = {
+    ReportingFrequency.DETAILED: None,
+    ReportingFrequency.TIMESTEP: None,
+    ReportingFrequency.HOURLY: 'hour',
+    ReportingFrequency.DAILY: 'day',
+    ReportingFrequency.MONTHLY: 'month',
+    ReportingFrequency.RUNPERIOD: 'run',
+    ReportingFrequency.ENVIRONMENT: 'run',
+    ReportingFrequency.ANNUAL: 'run',
+}
+
+# where the digits are in a time stamp, the rest being the separators shown; daily ones stop after the date
+_STAMP_LAYOUT = '00/00  00:00:00'
+_STAMP_DIGITS = np.array([c == '0' for c in _STAMP_LAYOUT])
+_DATE_WIDTH = 5
+# the day of the year each month starts on, with room for 29 February
+_MONTH_STARTS = np.array([0, 0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+_MINUTES_PER_DAY = 24 * 60
+# a time stamp further ahead of the one before than this, or not ahead at all, starts a new environment
+_MAX_STEP_MINUTES = 2 * _MINUTES_PER_DAY
+# keys are the period within an environment plus the environment times this, more than any period can be
+_ENVIRONMENT_STRIDE = 1 << 32
+_EMPTY_FIELD = re.compile(r'(?<=,)[ \t]*(?=,|\r?\n|$)', re.MULTILINE)
+# units of quantities that accumulate over a period, like energy or volume, as opposed to rates and states
+_SUMMED_UNITS = {'J', 'kJ', 'MJ', 'GJ', 'kWh', 'MWh', 'Wh', 'm3', 'L', 'kg', 'gal', 'kBtu', 'MMBtu', 'therm'}
+_UNITS = re.compile(r'\[([^\]]*)\]')
+
+SUM, MEAN, MIN, MAX = 'sum', 'mean', 'min', 'max'
+
+
+def needs_resampling(frequency: Union[None, str]) -> bool:
+    return _PERIODS.get(frequency) is not None
+
+
+def reduction_for(column: str) -> str:
+    """How a column's values combine into one per period: extremes stay extremes, accumulations add up, the rest
+    (rates, temperatures, fractions) average out"""
+    name = column.split('[')[0]
+    if 'Minimum' in name:
+        return MIN
+    if 'Maximum' in name:
+        return MAX
+    units = _UNITS.search(column)
+    if units and units.group(1).strip() in _SUMMED_UNITS:
+        return SUM
+    return MEAN
+
+
+class Environments:
+    """Counts the environments (design days, run periods) through a time-series output, chunk after chunk.
+
+    Outputs don't say where one environment ends and the next starts, but the time stamps give it away: they go back
+    to the start of the next environment, or jump ahead to its first day.  Two environments on consecutive days do
+    look like one."""
+
+    def __init__(self):
+        self.environment = 0
+        self.last_minute = -1  # of the year, at the last time stamp seen, -1 before the first
+
+    def split(self, minutes: np.ndarray) -> np.ndarray:
+        """The environment of each of a run of rows, given the minute of the year they were stamped at"""
+        if not len(minutes):
+            return np.empty(0, dtype=np.int64)
+        steps = np.diff(minutes, prepend=self.last_minute)
+        starts = (steps <= 0) | (steps > _MAX_STEP_MINUTES)
+        if self.last_minute < 0:
+            starts[0] = False
+        environments = self.environment + np.cumsum(starts)
+        self.environment = int(environments[-1])
+        self.last_minute = int(minutes[-1])
+        return environments
+
+
+def period_keys(stamps: List[str], frequency: str, first_row: int = 0,
+                environments: Union[None, Environments] = None) -> np.ndarray:
+    """An integer per row, the same for consecutive rows in the same period of the same environment at this
+    frequency.  Pass the same Environments for every chunk of one file.
+
+    Rows whose time stamp doesn't parse, like the month names of monthly rows, each get a period of their own."""
+    period = _PERIODS[frequency]
+    keys = -(first_row + np.arange(len(stamps), dtype=np.int64)) - 1
+    if not len(stamps):
+        return keys
+    # " 01/31  13:15:00" in a time-series output, or " 01/31" when reported daily, always laid out the same way once
+    # stripped, so each field is at a fixed position in a row of character codes
+    stripped = np.char.strip(np.asarray(stamps, dtype=str))
+    lengths = np.char.str_len(stripped)
+    width = len(_STAMP_LAYOUT)
+    characters = stripped.astype(f"U{width}").view(np.uint32).reshape(len(stamps), width).astype(np.int64)
+    digits = characters - ord('0')
+    layout = np.array([ord(c) for c in _STAMP_LAYOUT])
+    matches = np.where(_STAMP_DIGITS, (digits >= 0) & (digits <= 9), characters == layout)
+    timed = (lengths == width) & matches.all(axis=1)
+    parsed = timed | ((lengths == _DATE_WIDTH) & matches[:, :_DATE_WIDTH].all(axis=1))
+    if not parsed.any():
+        return keys
+
+    def field(start: int) -> np.ndarray:
+        return digits[parsed, start] * 10 + digits[parsed, start + 1]
+
+    month = np.clip(field(0), 1, 12)
+    day = field(3)
+    untimed = ~timed[parsed]
+    hour, minute, second = (np.where(untimed, 0, field(start)) for start in (7, 10, 13))
+    environment = (environments or Environments()).split(
+        (_MONTH_STARTS[month] + day - 1) * _MINUTES_PER_DAY + hour * 60 + minute
+    )
+    if period == 'run':
+        local = np.zeros(len(month), dtype=np.int64)
+    elif period == 'month':
+        local = month
+    else:
+        local = month * 32 + day
+        if period == 'hour':
+            # stamps mark the end of their interval, so 13:15 through 14:00 are all hour 14
+            with_hour = ~untimed
+            local[with_hour] = local[with_hour] * 25 + (hour + ((minute > 0) | (second > 0)))[with_hour]
+    keys[parsed] = environment * _ENVIRONMENT_STRIDE + local
+    return keys
+
+
+def _reduce(values: np.ndarray, starts: np.ndarray, reductions: List[str]) -> np.ndarray:
+    """Combines the rows of values from each start to the next into one, column by column, ignoring blanks"""
+    out = np.empty((len(starts), values.shape[1]))
+    kinds = np.array(reductions)
+    present = ~np.isnan(values)
+    counts = np.add.reduceat(present.astype(np.int64), starts, axis=0)
+    for kind in (SUM, MEAN, MIN, MAX):
+        columns = np.flatnonzero(kinds == kind)
+        if not len(columns):
+            continue
+        subset = values[:, columns]
+        if kind == MIN:
+            out[:, columns] = np.fmin.reduceat(subset, starts, axis=0)
+        elif kind == MAX:
+            out[:, columns] = np.fmax.reduceat(subset, starts, axis=0)
+        else:
+            totals = np.add.reduceat(np.nan_to_num(subset, nan=0.0), starts, axis=0)
+            if kind == MEAN:
+                totals = np.divide(totals, counts[:, columns], out=totals, where=counts[:, columns] > 0)
+            out[:, columns] = totals
+    out[counts == 0] = np.nan  # nothing reported in that period, which is different from reporting zero
+    return out
+
+
+def _read_chunks(f, num_columns: int, chunk_rows: int) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """Yields the time stamps and a 2D float array of the values for at most chunk_rows rows"""
+    while True:
+        lines = list(islice(f, chunk_rows))
+        if not lines:
+            return
+        stamps = [line.split(',', 1)[0] for line in lines]
+        text = _EMPTY_FIELD.sub('nan', ''.join(lines))
+        yield stamps, np.loadtxt(
+            StringIO(text), delimiter=',', usecols=range(1, num_columns), ndmin=2, dtype=np.float64
+        )
+
+
+def resample(csv: Path, frequency: str, chunk_rows: int = 8760) -> Tuple[List[str], np.ndarray]:
+    """Aggregates a time-series CSV output to one row per period at frequency, returning its columns and values.
+
+    The file is streamed chunk_rows rows at a time, with a period that straddles two chunks carried over into the
+    next, so only the aggregates are ever held in full."""
+    with csv.open() as f:
+        columns = [column.strip() for column in f.readline().rstrip('\r\n').split(',')][1:]
+        reductions = [reduction_for(column) for column in columns]
+        aggregated: List[np.ndarray] = list()
+        carried_keys = np.empty(0, dtype=np.int64)
+        carried_values = np.empty((0, len(columns)))
+        first_row = 0
+        environments = Environments()
+        for stamps, values in _read_chunks(f, len(columns) + 1, chunk_rows):
+            keys = np.concatenate([carried_keys, period_keys(stamps, frequency, first_row, environments)])
+            values = np.concatenate([carried_values, values])
+            first_row += len(stamps)
+            starts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1])
+            # the last period may carry on in the next chunk
+            if len(starts) > 1:
+                aggregated.append(_reduce(values[:starts[-1]], starts[:-1], reductions))
+            carried_keys = keys[starts[-1]:]
+            carried_values = values[starts[-1]:]
+        if len(carried_keys):
+            aggregated.append(_reduce(carried_values, np.array([0]), reductions))
+    return columns, np.concatenate(aggregated) if aggregated else np.empty((0, len(columns)))
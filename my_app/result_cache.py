@@ -0,0 +1,146 @@
+from hashlib import sha256
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import Dict, Tuple, Union
+from uuid import uuid4
+
+from my_app.text_diff import file_digest
+
+# digests of the build files already read, by (path, mtime, size), so fingerprinting an unchanged build again only stats
+_build_file_digests: Dict[Tuple[str, int, int], str] = dict()
+
+
+def _build_file_digest(file_path: Path) -> str:
+    """The digest of one build file, or where it can't be read, e.g. a dangling symlink, of what can be told about it"""
+    try:
+        stat = file_path.stat()
+    except OSError:
+        try:
+            return 'link to ' + os.readlink(str(file_path))
+        except OSError:
+            return 'unreadable'
+    memo_key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _build_file_digests:
+        try:
+            _build_file_digests[memo_key] = file_digest(file_path)
+        except OSError:
+            return f"unreadable, {stat.st_size} bytes at {stat.st_mtime_ns}"
+    return _build_file_digests[memo_key]
+
+
+def fingerprint_build(build_dir: Path) -> str:
+    """Hashes the executable and support files of a build, i.e. everything in its Products folder.
+
+    This reads the whole build the first time, so it is done once per suite by the coordinator rather than by each
+    worker; after that only the files whose mtime or size has changed are read again.  Files that can't be read, like
+    a dangling symlink, are fingerprinted by what can be told about them rather than failing the run."""
+    products_dir = build_dir / 'Products'
+    root = products_dir if products_dir.is_dir() else build_dir
+    h = sha256()
+    for dir_path, dir_names, file_names in os.walk(str(root)):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            file_path = Path(dir_path) / file_name
+            h.update(str(file_path.relative_to(root)).encode('utf-8'))
+            h.update(_build_file_digest(file_path).encode('utf-8'))
+        if root == build_dir:
+            break  # without a Products folder, only the top level files of the build dir are considered
+    return h.hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of single simulation results (and their output files), keyed by everything that determines them.
+
+    Each entry is a folder named by its key, holding result.json and an outputs folder.  Entries are written to a
+    temporary folder and renamed into place, so several worker processes can share the cache safely.  A hit touches
+    the entry, which lets evict drop the least recently used entries once the cache is over its size cap."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 10 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(build_fingerprint: str, idf_file: Path, run_option: str, reporting_frequency: str) -> str:
+        h = sha256()
+        for part in (build_fingerprint, file_digest(idf_file), run_option, reporting_frequency):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def lookup(self, key: str, out_dir: Union[None, Path]) -> Union[None, Dict]:
+        """Returns the cached result for key, restoring its outputs into out_dir, or None on a miss"""
+        entry = self.cache_dir / key
+        try:
+            with (entry / 'result.json').open() as f:
+                result = json.load(f)
+            if out_dir:
+                out_dir.mkdir(parents=True, exist_ok=True)
+                for cached_file in (entry / 'outputs').iterdir():
+                    shutil.copy2(str(cached_file), str(out_dir / cached_file.name))
+            os.utime(str(entry / 'result.json'))
+        except (OSError, ValueError):
+            return None  # missing, or evicted out from under us
+        return result
+
+    def store(self, key: str, result: Dict, out_dir: Union[None, Path]):
+        entry = self.cache_dir / key
+        if entry.exists():
+            return
+        temp_entry = self.cache_dir / f".tmp-{uuid4().hex}"
+        try:
+            (temp_entry / 'outputs').mkdir(parents=True)
+            if out_dir and out_dir.is_dir():
+                for output_file in out_dir.iterdir():
+                    if output_file.is_file():
+                        shutil.copy2(str(output_file), str(temp_entry / 'outputs' / output_file.name))
+            with (temp_entry / 'result.json').open('w') as f:
+                json.dump(result, f)
+            os.rename(str(temp_entry), str(entry))
+        except OSError:
+            pass  # most likely another worker stored the same key first, either way the cache is still consistent
+        finally:
+            if temp_entry.exists():
+                shutil.rmtree(str(temp_entry), ignore_errors=True)
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the cache fits in max_bytes, returning the number deleted"""
+        entries = list()
+        total_bytes = 0
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir() or entry.name.startswith('.'):
+                continue
+            size = sum(f.stat().st_size for f in entry.rglob('*') if f.is_file())
+            try:
+                last_used = (entry / 'result.json').stat().st_mtime
+            except OSError:
+                last_used = 0.0
+            entries.append((last_used, size, entry))
+            total_bytes += size
+        num_deleted = 0
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(str(entry), ignore_errors=True)
+            total_bytes -= size
+            num_deleted += 1
+        return num_deleted
+
+    def record_stats(self, hits: int, misses: int) -> Dict[str, int]:
+        """Adds a suite's hits and misses to the running totals kept with the cache, returning the new totals"""
+        stats_file = self.cache_dir / 'stats.json'
+        try:
+            with stats_file.open() as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {'hits': 0, 'misses': 0}
+        stats['hits'] += hits
+        stats['misses'] += misses
+        try:
+            with stats_file.open('w') as f:
+                json.dump(stats, f)
+        except OSError:
+            pass
+        return stats
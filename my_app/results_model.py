@@ -0,0 +1,48 @@
+from typing import Dict, List, Union
+
+from my_app.results_store import ResultRow, ResultsStore
+
+
+class ResultsModel:
+    """What the results tree shows: one run out of a ResultsStore, organized by ResultsTreeRoots category.
+
+    The per-category counts are read once when a finished run is shown, or kept up to date from the per-IDF results
+    as a live run streams them in, and the rows themselves are read a page at a time as the tree asks for them, so
+    nothing about a run is held in memory beyond the page in view."""
+
+    def __init__(self, store: ResultsStore):
+        self.store = store
+        self.run_id: Union[None, int] = None
+        self._counts: Dict[str, int] = dict()
+
+    @property
+    def has_run(self) -> bool:
+        """Distinguishes "no results yet" from "a run with nothing in this category\""""
+        return self.run_id is not None
+
+    def clear(self):
+        self.run_id = None
+        self._counts = dict()
+
+    def show_run(self, run_id: int):
+        self.run_id = run_id
+        self._counts = self.store.counts(run_id)
+
+    def start_live_run(self, run_id: int):
+        """Shows a run that is still going, which starts out empty and grows through add_live_result"""
+        self.run_id = run_id
+        self._counts = dict()
+
+    def add_live_result(self, categories: List[str]):
+        for category in categories:
+            self._counts[category] = self._counts.get(category, 0) + 1
+
+    def count(self, category: str) -> int:
+        return self._counts.get(category, 0)
+
+    def page(self, category: str, after_seq: int, size: int) -> List[ResultRow]:
+        """The next rows of a category after the row numbered after_seq, which may be fewer than count suggests
+        while a live run still has results on their way to the store"""
+        if not self.has_run:
+            return list()
+        return self.store.rows(self.run_id, category, after_seq, size)
@@ -0,0 +1,222 @@
+import json
+import sqlite3
+from pathlib import Path
+from time import perf_counter, time
+from typing import Dict, List, Tuple, Union
+
+from my_app.constants import ResultsTreeRoots
+
+# the categories that mean something is wrong with an IDF, as opposed to it just having been run or compared
+PROBLEM_CATEGORIES = [
+    ResultsTreeRoots.Case1Fail,
+    ResultsTreeRoots.Case2Fail,
+    ResultsTreeRoots.BigMathDiff,
+    ResultsTreeRoots.SmallMathDiff,
+    ResultsTreeRoots.BigTableDiff,
+    ResultsTreeRoots.SmallTableDiff,
+    ResultsTreeRoots.TextDiff,
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    status TEXT NOT NULL,
+    config TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idfs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS idf_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    idf_id INTEGER NOT NULL REFERENCES idfs(id),
+    base_file TEXT NOT NULL,
+    mod_file TEXT NOT NULL,
+    diff_file TEXT NOT NULL,
+    PRIMARY KEY (run_id, idf_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS outcomes (
+    run_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    idf_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (run_id, category, idf_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS outcomes_in_order ON outcomes (run_id, category, seq);
+CREATE TABLE IF NOT EXISTS diffs (
+    run_id INTEGER NOT NULL,
+    idf_id INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    max_abs_diff REAL,
+    max_rel_diff REAL,
+    num_diffs INTEGER,
+    PRIMARY KEY (run_id, idf_id, file_name)
+) WITHOUT ROWID;
+"""
+
+
+class ResultRow:
+    """One row under a results tree category: the IDF plus the base/mod/diff file columns.
+
+    seq is the order the IDF's result came in during its run, which is also the order rows are listed in."""
+
+    def __init__(self, idf: str, base_file: str = '', mod_file: str = '', diff_file: str = '', seq: int = 0):
+        self.idf = idf
+        self.values: Tuple[str, str, str] = (base_file, mod_file, diff_file)
+        self.seq = seq
+
+    @staticmethod
+    def from_result(idf_result: Dict, seq: int = 0) -> 'ResultRow':
+        return ResultRow(
+            idf_result['idf'], idf_result.get('base_file', ''), idf_result.get('mod_file', ''),
+            idf_result.get('diff_file', ''), seq
+        )
+
+
+class ResultsStore:
+    """SQLite database of the results of every run, so runs can be looked back on and compared with each other.
+
+    The database is in WAL mode, so the GUI can read from its own connection while a run writes from another.  Each
+    connection belongs to the thread that made it, so the run thread and the GUI each open their own store on the
+    same file.  Per-IDF results are buffered and written batch_size at a time, or every batch_interval seconds, in one
+    transaction per batch; call flush to write whatever is pending.
+
+    The outcomes table is keyed (run, category, IDF), which is exactly the index the results tree reads a category
+    through and that the run to run regression query probes."""
+
+    def __init__(self, db_path: Union[str, Path], batch_size: int = 200, batch_interval: float = 1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._connection = sqlite3.connect(str(db_path))
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')  # in WAL mode this is still safe against app crashes
+        self._connection.executescript(SCHEMA)
+        self._idf_ids: Dict[str, int] = dict()
+        self._pending: List[Tuple[int, int, Dict]] = list()
+        self._last_flush = perf_counter()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def start_run(self, config: Dict) -> int:
+        with self._connection:
+            cursor = self._connection.execute(
+                'INSERT INTO runs (started, status, config) VALUES (?, ?, ?)', (time(), 'running', json.dumps(config))
+            )
+        return cursor.lastrowid
+
+    def finish_run(self, run_id: int, status: str):
+        self.flush()
+        with self._connection:
+            self._connection.execute('UPDATE runs SET finished = ?, status = ? WHERE id = ?', (time(), status, run_id))
+
+    def add_idf_result(self, run_id: int, seq: int, idf_result: Dict):
+        """Queues one per-IDF result dict, as the workers return them, for the next batch.
+
+        seq numbers the results of a run in the order they came in, it's what the rows of a category are listed by."""
+        self._pending.append((run_id, seq, idf_result))
+        if len(self._pending) >= self.batch_size or perf_counter() - self._last_flush >= self.batch_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = perf_counter()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, list()
+        with self._connection:
+            result_rows = list()
+            outcome_rows = list()
+            diff_rows = list()
+            for run_id, seq, idf_result in pending:
+                idf_id = self._idf_id(idf_result['idf'])
+                result_rows.append((
+                    run_id, idf_id, idf_result.get('base_file', ''), idf_result.get('mod_file', ''),
+                    idf_result.get('diff_file', '')
+                ))
+                outcome_rows.extend(
+                    (run_id, category, idf_id, seq) for category in idf_result.get('categories', [])
+                )
+                magnitudes = idf_result.get('magnitudes', {})
+                for file_name, category in idf_result.get('diffs', {}).items():
+                    magnitude = magnitudes.get(file_name, {})
+                    diff_rows.append((
+                        run_id, idf_id, file_name, category, magnitude.get('max_abs_diff'),
+                        magnitude.get('max_rel_diff'), magnitude.get('num_diffs')
+                    ))
+            self._connection.executemany('INSERT OR REPLACE INTO idf_results VALUES (?, ?, ?, ?, ?)', result_rows)
+            self._connection.executemany('INSERT OR IGNORE INTO outcomes VALUES (?, ?, ?, ?)', outcome_rows)
+            self._connection.executemany('INSERT OR REPLACE INTO diffs VALUES (?, ?, ?, ?, ?, ?, ?)', diff_rows)
+
+    def _idf_id(self, idf: str) -> int:
+        idf_id = self._idf_ids.get(idf)
+        if idf_id is None:
+            self._connection.execute('INSERT OR IGNORE INTO idfs (path) VALUES (?)', (idf,))
+            idf_id = self._connection.execute('SELECT id FROM idfs WHERE path = ?', (idf,)).fetchone()[0]
+            self._idf_ids[idf] = idf_id
+        return idf_id
+
+    def runs(self) -> List[Tuple[int, float, Union[None, float], str]]:
+        """(id, started, finished, status) of every run, newest first"""
+        return self._connection.execute('SELECT id, started, finished, status FROM runs ORDER BY id DESC').fetchall()
+
+    def previous_finished_run(self, run_id: int) -> Union[None, int]:
+        """The most recent run before this one that ran to completion, if there is one"""
+        row = self._connection.execute(
+            "SELECT MAX(id) FROM runs WHERE id < ? AND status = 'finished'", (run_id,)
+        ).fetchone()
+        return row[0]
+
+    def counts(self, run_id: int) -> Dict[str, int]:
+        """Number of IDFs in each category of a run"""
+        return dict(self._connection.execute(
+            'SELECT category, COUNT(*) FROM outcomes WHERE run_id = ? GROUP BY category', (run_id,)
+        ))
+
+    def rows(self, run_id: int, category: str, after_seq: int = 0, limit: int = -1) -> List[ResultRow]:
+        """One page of the IDFs in a category of a run, in the order their results came in.
+
+        Pages are keyed by the seq of the last row already shown, rather than an offset, so each page is one index
+        seek and rows that arrive while a category is being paged through are never skipped or repeated."""
+        cursor = self._connection.execute(
+            'SELECT i.path, r.base_file, r.mod_file, r.diff_file, o.seq FROM outcomes o '
+            'JOIN idfs i ON i.id = o.idf_id '
+            'LEFT JOIN idf_results r ON r.run_id = o.run_id AND r.idf_id = o.idf_id '
+            'WHERE o.run_id = ? AND o.category = ? AND o.seq > ? ORDER BY o.seq LIMIT ?',
+            (run_id, category, after_seq, limit)
+        )
+        return [ResultRow(idf, base or '', mod or '', diff or '', seq) for idf, base, mod, diff, seq in cursor]
+
+    def idfs_in_category(self, run_id: int, category: str) -> List[str]:
+        return [row.idf for row in self.rows(run_id, category)]
+
+    def diff_magnitudes(self, run_id: int, idf: str) -> Dict[str, Dict]:
+        """The diffs one IDF had in a run, by output file name"""
+        cursor = self._connection.execute(
+            'SELECT d.file_name, d.category, d.max_abs_diff, d.max_rel_diff, d.num_diffs FROM diffs d '
+            'JOIN idfs i ON i.id = d.idf_id WHERE d.run_id = ? AND i.path = ?', (run_id, idf)
+        )
+        return {
+            file_name: {'category': category, 'max_abs_diff': max_abs, 'max_rel_diff': max_rel, 'num_diffs': num}
+            for file_name, category, max_abs, max_rel, num in cursor
+        }
+
+    def regressions(self, old_run_id: int, new_run_id: int) -> List[Tuple[str, str]]:
+        """(idf, category) for each problem category an IDF is in for the new run but wasn't in for the old one.
+
+        Only IDFs that are in both runs count, an IDF the old run never ran can't be said to have regressed."""
+        placeholders = ', '.join('?' * len(PROBLEM_CATEGORIES))
+        cursor = self._connection.execute(
+            'SELECT i.path, o.category FROM outcomes o JOIN idfs i ON i.id = o.idf_id '
+            f'WHERE o.run_id = ? AND o.category IN ({placeholders}) '
+            'AND EXISTS (SELECT 1 FROM idf_results r WHERE r.run_id = ? AND r.idf_id = o.idf_id) '
+            'AND NOT EXISTS ('
+            '    SELECT 1 FROM outcomes p WHERE p.run_id = ? AND p.category = o.category AND p.idf_id = o.idf_id'
+            ') ORDER BY i.path',
+            (new_run_id, *PROBLEM_CATEGORIES, old_run_id, old_run_id)
+        )
+        return cursor.fetchall()
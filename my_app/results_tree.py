@@ -0,0 +1,112 @@
+from tkinter import ttk
+from typing import Dict, List
+
+from my_app.constants import ResultsTreeRoots
+from my_app.results_model import ResultsModel
+from my_app.results_store import ResultRow
+
+
+class LazyResultsTree:
+    """Drives a ttk.Treeview from a ResultsModel, only inserting a category's rows once that category is opened.
+
+    Each root shows its count in its label.  Opening a root inserts one page of rows, followed by a "more" row that
+    loads the next page when double-clicked, so a category with tens of thousands of files never costs more than one
+    page of Treeview inserts at a time.
+
+    While a run is going, add_result streams each IDF's result in: root labels are updated in place, and a row is
+    only inserted if its category is already showing everything before it, otherwise it is left for the "more" row
+    or the first open to page in.  Nothing is ever deleted and re-inserted, so the end of a run costs nothing."""
+
+    PAGE_SIZE = 500
+    PLACEHOLDER = "Loading..."
+
+    def __init__(self, tree: ttk.Treeview, model: ResultsModel):
+        self.tree = tree
+        self.model = model
+        self.root_items: Dict[str, str] = dict()
+        self._num_loaded: Dict[str, int] = dict()  # how many rows of each category are in the tree
+        self._last_seq: Dict[str, int] = dict()  # seq of the last row in the tree, per category that's been opened
+        self._more_items: Dict[str, str] = dict()  # the "more" row item id, per category, if there is one
+        self._placeholder_items: Dict[str, str] = dict()  # the dummy child of a category that hasn't been opened
+        self.tree.bind('<<TreeviewOpen>>', self._on_open)
+        self.tree.bind('<Double-1>', self._on_double_click)
+        self.reset()
+
+    def reset(self):
+        """Clears the tree back to just the (collapsed) category roots, reflecting whatever is in the model"""
+        self.tree.delete(*self.tree.get_children())
+        self._num_loaded.clear()
+        self._last_seq.clear()
+        self._more_items.clear()
+        self._placeholder_items.clear()
+        for root in ResultsTreeRoots.get_all():
+            self.root_items[root] = self.tree.insert(
+                parent="", index='end', text=self._root_label(root), values=("", "", "")
+            )
+            self._num_loaded[root] = 0
+            if not self.model.has_run:
+                self.tree.insert(
+                    parent=self.root_items[root], index="end", text="Run test for results", values=("", "", "")
+                )
+            elif self.model.count(root):
+                self._add_placeholder(root)
+
+    def add_result(self, row: ResultRow, categories: List[str]):
+        """Adds one live result, the model must already have counted it"""
+        for root in categories:
+            self.tree.item(self.root_items[root], text=self._root_label(root))
+            if root not in self._last_seq:
+                if root not in self._placeholder_items:
+                    self._add_placeholder(root)
+            elif root in self._more_items:
+                self._update_more_item(root)
+            else:
+                self.tree.insert(parent=self.root_items[root], index='end', text=row.idf, values=row.values)
+                self._num_loaded[root] += 1
+                self._last_seq[root] = row.seq
+
+    def _add_placeholder(self, root: str):
+        # a single dummy child makes the root expandable without inserting any of the real rows
+        self._placeholder_items[root] = self.tree.insert(
+            parent=self.root_items[root], index="end", text=self.PLACEHOLDER
+        )
+
+    def _root_label(self, root: str) -> str:
+        if not self.model.has_run:
+            return root
+        return f"{root} ({self.model.count(root)})"
+
+    def _on_open(self, _):
+        item = self.tree.focus()
+        for root, root_item in self.root_items.items():
+            if root_item == item and root not in self._last_seq and self.model.count(root):
+                self.tree.delete(self._placeholder_items.pop(root))
+                self._last_seq[root] = 0
+                self._load_page(root)
+                return
+
+    def _on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        for root, more_item in self._more_items.items():
+            if more_item == item:
+                self._load_page(root)
+                return 'break'
+
+    def _load_page(self, root: str):
+        more_item = self._more_items.pop(root, None)
+        if more_item:
+            self.tree.delete(more_item)
+        rows = self.model.page(root, self._last_seq[root], self.PAGE_SIZE)
+        parent = self.root_items[root]
+        for row in rows:
+            self.tree.insert(parent=parent, index='end', text=row.idf, values=row.values)
+        self._num_loaded[root] += len(rows)
+        if rows:
+            self._last_seq[root] = rows[-1].seq
+        if self.model.count(root) > self._num_loaded[root]:
+            self._more_items[root] = self.tree.insert(parent=parent, index='end', text='', values=("", "", ""))
+            self._update_more_item(root)
+
+    def _update_more_item(self, root: str):
+        remaining = self.model.count(root) - self._num_loaded[root]
+        self.tree.item(self._more_items[root], text=f"... {remaining} more (double-click to show)")
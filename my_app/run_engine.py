@@ -0,0 +1,331 @@
+from collections import deque
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+import signal
+from time import perf_counter, sleep
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+
+def _worker_main(connection, worker: Callable[[Any], Any]):
+    """Operates in a worker process, running jobs sent over the connection until told to stop"""
+    # a Ctrl-C in a terminal reaches the whole process group, but stopping is the coordinator's call
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        try:
+            outcome = ('result', worker(job), None)
+        except Exception as e:
+            outcome = ('result', None, e)
+        try:
+            connection.send(outcome)
+        except Exception as e:  # most likely the result or exception can't be pickled
+            connection.send(('result', None, RuntimeError(f"Could not send back the result: {e}")))
+
+
+class WorkerDied(RuntimeError):
+    pass
+
+
+class _WorkerHandle:
+    """A worker process on this machine"""
+
+    remote = False
+
+    def __init__(self, worker: Callable[[Any], Any]):
+        self.connection, child_connection = Pipe()
+        self.process = Process(target=_worker_main, args=(child_connection, worker), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.job: Any = None
+        self.busy = False
+
+    def give(self, job: Any):
+        self.job = job
+        self.busy = True
+        self.connection.send(job)
+
+    def waitables(self) -> List[Any]:
+        return [self.connection, self.process.sentinel]
+
+
+class _RemoteWorkerHandle:
+    """A worker daemon that registered over TCP, see my_app.remote_worker for its side of the protocol"""
+
+    remote = True
+
+    def __init__(self, connection, name: str, worker: Callable[[Any], Any]):
+        self.connection = connection
+        self.name = name
+        self.job: Any = None
+        self.busy = False
+        self.last_heard = perf_counter()
+        self.connection.send(('worker', worker))
+
+    def give(self, job: Any):
+        self.job = job
+        self.busy = True
+        self.last_heard = perf_counter()
+        self.connection.send(('job', job))
+
+    def waitables(self) -> List[Any]:
+        return [self.connection]
+
+
+class RunEngine:
+    """Runs jobs in a set of worker processes, each worker handed one job at a time.
+
+    Handing out jobs one at a time (instead of queueing them all up front) means the engine always knows exactly which
+    job every worker is running, so it can run jobs in the order it was given, notice a worker dying mid-job, and stop
+    everything on request by terminating the workers, within stop_deadline seconds.
+
+    It also makes the engine a pipeline: the result of one job can queue follow-up jobs, which go ahead of everything
+    still waiting, and an admit check can hold back the waiting jobs while follow-ups pile up.
+
+    With a RemoteWorkerListener, worker daemons on other machines join the pool as they register, even part way
+    through a run.  Every idle worker, local or remote, takes the next job from the one shared queue, so the fast
+    ones end up taking the work the slow ones would otherwise have queued up.  A remote worker that disconnects, or
+    goes quiet for heartbeat_timeout seconds, is dropped and its job goes back to the front of the queue, up to
+    max_reassign times before the job is reported as failed with WorkerDied.
+
+    With an AdaptiveConcurrency, the number of local workers isn't fixed: it starts at the controller's minimum and
+    follows its limit up as the machine shows spare capacity and back down under CPU or memory pressure, and no new
+    local job starts while memory is short."""
+
+    def __init__(self, num_workers: int, worker: Callable[[Any], Any], poll_interval: float = 0.1,
+                 stop_deadline: float = 2.0, remote=None, heartbeat_timeout: float = 30.0, max_reassign: int = 2,
+                 concurrency=None):
+        # the worker function is shipped to the child processes, so it must be picklable (a module level function)
+        self.concurrency = concurrency  # an AdaptiveConcurrency, or None for num_workers local workers throughout
+        if concurrency:
+            num_workers = concurrency.max_workers
+        self.num_workers = max(0 if remote else 1, num_workers)
+        self.worker = worker
+        self.poll_interval = poll_interval
+        self.stop_deadline = stop_deadline
+        self.remote = remote  # a RemoteWorkerListener, or None to only run locally
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_reassign = max_reassign
+        self.killed_jobs: List[Any] = list()  # jobs that were in flight when the engine was stopped
+        self.lost_workers: List[str] = list()  # names of the remote workers dropped during the last run
+
+    def run(
+            self, jobs: List[Any],
+            on_result: Callable[[Any, Any, Union[None, BaseException]], Union[None, Iterable[Any]]],
+            should_stop: Callable[[], bool],
+            admit: Union[None, Callable[[Any], bool]] = None,
+            on_start: Union[None, Callable[[Any], None]] = None
+    ) -> bool:
+        """Runs all jobs, calling on_result from *this* thread as each one completes.
+
+        Whatever on_result returns is queued as follow-up jobs.  admit(job), if given, is asked before the next of the
+        original jobs is started; when it says no, that job waits until something else completes, unless there is
+        nothing else running at all.  on_start(job), if given, is called as each job is handed to a worker.
+
+        Returns True if every job completed, or False if should_stop() asked us to bail out early."""
+        self.killed_jobs = list()
+        self.lost_workers = list()
+        if not jobs:
+            return True
+        pending = deque(jobs)
+        follow_ups = deque()
+        reassigned: Dict[Any, int] = dict()  # times each job has gone back in the queue after losing its worker
+
+        def next_job(force: bool):
+            if follow_ups:
+                return follow_ups.popleft()
+            if pending and (force or admit is None or admit(pending[0])):
+                return pending.popleft()
+            return None
+
+        def give(idle, job_to_give: Any):
+            if on_start and job_to_give not in reassigned:
+                on_start(job_to_give)
+            try:
+                idle.give(job_to_give)
+            except OSError:  # a remote worker that went away while it was idle, the job never got going
+                reassigned.setdefault(job_to_give, 0)
+                follow_ups.appendleft(job_to_give)
+                lose(idle)
+
+        def local_room() -> bool:
+            if not self.concurrency:
+                return True
+            num_busy = sum(1 for h in workers if h.busy and not h.remote)
+            return num_busy < self.concurrency.limit and not self.concurrency.holding
+
+        def grow():
+            """Starts local workers up to the concurrency limit, if there's anything for them to do"""
+            num_local = sum(1 for h in workers if not h.remote)
+            while (pending or follow_ups) and num_local < min(self.concurrency.limit, self.num_workers):
+                workers.append(_WorkerHandle(self.worker))
+                num_local += 1
+
+        def hand_out():
+            if self.concurrency:
+                grow()
+            for idle in list(workers):
+                if not idle.busy:
+                    if not idle.remote and not local_room():
+                        continue
+                    job_to_give = next_job(False)
+                    if job_to_give is None:
+                        break
+                    give(idle, job_to_give)
+            # held back by admit with nothing running would wait forever, so the next job goes regardless, but not to
+            # a local worker while there's too little memory for it: that holds until update sees memory come back
+            holding = self.concurrency and self.concurrency.holding
+            able = [h for h in workers if h.remote or not holding]
+            if able and not any(h.busy for h in workers):
+                job_to_give = next_job(True)
+                if job_to_give is not None:
+                    give(able[0], job_to_give)
+
+        def lose(handle: _RemoteWorkerHandle):
+            workers.remove(handle)
+            self.lost_workers.append(handle.name)
+            handle.connection.close()
+
+        def reassign(handle: _RemoteWorkerHandle, job_lost: Any) -> bool:
+            """Drops a lost remote worker, putting its job back at the front of the queue if it hasn't been too often"""
+            handle.busy = False
+            handle.job = None
+            lose(handle)
+            if reassigned.get(job_lost, 0) >= self.max_reassign:
+                return False
+            reassigned[job_lost] = reassigned.get(job_lost, 0) + 1
+            follow_ups.appendleft(job_lost)
+            return True
+
+        num_to_start = 0 if self.concurrency else min(self.num_workers, len(jobs))
+        workers = [_WorkerHandle(self.worker) for _ in range(num_to_start)]
+        try:
+            while True:
+                self._add_remote_workers(workers)
+                if self.concurrency:
+                    self.concurrency.update(h.process.pid for h in workers if h.busy and not h.remote)
+                if not should_stop():
+                    hand_out()
+                if not any(handle.busy for handle in workers):
+                    if (pending or follow_ups) and not should_stop():
+                        if self.remote and not workers:
+                            self.remote.wait_for_worker(self.poll_interval)  # nobody to run anything yet
+                            continue
+                        if self.concurrency and self.concurrency.holding:
+                            sleep(self.poll_interval)  # nothing may start until there's memory for it again
+                            continue
+                    break
+                # wake up regularly even if nothing finishes so that cancellation stays responsive
+                if should_stop():
+                    self.killed_jobs = [handle.job for handle in workers if handle.busy]
+                    self._kill(workers)
+                    return False
+                waitables: Dict[Any, Any] = dict()
+                for handle in workers:
+                    if handle.busy:
+                        for waitable in handle.waitables():
+                            waitables[waitable] = handle
+                for ready in wait(list(waitables), timeout=self.poll_interval):
+                    handle = waitables[ready]
+                    if not handle.busy:
+                        continue  # its result and its exit were both ready, the result has already been handled
+                    job = handle.job
+                    try:
+                        message = handle.connection.recv()
+                    except (EOFError, OSError):
+                        message = None
+                    if message and message[0] == 'heartbeat':
+                        handle.last_heard = perf_counter()
+                        continue
+                    handle.busy = False
+                    handle.job = None
+                    if message:
+                        result, error = message[1:]
+                    elif handle.remote:
+                        if reassign(handle, job):
+                            continue
+                        result, error = None, WorkerDied(f"Lost remote worker {handle.name}, too many times")
+                    else:
+                        # the process is gone, take whatever was left of it and start a fresh one in its place
+                        handle.process.join()
+                        result, error = None, WorkerDied(f"Worker exited with code {handle.process.exitcode}")
+                        handle.connection.close()
+                        workers[workers.index(handle)] = _WorkerHandle(self.worker)
+                    follow_ups.extend(on_result(job, result, error) or ())
+                # a machine that drops off the network doesn't close its connection, it just stops sending heartbeats
+                now = perf_counter()
+                for handle in [h for h in workers if h.remote and h.busy]:
+                    if now - handle.last_heard > self.heartbeat_timeout:
+                        job = handle.job
+                        if not reassign(handle, job):
+                            error = WorkerDied(f"Remote worker {handle.name} stopped responding, too many times")
+                            follow_ups.extend(on_result(job, None, error) or ())
+            # stopping just as the last running job finished still leaves the waiting ones undone
+            return not (pending or follow_ups)
+        finally:
+            self._shut_down(workers)
+
+    def _add_remote_workers(self, workers: List[Any]):
+        if not self.remote:
+            return
+        for connection, name in self.remote.take():
+            try:
+                workers.append(_RemoteWorkerHandle(connection, name, self.worker))
+            except OSError:
+                connection.close()
+
+    def _kill(self, workers: List[Any]):
+        deadline = perf_counter() + self.stop_deadline
+        local = [handle for handle in workers if not handle.remote]
+        for handle in local:
+            handle.process.terminate()
+        for handle in workers:
+            if handle.remote and handle.busy:
+                self._cancel_remote(handle, deadline)
+        for handle in local:
+            # anything that ignores the polite request gets a SIGKILL once the deadline has passed
+            handle.process.join(max(0.0, deadline - perf_counter()))
+            if handle.process.is_alive():
+                getattr(handle.process, 'kill', handle.process.terminate)()
+                handle.process.join()
+
+    @staticmethod
+    def _cancel_remote(handle: _RemoteWorkerHandle, deadline: float):
+        """Asks a remote worker to kill its job, it's only good for another run once it says it has"""
+        try:
+            handle.connection.send(('cancel',))
+            while handle.connection.poll(max(0.0, deadline - perf_counter())):
+                if handle.connection.recv()[0] == 'cancelled':
+                    handle.busy = False
+                    handle.job = None
+                    return
+        except (EOFError, OSError):
+            pass
+        handle.connection.close()
+
+    def _shut_down(self, workers: List[Any]):
+        local = [handle for handle in workers if not handle.remote]
+        for handle in workers:
+            if handle.remote:
+                # remote workers stay registered for the next run, unless they're in no state to take one
+                if handle.busy or handle.connection.closed:
+                    handle.connection.close()
+                else:
+                    self.remote.give_back(handle.connection, handle.name)
+        for handle in local:
+            if handle.process.is_alive():
+                try:
+                    handle.connection.send(None)
+                except OSError:
+                    pass
+        deadline = perf_counter() + self.stop_deadline
+        for handle in local:
+            handle.process.join(max(0.0, deadline - perf_counter()))
+        if any(handle.process.is_alive() for handle in local):
+            self._kill(local)
+        for handle in local:
+            handle.connection.close()
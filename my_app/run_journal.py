@@ -0,0 +1,79 @@
+import json
+import os
+from pathlib import Path
+from time import perf_counter
+from typing import Dict
+
+
+class RunJournal:
+    """Append-only journal of the IDFs a suite has completed, so an interrupted suite can pick up where it left off.
+
+    The file is JSON lines: a header line holding the signature of the run configuration, followed by one compact
+    line per completed IDF with its results.  Every record is flushed to the OS as it is written, which already
+    survives the app crashing; the fsync that makes it survive the machine going down is batched, every sync_every
+    records or sync_interval seconds, whichever comes first."""
+
+    def __init__(self, path: Path, signature: str, sync_every: int = 50, sync_interval: float = 1.0):
+        self.path = path
+        self.signature = signature
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = 0.0
+
+    def replay(self) -> Dict[str, Dict]:
+        """Returns the results of every IDF recorded in the journal, if it was written for the same configuration"""
+        completed = dict()
+        try:
+            with self.path.open() as f:
+                header = json.loads(f.readline())
+                if header.get('signature') != self.signature:
+                    return completed
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # a partial line from a crash mid-write, or the blank line a resume starts with
+                    completed[record['idf']] = record['result']
+        except (OSError, ValueError):
+            pass
+        return completed
+
+    def open(self, resume: bool) -> Dict[str, Dict]:
+        """Opens the journal for writing, continuing it if resuming or starting it over otherwise, and returns what
+        replay would have, read while checking there's a journal to continue"""
+        completed = self.replay() if resume else dict()
+        if completed:
+            self._file = self.path.open('a')
+            self._file.write('\n')  # terminate any partial line left by a crash
+        else:
+            self._file = self.path.open('w')
+            self._file.write(json.dumps({'signature': self.signature}) + '\n')
+        self._sync()
+        return completed
+
+    def record(self, idf: str, result: Dict):
+        if not self._file:
+            return
+        self._file.write(json.dumps({'idf': idf, 'result': result}, separators=(',', ':'), default=str) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or perf_counter() - self._last_sync >= self.sync_interval:
+            self._sync()
+
+    def close(self):
+        if self._file:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = perf_counter()
+
+    @staticmethod
+    def path_for(journal_dir: Path, signature: str) -> Path:
+        return journal_dir / f"{signature[:16]}.jsonl"
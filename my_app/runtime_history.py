@@ -0,0 +1,65 @@
+import json
+import os
+from pathlib import Path
+from statistics import median
+from typing import Dict, Union
+
+
+class RuntimeHistory:
+    """Measured simulation runtimes, per IDF, build and run option, persisted as a small JSON file.
+
+    Each entry is an exponential moving average of the runtime along with the IDF size when it was measured, which
+    also lets the history estimate IDFs it has never seen from their size."""
+
+    # weight of the newest measurement in the moving average
+    SMOOTHING = 0.5
+    # seconds per byte of IDF to assume before anything at all has been measured
+    DEFAULT_SECONDS_PER_BYTE = 1e-4
+
+    def __init__(self, history_file: Union[None, Path] = None):
+        self.history_file = history_file  # if None the history lives in memory only
+        self._entries: Dict[str, list] = dict()  # key -> [runtime seconds, idf size in bytes]
+        self._seconds_per_byte: Union[None, float] = None
+        if history_file:
+            try:
+                with history_file.open() as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def _key(idf: str, build: str, run_option: str) -> str:
+        return f"{build}|{run_option}|{idf}"
+
+    def record(self, idf: str, build: str, run_option: str, seconds: float, idf_size: int):
+        key = self._key(idf, build, run_option)
+        previous = self._entries.get(key)
+        if previous:
+            seconds = self.SMOOTHING * seconds + (1.0 - self.SMOOTHING) * previous[0]
+        self._entries[key] = [seconds, idf_size]
+        self._seconds_per_byte = None
+
+    def seconds_per_byte(self) -> float:
+        """The typical runtime per byte of IDF over everything measured so far"""
+        if self._seconds_per_byte is None:
+            rates = [seconds / size for seconds, size in self._entries.values() if size > 0]
+            self._seconds_per_byte = median(rates) if rates else self.DEFAULT_SECONDS_PER_BYTE
+        return self._seconds_per_byte
+
+    def expected(self, idf: str, build: str, run_option: str, idf_size: int) -> float:
+        """Expected runtime in seconds, from history if there is any, otherwise estimated from the IDF size"""
+        entry = self._entries.get(self._key(idf, build, run_option))
+        if entry:
+            return entry[0]
+        return max(idf_size, 1) * self.seconds_per_byte()
+
+    def save(self):
+        if not self.history_file:
+            return
+        temp_file = self.history_file.with_suffix('.tmp')
+        try:
+            with temp_file.open('w') as f:
+                json.dump(self._entries, f, separators=(',', ':'))
+            os.replace(str(temp_file), str(self.history_file))
+        except OSError:
+            pass  # losing some history only makes the next schedule a little less accurate
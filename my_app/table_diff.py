@@ -0,0 +1,189 @@
+from collections import deque
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Tuple, Union
+
+from my_app.constants import ResultsTreeRoots
+from my_app.diff_thresholds import DiffThresholds
+
+
+class ReportTable:
+
+    def __init__(self, title: str):
+        self.title = title  # report name, "for" name and table name, which together identify the table
+        self.rows: List[List[str]] = list()
+
+    def cells(self) -> Dict[Tuple[str, str], str]:
+        """The body cells keyed by (row heading, column heading), the headings being the first column and row"""
+        if not self.rows:
+            return dict()
+        column_headings = self.rows[0]
+        cells = dict()
+        for row in self.rows[1:]:
+            for column_heading, value in zip(column_headings[1:], row[1:]):
+                cells[(row[0], column_heading)] = value
+        return cells
+
+
+class _TableParser(HTMLParser):
+    """Incremental parser that turns a tabular report into a stream of ReportTables, keeping no DOM.
+
+    Tables in the report are preceded by paragraphs like "Report: <b>name</b>" and "For: <b>name</b>", and by the
+    table name in bold, so the parser just tracks the most recent of each and closes out a table at </table>."""
+
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.completed: Deque[ReportTable] = deque()
+        self._report = ''
+        self._for = ''
+        self._last_bold = ''
+        self._last_text = ''  # plain text since the last tag, which may arrive split across chunks
+        self._bold_context = ''
+        self._in_bold = False
+        self._bold_text: List[str] = list()
+        self._table: Union[None, ReportTable] = None
+        self._cell: Union[None, List[str]] = None
+        self._titles_seen: Dict[str, int] = dict()
+
+    def handle_starttag(self, tag, _attrs):
+        bold_context = self._last_text.strip()
+        self._last_text = ''
+        if tag == 'b' and self._table is None:  # bold inside a table is just part of a cell, not a title
+            self._in_bold = True
+            self._bold_context = bold_context
+            self._bold_text = list()
+        elif tag == 'table':
+            title = f"{self._report} | {self._for} | {self._last_bold}"
+            # the same table title can legitimately repeat in a report, so number the repeats
+            occurrence = self._titles_seen.get(title, 0)
+            self._titles_seen[title] = occurrence + 1
+            self._table = ReportTable(f"{title} #{occurrence}" if occurrence else title)
+        elif self._table and tag == 'tr':
+            self._table.rows.append(list())
+        elif self._table and tag in ('td', 'th'):
+            self._cell = list()
+
+    def handle_endtag(self, tag):
+        if tag == 'b' and self._in_bold:
+            self._in_bold = False
+            text = ''.join(self._bold_text).strip()
+            if self._bold_context.endswith('Report:'):
+                self._report = text
+            elif self._bold_context.endswith('For:'):
+                self._for = text
+            else:
+                self._last_bold = text
+        elif tag == 'table' and self._table:
+            self.completed.append(self._table)
+            self._table = None
+        elif tag in ('td', 'th') and self._cell is not None:
+            if self._table.rows:
+                self._table.rows[-1].append(''.join(self._cell).strip())
+            self._cell = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+        elif self._in_bold:
+            self._bold_text.append(data)
+        else:
+            self._last_text = (self._last_text + data)[-64:]
+
+
+def iter_report_tables(report: Path, chunk_size: int = 1 << 16) -> Iterator[ReportTable]:
+    """Yields the tables of a tabular report one at a time, reading the file in chunks"""
+    parser = _TableParser()
+    with report.open(encoding='utf-8', errors='replace') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            while parser.completed:
+                yield parser.completed.popleft()
+    parser.close()
+    while parser.completed:
+        yield parser.completed.popleft()
+
+
+class TableDiffResult:
+
+    def __init__(self):
+        self.tables_compared = 0
+        self.unmatched_tables: List[str] = list()
+        self.big_diffs = 0
+        self.small_diffs = 0
+        self.string_diffs = 0
+        self.equal = 0
+
+    @property
+    def category(self) -> Union[None, str]:
+        """The ResultsTreeRoots category this comparison lands in, or None if there were no diffs"""
+        if self.big_diffs or self.string_diffs or self.unmatched_tables:
+            return ResultsTreeRoots.BigTableDiff
+        if self.small_diffs:
+            return ResultsTreeRoots.SmallTableDiff
+        return None
+
+
+def _to_float(value: str) -> Union[None, float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def compare_tables(result: TableDiffResult, table_1: ReportTable, table_2: ReportTable, thresholds: DiffThresholds):
+    result.tables_compared += 1
+    cells_2 = table_2.cells()
+    for key, value_1 in table_1.cells().items():
+        value_2 = cells_2.pop(key, None)
+        if value_2 is None:
+            result.string_diffs += 1
+            continue
+        if value_1 == value_2:
+            result.equal += 1
+            continue
+        number_1 = _to_float(value_1)
+        number_2 = _to_float(value_2)
+        if number_1 is None or number_2 is None:
+            result.string_diffs += 1
+            continue
+        diff = thresholds.classify(number_1, number_2)
+        if diff == 2:
+            result.big_diffs += 1
+        elif diff == 1:
+            result.small_diffs += 1
+        else:
+            result.equal += 1
+    result.string_diffs += len(cells_2)  # cells only present in the second table
+
+
+def table_diff(report_1: Path, report_2: Path, thresholds: Union[None, DiffThresholds] = None) -> TableDiffResult:
+    """Compares two tabular reports table by table, matching tables by title.
+
+    Both reports are parsed once, in lockstep.  When the tables come in the same order (the usual case) each pair is
+    compared and dropped as soon as both halves have been parsed, so memory stays around one table per report; a
+    table without a partner yet waits in a pending map until its partner shows up or the report ends."""
+    thresholds = thresholds if thresholds else DiffThresholds()
+    result = TableDiffResult()
+    pending: Tuple[Dict[str, ReportTable], Dict[str, ReportTable]] = (dict(), dict())
+    streams = [iter_report_tables(report_1), iter_report_tables(report_2)]
+    exhausted = [False, False]
+    while not all(exhausted):
+        for side in (0, 1):
+            if exhausted[side]:
+                continue
+            table = next(streams[side], None)
+            if table is None:
+                exhausted[side] = True
+                continue
+            partner = pending[1 - side].pop(table.title, None)
+            if partner is None:
+                pending[side][table.title] = table
+            elif side == 0:
+                compare_tables(result, table, partner, thresholds)
+            else:
+                compare_tables(result, partner, table, thresholds)
+    result.unmatched_tables = sorted(pending[0]) + sorted(pending[1])
+    return result
@@ -0,0 +1,98 @@
+from difflib import SequenceMatcher
+from hashlib import sha1
+from itertools import islice
+import mmap
+from pathlib import Path
+import re
+from typing import Callable, Iterable, Iterator, List, Pattern, Union
+
+from my_app.constants import ResultsTreeRoots
+
+# lines that change from run to run (or build to build) without meaning anything changed, each anchored to the line
+# it is about, so a time of day anywhere else in a file (a schedule, the time of a peak) is still compared
+DEFAULT_VOLATILE_PATTERNS = [
+    r'^\s*Program Version,.*YMD=',  # the program version header, carrying the build sha and the run's date stamp
+    r'Elapsed Time=',  # how long the run took, on the completion line
+    r'^[\s*]*(EnergyPlus (Sizing |Run )?|Simulation )Time=',  # run time summaries
+]
+
+
+def file_digest(path: Path, block_size: int = 1 << 20, algorithm: Callable = sha1) -> str:
+    """Hashes a file through an mmap view of it, so the content is never copied into Python objects"""
+    h = algorithm()
+    with path.open('rb') as f:
+        size = path.stat().st_size
+        if size == 0:
+            return h.hexdigest()  # empty files can't be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for start in range(0, size, block_size):
+                    h.update(view[start:start + block_size])
+            finally:
+                view.release()
+    return h.hexdigest()
+
+
+class TextDiffResult:
+
+    def __init__(self):
+        self.identical = False  # byte for byte
+        self.num_diff_lines = 0  # lines changed, added or removed, after dropping volatile lines
+        self.sample: List[str] = list()  # the first few differing lines, prefixed with - or +
+
+    @property
+    def category(self) -> Union[None, str]:
+        return ResultsTreeRoots.TextDiff if self.num_diff_lines else None
+
+
+def _significant_lines(path: Path, ignore: List[Pattern]) -> Iterator[str]:
+    with path.open(encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not any(pattern.search(line) for pattern in ignore):
+                yield line.rstrip('\r\n')
+
+
+def _line_diff(result: TextDiffResult, lines_1: Iterator[str], lines_2: Iterator[str], window: int, max_sample: int):
+    # diff the streams a window at a time; a change at the end of a window might really be lines that were shifted
+    # across the window boundary, so that trailing region is carried into the next window rather than counted (as long
+    # as something before it was consumed on both sides, which guarantees progress)
+    carry_1: List[str] = list()
+    carry_2: List[str] = list()
+    while True:
+        block_1 = carry_1 + list(islice(lines_1, window - len(carry_1)))
+        block_2 = carry_2 + list(islice(lines_2, window - len(carry_2)))
+        if not block_1 and not block_2:
+            return
+        at_end = len(block_1) < window and len(block_2) < window
+        opcodes = SequenceMatcher(None, block_1, block_2, autojunk=False).get_opcodes()
+        carry_1, carry_2 = list(), list()
+        if not at_end and opcodes[-1][0] != 'equal' and opcodes[-1][1] > 0 and opcodes[-1][3] > 0:
+            _, i1, _, j1, _ = opcodes.pop()
+            carry_1, carry_2 = block_1[i1:], block_2[j1:]
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                continue
+            result.num_diff_lines += max(i2 - i1, j2 - j1)
+            for line in block_1[i1:i2]:
+                if len(result.sample) < max_sample:
+                    result.sample.append(f"- {line}")
+            for line in block_2[j1:j2]:
+                if len(result.sample) < max_sample:
+                    result.sample.append(f"+ {line}")
+
+
+def text_diff(path_1: Path, path_2: Path, volatile_patterns: Iterable[str] = tuple(DEFAULT_VOLATILE_PATTERNS),
+              window: int = 2000, max_sample: int = 20) -> TextDiffResult:
+    """Compares two text outputs, cheaply in the usual case where nothing changed.
+
+    Files of equal size are hashed first and a matching hash ends the comparison.  Otherwise the files are diffed
+    line by line, ignoring lines matching any of the volatile patterns, a window of lines at a time so memory stays
+    bounded no matter how big the files are."""
+    result = TextDiffResult()
+    if path_1.stat().st_size == path_2.stat().st_size and file_digest(path_1) == file_digest(path_2):
+        result.identical = True
+        return result
+    ignore = [re.compile(pattern) for pattern in volatile_patterns]
+    _line_diff(result, _significant_lines(path_1, ignore), _significant_lines(path_2, ignore), window, max_sample)
+    return result
@@ -0,0 +1,178 @@
+"""Run tracing: spans and counters, recorded in memory while enabled and written out as a Chrome trace.
+
+Tracing is off by default, and while it is off every call here returns straight away, so the instrumented code can
+stay instrumented.  The trace file loads in chrome://tracing or https://ui.perfetto.dev, and summary() boils the
+same spans down to a table per span name.
+
+Spans come in two kinds:
+
+* span(name) is a context manager for work that starts and ends on one thread, like a GUI handler
+* begin(key, name) and end(key) bracket work that starts and ends in different callbacks, like an IDF's simulation
+  running in a worker process; each gets a lane of its own while it's open, so overlapping ones show side by side
+"""
+import json
+import os
+from pathlib import Path
+from threading import get_ident
+from time import perf_counter
+from typing import Any, Dict, Hashable, List, Tuple
+
+
+class _NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.tracer.record(self.name, self.category, self.start, perf_counter(), get_ident(), self.args)
+        return False
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """The value below which fraction of the (already sorted) values fall, nearest rank"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Tracer:
+
+    # lanes for begin/end spans are numbered from here, well clear of anything that looks like a thread
+    FIRST_LANE = 1000
+
+    def __init__(self):
+        self.enabled = False
+        self._origin = perf_counter()
+        # (name, category, start, end, thread or lane, args), appends are atomic so any thread can record
+        self._spans: List[Tuple[str, str, float, float, int, Dict]] = list()
+        self._counters: List[Tuple[str, float, Dict[str, float]]] = list()
+        self._open: Dict[Hashable, Tuple[str, str, float, int, Dict]] = dict()
+        self._free_lanes: List[int] = list()
+        self._num_lanes = 0
+
+    def enable(self):
+        """Starts a fresh trace"""
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self._origin = perf_counter()
+        self._spans = list()
+        self._counters = list()
+        self._open = dict()
+        self._free_lanes = list()
+        self._num_lanes = 0
+
+    def span(self, name: str, category: str = '', **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def record(self, name: str, category: str, start: float, end: float, thread: int, args: Dict = None):
+        """Records a span that has already happened, from perf_counter times"""
+        if self.enabled:
+            self._spans.append((name, category, start, end, thread, args or {}))
+
+    def begin(self, key: Hashable, name: str, category: str = '', **args):
+        """Opens a span that some later call to end(key) closes, these are not thread safe"""
+        if not self.enabled:
+            return
+        if self._free_lanes:
+            lane = self._free_lanes.pop()
+        else:
+            lane = self.FIRST_LANE + self._num_lanes
+            self._num_lanes += 1
+        self._open[key] = (name, category, perf_counter(), lane, args)
+
+    def end(self, key: Hashable, **args):
+        if not self.enabled or key not in self._open:
+            return
+        name, category, start, lane, begin_args = self._open.pop(key)
+        self._free_lanes.append(lane)
+        self._free_lanes.sort(reverse=True)  # reuse the lowest lane, keeping the trace compact
+        self.record(name, category, start, perf_counter(), lane, dict(begin_args, **args))
+
+    def counter(self, name: str, **values: float):
+        if self.enabled:
+            self._counters.append((name, perf_counter(), values))
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The trace in the Chrome trace event format, times in microseconds from when tracing was enabled"""
+        pid = os.getpid()
+
+        def microseconds(t: float) -> float:
+            return round((t - self._origin) * 1e6, 3)
+
+        events = [
+            {
+                'name': name, 'cat': category, 'ph': 'X', 'ts': microseconds(start),
+                'dur': round((end - start) * 1e6, 3), 'pid': pid, 'tid': thread, 'args': args
+            }
+            for name, category, start, end, thread, args in list(self._spans)
+        ]
+        events.extend(
+            {'name': name, 'ph': 'C', 'ts': microseconds(t), 'pid': pid, 'args': values}
+            for name, t, values in list(self._counters)
+        )
+        events.extend(
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': self.FIRST_LANE + i, 'args': {'name': f"Lane {i}"}}
+            for i in range(self._num_lanes)
+        )
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path: Path):
+        with path.open('w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, total, mean, p50, p95 and max seconds per span name"""
+        durations: Dict[str, List[float]] = dict()
+        for name, _, start, end, _, _ in list(self._spans):
+            durations.setdefault(name, list()).append(end - start)
+        summary = dict()
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {
+                'count': len(values), 'total': sum(values), 'mean': sum(values) / len(values),
+                'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95), 'max': values[-1]
+            }
+        return summary
+
+    @staticmethod
+    def format_summary(summary: Dict[str, Dict[str, float]]) -> List[str]:
+        """The summary as lines of a table, the spans that took the most time in total first"""
+        lines = [f"{'Span':<28} {'Count':>7} {'Total s':>9} {'Mean s':>8} {'p50 s':>8} {'p95 s':>8} {'Max s':>8}"]
+        for name, s in sorted(summary.items(), key=lambda item: item[1]['total'], reverse=True):
+            lines.append(
+                f"{name[:28]:<28} {s['count']:>7} {s['total']:>9.3f} {s['mean']:>8.4f} {s['p50']:>8.4f} "
+                f"{s['p95']:>8.4f} {s['max']:>8.4f}"
+            )
+        return lines
+
+
+# the one tracer everything records to
+tracer = Tracer()
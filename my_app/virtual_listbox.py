@@ -0,0 +1,93 @@
+from tkinter import Frame, Listbox, Scrollbar, BOTH, END, LEFT, Y
+from tkinter.font import Font
+from typing import Callable, Sequence, Union
+
+
+class VirtualListbox(Frame):
+    """A scrolled listbox that only holds the rows currently in view.
+
+    The rows live in a Python sequence (anything supporting len and slicing); the Tk Listbox is refilled with just the
+    visible window whenever the view moves or refresh is called, so the Tk work per update is proportional to the
+    window height rather than to the number of rows."""
+
+    def __init__(
+            self, parent, rows: Sequence[str] = (), on_double_click: Union[None, Callable] = None,
+            follow_tail: bool = False, **kwargs
+    ):
+        Frame.__init__(self, parent)
+        self.rows = rows
+        self.top = 0  # index of the row shown at the top of the listbox
+        self.follow_tail = follow_tail  # if the last row is in view, keep it in view as rows are appended
+        self._showing_tail = True
+        self.selected: Union[None, int] = None  # index into rows, not into the listbox
+        self.listbox = Listbox(self, exportselection=False, **kwargs)
+        self.scrollbar = Scrollbar(self, command=self.yview)
+        self.listbox.pack(fill=BOTH, side=LEFT, expand=True)
+        self.scrollbar.pack(fill=Y, side=LEFT)
+        self._line_height = max(1, Font(font=self.listbox['font']).metrics('linespace') + 1)
+        self._visible_rows = int(self.listbox['height'])
+        self.listbox.bind('<Configure>', self._on_configure)
+        self.listbox.bind('<<ListboxSelect>>', self._on_select)
+        self.listbox.bind('<MouseWheel>', lambda e: self.yview('scroll', -1 if e.delta > 0 else 1, 'units'))
+        self.listbox.bind('<Button-4>', lambda _: self.yview('scroll', -1, 'units'))
+        self.listbox.bind('<Button-5>', lambda _: self.yview('scroll', 1, 'units'))
+        # the listbox would scroll itself when dragging a selection past its edges, but it only has the window
+        self.listbox.bind('<B1-Leave>', lambda _: 'break')
+        if on_double_click:
+            self.listbox.bind('<Double-1>', on_double_click)
+
+    def show(self, rows: Sequence[str]):
+        self.rows = rows
+        self.top = 0
+        self.selected = None
+        self.refresh()
+
+    def size(self) -> int:
+        return len(self.rows)
+
+    def refresh(self):
+        """Redraws the visible window, call this after the underlying rows change"""
+        num_rows = len(self.rows)
+        if self.follow_tail and self._showing_tail:
+            self.top = num_rows
+        self.top = max(0, min(self.top, num_rows - self._visible_rows))
+        if self.selected is not None and self.selected >= num_rows:
+            self.selected = None
+        bottom = self.top + self._visible_rows
+        self._showing_tail = bottom >= num_rows
+        self.listbox.delete(0, END)
+        window = self.rows[self.top:bottom]
+        if window:
+            self.listbox.insert(END, *window)
+        if self.selected is not None and self.top <= self.selected < bottom:
+            self.listbox.selection_set(self.selected - self.top)
+        if num_rows:
+            self.scrollbar.set(self.top / num_rows, min(1.0, bottom / num_rows))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """Scrollbar (and mouse wheel) command, using the same protocol as Listbox.yview"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.rows))
+        elif args[0] == 'scroll':
+            step = self._visible_rows if args[2] == 'pages' else 1
+            self.top += int(args[1]) * step
+        self._showing_tail = False  # the user moved the view, refresh works out whether it is on the tail again
+        self.refresh()
+
+    def curselection(self) -> Union[None, int]:
+        return self.selected
+
+    def _on_select(self, _):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.top + selection[0]
+
+    def _on_configure(self, event):
+        visible_rows = max(1, event.height // self._line_height)
+        if visible_rows != self._visible_rows:
+            self._visible_rows = visible_rows
+            self.refresh()
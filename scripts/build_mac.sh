@@ -1,5 +1,7 @@
 #!/bin/bash -e
 
-/Users/travis/Library/Python/3.7/bin/pyinstaller --onefile main.py
+# pass --onedir for a folder bundle, which starts faster than the single file that unpacks itself on every launch
+BUNDLE=${1:---onefile}
+/Users/travis/Library/Python/3.7/bin/pyinstaller "$BUNDLE" main.py
 mkdir deploy
 tar -zcvf deploy/TkInterTest-Mac.tar.gz -C dist main
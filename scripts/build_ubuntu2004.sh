@@ -1,5 +1,7 @@
 #!/bin/bash -e
 
-pyinstaller --onefile main.py
+# pass --onedir for a folder bundle, which starts faster than the single file that unpacks itself on every launch
+BUNDLE=${1:---onefile}
+pyinstaller "$BUNDLE" main.py
 mkdir deploy
 tar -zcvf deploy/TkInterTest-Ubuntu2004.tar.gz -C dist main
@@ -1,5 +1,7 @@
 #!/bin/bash -e
 
-pyinstaller --onefile main.py
+# pass --onedir for a folder bundle, which starts faster than the single file that unpacks itself on every launch
+BUNDLE=${1:---onefile}
+pyinstaller "$BUNDLE" main.py
 mkdir deploy
 /C/Program\ Files/7-zip/7z.exe a deploy/TkInterTest-Win.zip ./dist/*
@@ -0,0 +1,48 @@
+# benchmark for the math diff engine, run it with: python -m test.benchmarks.bench_math_diff [num_columns]
+# it writes a pair of synthetic time-series outputs for an hourly (8760 rows) and a one-minute (525600 rows) annual run
+# and reports how many columns (and values) per second the engine gets through
+
+from pathlib import Path
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+
+from my_app.math_diff import math_diff
+
+
+def write_synthetic_csv(path: Path, num_rows: int, num_columns: int, seed: int):
+    rng = np.random.default_rng(seed)
+    header = 'Date/Time,' + ','.join(f"Variable {c} [W](TimeStep)" for c in range(num_columns))
+    chunk = 100000
+    with path.open('w') as f:
+        f.write(header + '\n')
+        for start in range(0, num_rows, chunk):
+            rows = min(chunk, num_rows - start)
+            values = rng.random((rows, num_columns)) * 1000.0
+            stamps = np.arange(start, start + rows).astype(str).reshape(-1, 1)
+            np.savetxt(f, np.hstack([stamps, values.round(4).astype(str)]), delimiter=',', fmt='%s')
+
+
+def bench(num_rows: int, num_columns: int):
+    with TemporaryDirectory() as temp_dir:
+        csv_1 = Path(temp_dir) / 'base.csv'
+        csv_2 = Path(temp_dir) / 'mod.csv'
+        write_synthetic_csv(csv_1, num_rows, num_columns, 1)
+        write_synthetic_csv(csv_2, num_rows, num_columns, 2)
+        size_mb = csv_1.stat().st_size / 1e6
+        start = perf_counter()
+        result = math_diff(csv_1, csv_2)
+        elapsed = perf_counter() - start
+    print(
+        f"{num_rows:>7} x {num_columns:<4} ({size_mb:7.1f} MB each): {elapsed:7.3f} s, "
+        f"{num_columns / elapsed:9.1f} columns/s, {num_rows * num_columns / elapsed / 1e6:6.2f} M values/s "
+        f"[{result.category}]"
+    )
+
+
+if __name__ == '__main__':
+    columns = int(argv[1]) if len(argv) > 1 else 20
+    for rows in (8760, 525600):
+        bench(rows, columns)
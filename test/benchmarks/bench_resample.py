@@ -0,0 +1,71 @@
+# benchmark for comparing at a coarser reporting frequency
+# run it with: python -m test.benchmarks.bench_resample [num_columns]
+# it writes a pair of synthetic annual outputs at a 15 minute timestep (35040 rows) with real time stamps, then times
+# the math diff at TimeStep (no aggregation), Hourly and Monthly, and again at each with different thresholds, which
+# only has to redo the comparison since the aggregates are cached
+
+from pathlib import Path
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+
+from my_app.constants import ReportingFrequency
+from my_app.diff_thresholds import DiffThresholds
+from my_app.math_diff import math_diff
+
+DAYS_PER_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+def time_stamps(timesteps_per_hour: int) -> np.ndarray:
+    stamps = list()
+    for month, days in enumerate(DAYS_PER_MONTH, 1):
+        for day in range(1, days + 1):
+            for hour in range(24):
+                for step in range(1, timesteps_per_hour + 1):
+                    minutes = 60 * step // timesteps_per_hour
+                    if minutes == 60:
+                        stamps.append(f" {month:02d}/{day:02d}  {hour + 1:02d}:00:00")
+                    else:
+                        stamps.append(f" {month:02d}/{day:02d}  {hour:02d}:{minutes:02d}:00")
+    return np.array(stamps).reshape(-1, 1)
+
+
+def write_synthetic_csv(path: Path, stamps: np.ndarray, num_columns: int, seed: int):
+    rng = np.random.default_rng(seed)
+    units = ['C', 'J', 'W']  # averaged, summed and averaged again
+    header = 'Date/Time,' + ','.join(f"Variable {c} [{units[c % 3]}](TimeStep)" for c in range(num_columns))
+    chunk = 100000
+    with path.open('w') as f:
+        f.write(header + '\n')
+        for start in range(0, len(stamps), chunk):
+            rows = stamps[start:start + chunk]
+            values = rng.random((len(rows), num_columns)) * 1000.0
+            np.savetxt(f, np.hstack([rows, values.round(4).astype(str)]), delimiter=',', fmt='%s')
+
+
+def bench(num_columns: int):
+    stamps = time_stamps(4)
+    with TemporaryDirectory() as temp_dir:
+        csv_1 = Path(temp_dir) / 'base.csv'
+        csv_2 = Path(temp_dir) / 'mod.csv'
+        write_synthetic_csv(csv_1, stamps, num_columns, 1)
+        write_synthetic_csv(csv_2, stamps, num_columns, 2)
+        size_mb = csv_1.stat().st_size / 1e6
+        print(f"{len(stamps)} x {num_columns} ({size_mb:.1f} MB each)")
+        for frequency in (ReportingFrequency.TIMESTEP, ReportingFrequency.HOURLY, ReportingFrequency.MONTHLY):
+            start = perf_counter()
+            result = math_diff(csv_1, csv_2, frequency=frequency)
+            first = perf_counter() - start
+            start = perf_counter()
+            math_diff(csv_1, csv_2, DiffThresholds(big_abs=1.0, big_rel=0.01), frequency=frequency)
+            again = perf_counter() - start
+            print(
+                f"{frequency:>9}: {first:7.3f} s, {result.num_rows:>6} rows compared, "
+                f"{again:7.3f} s with other thresholds [{result.category}]"
+            )
+
+
+if __name__ == '__main__':
+    bench(int(argv[1]) if len(argv) > 1 else 20)
@@ -0,0 +1,84 @@
+# startup benchmark, run it with: python -m test.benchmarks.bench_startup [--frozen dist/main] [--repeat N]
+# it launches the GUI the way main.py does and times how long until its window is up (time to first frame), through a
+# subclass of the window that prints a marker once Tk has drawn it.  A frozen build can't be given that subclass, so
+# for one (dist/main for the one file build, dist/main/main for the folder, onedir, build) what's timed is launching
+# it to print its command line help, which is the unpacking and interpreter start up that differ between the two.
+# The time to import the GUI module is measured as well, which needs no display.
+
+from argparse import ArgumentParser
+import os
+from pathlib import Path
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Union
+
+from my_app.gui import MyApp
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+FIRST_FRAME_MARKER = 'first frame'
+
+
+class FirstFrameProbe(MyApp):
+    """The GUI, closing itself as soon as its window is up and printing the marker when it is"""
+
+    def run(self):
+        # idle callbacks run in the order they were queued, so this one comes after Tk's first redraw
+        self.root.after_idle(self.report_first_frame)
+        super().run()
+
+    def report_first_frame(self):
+        self.root.update_idletasks()
+        print(FIRST_FRAME_MARKER, flush=True)
+        self.log_buffer.close()
+        self.root.destroy()
+
+
+def time_to_marker(command: List[str], marker: Union[None, str], data_dir: str) -> float:
+    """Seconds from launching command until it prints marker, or until it exits if there is no marker"""
+    environment = dict(os.environ, EPLUS_REGRESSION_TOOL_DATA=data_dir)
+    start = perf_counter()
+    process = subprocess.Popen(command, cwd=str(REPO_ROOT), env=environment, stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if marker and line.strip() == marker:
+            elapsed = perf_counter() - start
+            break
+    else:
+        elapsed = perf_counter() - start
+    process.wait(30)
+    if marker and process.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with code {process.returncode}")
+    return elapsed
+
+
+def bench(label: str, command: List[str], marker: Union[None, str], repeat: int):
+    with TemporaryDirectory() as data_dir:
+        # the first launch also warms up the OS file cache, the best of the rest is what gets reported
+        times = [time_to_marker(command, marker, data_dir) for _ in range(repeat + 1)]
+    print(f"{label:<34} first {times[0]:7.3f} s, best {min(times[1:]):7.3f} s")
+
+
+def main(args: List[str]) -> int:
+    parser = ArgumentParser(description="Time the GUI's start up, from source and frozen builds")
+    parser.add_argument('--frozen', type=Path, action='append', default=[],
+                        help="A frozen build's executable to time as well (repeatable)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--probe', action='store_true', help="Run the GUI once to its first frame, and exit")
+    options = parser.parse_args(args)
+    if options.probe:
+        FirstFrameProbe().run()
+        return 0
+    bench("import my_app.gui", [sys.executable, '-c', 'import my_app.gui'], None, options.repeat)
+    for executable in options.frozen:
+        bench(f"launch, {executable}", [str(executable.resolve()), '--help'], None, options.repeat)
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        print("No display, skipping time to first frame")
+        return 0
+    probe = [sys.executable, '-m', 'test.benchmarks.bench_startup', '--probe']
+    bench("first frame, source", probe, FIRST_FRAME_MARKER, options.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,236 @@
+# the whole tool's benchmark suite, headless, run it with: python -m test.benchmarks.bench_suite [options]
+# it measures IDF discovery and listing as the testfiles tree grows, suite throughput against the number of threads
+# with fake simulations, the rate events get through the GUI dispatcher to pubsub, results tree population, and the
+# IDF filter's index build and keystrokes
+#
+#   --save baseline.json       keep this run's numbers as a baseline
+#   --compare baseline.json    fail (exit code 1) if anything got worse than the baseline by more than --threshold
+#   --quick                    smaller sizes, for a fast sanity check rather than numbers to keep
+
+from argparse import ArgumentParser
+import json
+from pathlib import Path
+import platform
+import sys
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter
+from typing import Dict, List
+
+from pubsub import pub
+
+from my_app.background_operation import BackgroundOperation, RunConfiguration
+from my_app.constants import IdfFilterModes
+from my_app.gui_dispatch import GuiDispatcher
+from my_app.idf_index import CommonIdfTracker, IdfDiscoveryIndex, dummy_get_idf_dir, dummy_get_idfs_in_dir
+from my_app.idf_search import IdfSearchIndex
+from my_app.idf_selection import IdfSelectionModel
+from my_app.results_model import ResultsModel
+from my_app.results_store import ResultRow, ResultsStore
+from my_app.results_tree import LazyResultsTree
+from test.benchmarks.synthetic import FakeRoot, FakeTree, fake_worker_for, idf_results, make_testfiles_tree
+
+# every metric is a time in seconds, lower is better, or a rate per second, higher is better
+SECONDS, PER_SECOND = 's', '/s'
+
+
+def metric(value: float, unit: str) -> Dict:
+    return {'value': value, 'unit': unit}
+
+
+def timed(func, repeat: int = 3) -> float:
+    """Best of repeat runs, the least disturbed by whatever else the machine was doing"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def bench_discovery(sizes: List[int]) -> Dict[str, Dict]:
+    metrics = dict()
+    for num_idfs in sizes:
+        with TemporaryDirectory() as temp_dir:
+            build_1, build_2 = make_testfiles_tree(Path(temp_dir), num_idfs)
+            idf_dir = dummy_get_idf_dir(build_1)
+            index_dir = Path(temp_dir) / 'index'
+            index_dir.mkdir()
+            metrics[f"discovery.rglob.{num_idfs}"] = metric(timed(lambda: dummy_get_idfs_in_dir(idf_dir)), SECONDS)
+            IdfDiscoveryIndex(idf_dir, index_dir).scan()  # after this first scan, it only stats the directories
+            metrics[f"discovery.indexed.{num_idfs}"] = metric(
+                timed(lambda: IdfDiscoveryIndex(idf_dir, index_dir).scan()), SECONDS
+            )
+
+            def build_idf_listing():
+                # what the IDF Selection tab does for build_idf_listing, without the widgets
+                selection = IdfSelectionModel()
+                tracker = CommonIdfTracker()
+                for side, build in enumerate((build_1, build_2)):
+                    IdfDiscoveryIndex(dummy_get_idf_dir(build), index_dir).scan(
+                        lambda found: selection.add_available(str(idf) for idf in tracker.add(side, found))
+                    )
+                assert len(selection.available) == num_idfs
+
+            metrics[f"listing.{num_idfs}"] = metric(timed(build_idf_listing), SECONDS)
+    return metrics
+
+
+def bench_throughput(thread_counts: List[int], num_idfs: int, duration: float, output_bytes: int) -> Dict[str, Dict]:
+    metrics = dict()
+    for num_threads in thread_counts:
+        with TemporaryDirectory() as temp_dir:
+            config = RunConfiguration(output_dir=Path(temp_dir))
+            b = BackgroundOperation(num_threads, [f"model_{i}.idf" for i in range(num_idfs)], config)
+            b.worker = fake_worker_for(duration, output_bytes)
+            finished = dict()
+            b.get_ready_to_go(lambda *_: None, finished.update)
+            start = perf_counter()
+            b.run()
+            elapsed = perf_counter() - start
+            assert len(finished['idf_results']) == num_idfs
+        metrics[f"throughput.threads_{num_threads}"] = metric(num_idfs / elapsed, PER_SECOND)
+    return metrics
+
+
+def bench_events(num_events: int) -> Dict[str, Dict]:
+    """Status events from a background thread, through the dispatcher, to a pubsub listener on this thread"""
+    received = [0]
+
+    def listener(status, objects_completed, percent_complete):
+        received[0] += len(objects_completed)
+
+    pub.subscribe(listener, 'bench_status')
+    dispatcher = GuiDispatcher(FakeRoot(), lambda message_type, kwargs: pub.sendMessage(message_type, **kwargs),
+                               status_message_type='bench_status')
+
+    def post_all():
+        for i in range(num_events):
+            dispatcher.post_status(f"{i}/{num_events}", f"Run model_{i}.idf Completed Successfully", 0.0)
+
+    start = perf_counter()
+    poster = Thread(target=post_all)
+    poster.start()
+    while poster.is_alive() or received[0] < num_events:
+        dispatcher.drain()
+    elapsed = perf_counter() - start
+    poster.join()
+    pub.unsubscribe(listener, 'bench_status')
+    return {'events.dispatch_to_pubsub': metric(num_events / elapsed, PER_SECOND)}
+
+
+def bench_results_tree(num_idfs: int) -> Dict[str, Dict]:
+    metrics = dict()
+    results = idf_results(num_idfs)
+    with TemporaryDirectory() as temp_dir:
+        store = ResultsStore(Path(temp_dir) / 'results.sqlite3', batch_size=1000)
+        model = ResultsModel(store)
+        tree = FakeTree()
+        view = LazyResultsTree(tree, model)
+        run_id = store.start_run({})
+        model.start_live_run(run_id)
+        view.reset()
+        # a live run streaming in, as the GUI does for each batch of results
+        start = perf_counter()
+        for seq, result in enumerate(results, 1):
+            store.add_idf_result(run_id, seq, result)
+            model.add_live_result(result['categories'])
+            view.add_result(ResultRow.from_result(result, seq), result['categories'])
+        store.flush()
+        metrics[f"results_tree.live.{num_idfs}"] = metric(perf_counter() - start, SECONDS)
+        store.finish_run(run_id, 'finished')
+
+        def open_finished_run():
+            # showing a finished run, and opening every category to its first page
+            model.show_run(run_id)
+            view.reset()
+            for root_item in view.root_items.values():
+                tree.focused = root_item
+                view._on_open(None)
+
+        metrics[f"results_tree.open.{num_idfs}"] = metric(timed(open_finished_run), SECONDS)
+        store.close()
+    return metrics
+
+
+def bench_filter(num_idfs: int) -> Dict[str, Dict]:
+    """Building the IDF filter's search index, and the slowest keystroke of typing a query in each mode, each
+    keystroke's time being the best of three typings"""
+    words = ['Zone', 'Air', 'Cooled', 'HVAC', 'Template', 'Plant', 'Loop', 'Coil', 'Fan', 'Chiller', 'Boiler', 'Pump']
+    paths = sorted(
+        f"dir_{i % 500}/sub_{i % 21}/{i % 9 + 1}{words[i % 12]}{words[i // 12 % 12]}{words[i // 144 % 12]}_{i}.idf"
+        for i in range(num_idfs)
+    )
+    metrics = {f"filter.build_index.{num_idfs}": metric(timed(lambda: IdfSearchIndex(paths)), SECONDS)}
+    index = IdfSearchIndex(paths)
+    for mode, query in [
+        (IdfFilterModes.CONTAINS, 'chiller_4'), (IdfFilterModes.WORD_STARTS, 'chill boil'),
+        (IdfFilterModes.GLOB, '*chiller*boiler*.idf'),
+    ]:
+        keystrokes = [float('inf')] * len(query)
+        for _ in range(3):
+            index.search('', mode)  # a fresh start, nothing left over from the last time the query was typed
+            for length in range(1, len(query) + 1):
+                start = perf_counter()
+                index.search(query[:length], mode)
+                keystrokes[length - 1] = min(keystrokes[length - 1], perf_counter() - start)
+        metrics[f"filter.keystroke.{mode.split()[0].lower()}.{num_idfs}"] = metric(max(keystrokes), SECONDS)
+    return metrics
+
+
+def run_all(quick: bool) -> Dict[str, Dict]:
+    metrics = dict()
+    metrics.update(bench_discovery([100, 1000] if quick else [100, 1000, 10000]))
+    metrics.update(bench_throughput([1, 2] if quick else [1, 2, 4, 8], 8 if quick else 64, 0.02, 10000))
+    metrics.update(bench_events(10000 if quick else 100000))
+    metrics.update(bench_results_tree(1000 if quick else 20000))
+    metrics.update(bench_filter(10000 if quick else 100000))
+    return metrics
+
+
+def regressions(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float) -> List[str]:
+    """Describes every metric in both that got worse by more than threshold, as a fraction of the baseline"""
+    found = list()
+    for name, old in sorted(baseline.items()):
+        new = current.get(name)
+        if not new or not old['value']:
+            continue
+        if old['unit'] == PER_SECOND:
+            change = (old['value'] - new['value']) / old['value']
+        else:
+            change = (new['value'] - old['value']) / old['value']
+        if change > threshold:
+            found.append(f"{name}: {old['value']:.4g}{old['unit']} -> {new['value']:.4g}{new['unit']} "
+                         f"({100.0 * change:.0f}% worse)")
+    return found
+
+
+def main(args: List[str]) -> int:
+    parser = ArgumentParser(description="Benchmark the regression tool with synthetic testfiles and fake simulations")
+    parser.add_argument('--quick', action='store_true', help="Smaller sizes, for a quick check")
+    parser.add_argument('--save', type=Path, metavar='JSON', help="Write the results as a baseline")
+    parser.add_argument('--compare', type=Path, metavar='JSON', help="Compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Fraction worse than the baseline that counts as a regression (default: 0.25)")
+    options = parser.parse_args(args)
+    metrics = run_all(options.quick)
+    for name, m in sorted(metrics.items()):
+        print(f"{name:<32} {m['value']:12.4g} {m['unit']}")
+    if options.save:
+        options.save.write_text(json.dumps({
+            'python': platform.python_version(), 'machine': platform.machine(), 'quick': options.quick,
+            'metrics': metrics
+        }, indent=2))
+    if options.compare:
+        baseline = json.loads(options.compare.read_text())
+        worse = regressions(baseline['metrics'], metrics, options.threshold)
+        for line in worse:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if worse:
+            return 1
+        print(f"No regressions beyond {100.0 * options.threshold:.0f}% of {options.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv[1:]))
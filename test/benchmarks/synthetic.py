@@ -0,0 +1,108 @@
+# synthetic inputs for the benchmarks: testfiles trees of any size, and fake simulation workers that take a set time
+# and write a set amount of output, so the tool's own overhead can be measured without EnergyPlus
+
+from itertools import count
+from functools import partial
+from pathlib import Path
+from time import sleep
+from typing import Callable, Dict, List, Tuple
+
+from my_app.background_operation import RunConfiguration, SIMULATION_STAGES
+from my_app.constants import PipelineStages, ResultsTreeRoots
+
+
+def make_testfiles_tree(root: Path, num_idfs: int, idfs_per_dir: int = 50, dirs_per_dir: int = 5) -> Tuple[Path, Path]:
+    """Lays out root/build_1, root/build_2 and a shared root/testfiles holding num_idfs small IDFs, spread over
+    nested folders of idfs_per_dir each, returning the two build folders"""
+    build_dirs = root / 'build_1', root / 'build_2'
+    for build_dir in build_dirs:
+        build_dir.mkdir(parents=True, exist_ok=True)
+    testfiles = root / 'testfiles'
+    folders = [testfiles]
+    next_folder = 0
+    for i in range(num_idfs):
+        if i and i % idfs_per_dir == 0:
+            # breadth first, each folder gets dirs_per_dir subfolders before they get any of their own
+            parent = folders[next_folder // dirs_per_dir]
+            folders.append(parent / f"dir_{next_folder}")
+            next_folder += 1
+        folder = folders[-1]
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"model_{i}.idf").write_text(f"Version,9.5;\nBuilding,Model {i};\n")
+    return build_dirs
+
+
+def fake_worker(task: Tuple[str, str], config: RunConfiguration, duration: float = 0.0, output_bytes: int = 0) -> Dict:
+    """Stands in for run_task: simulations sleep for duration and write output_bytes of output, compares find nothing"""
+    stage, idf = task
+    if stage == PipelineStages.Compare:
+        return {'categories': [ResultsTreeRoots.AllCompared], 'diffs': {}, 'magnitudes': {}, 'diff_file': ''}
+    sleep(duration)
+    if config.output_dir and output_bytes:
+        out_dir = config.idf_output_dirs(idf)[SIMULATION_STAGES.index(stage)]
+        out_dir.mkdir(parents=True, exist_ok=True)
+        (out_dir / 'eplusout.err').write_bytes(b'x' * output_bytes)
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': duration}
+
+
+def fake_worker_for(duration: float, output_bytes: int = 0) -> Callable[[Tuple[str, str], RunConfiguration], Dict]:
+    # a partial of a module level function still pickles, so it can go to the worker processes
+    return partial(fake_worker, duration=duration, output_bytes=output_bytes)
+
+
+def idf_results(num_idfs: int) -> List[Dict]:
+    """Per-IDF results as the BackgroundOperation produces them, with a realistic mix of categories"""
+    results = list()
+    for i in range(num_idfs):
+        categories = [ResultsTreeRoots.AllFiles, ResultsTreeRoots.Case1Success, ResultsTreeRoots.Case2Success]
+        if i % 10:
+            categories.append(ResultsTreeRoots.AllCompared)
+        if i % 7 == 0:
+            categories.append(ResultsTreeRoots.SmallMathDiff)
+        if i % 13 == 0:
+            categories.append(ResultsTreeRoots.TextDiff)
+        results.append({
+            'idf': f"dir_{i // 50}/model_{i}.idf", 'categories': categories, 'runtimes': [1.0, 1.0],
+            'diffs': {'eplusout.err': ResultsTreeRoots.TextDiff} if i % 13 == 0 else {}
+        })
+    return results
+
+
+class FakeRoot:
+    """Stands in for Tk in the GuiDispatcher, the benchmark runs the main loop itself"""
+
+    def after(self, _ms, _func):
+        pass
+
+
+class FakeTree:
+    """Just enough of a ttk.Treeview to drive the results tree without a display"""
+
+    def __init__(self):
+        self._ids = count()
+        self.children = {'': []}
+        self.focused = ''
+
+    def bind(self, _sequence, _func):
+        pass
+
+    def insert(self, parent, index, text='', values=()):
+        item = f"I{next(self._ids)}"
+        self.children[parent].append(item)
+        self.children[item] = []
+        return item
+
+    def delete(self, *items):
+        for item in items:
+            for children in self.children.values():
+                if item in children:
+                    children.remove(item)
+
+    def get_children(self, item=''):
+        return list(self.children[item])
+
+    def item(self, item, text):
+        pass
+
+    def focus(self):
+        return self.focused
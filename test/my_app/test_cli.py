@@ -0,0 +1,77 @@
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.cli import build_parser, main, select_idfs
+from my_app.constants import ResultsTreeRoots
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+class TestCliStartup(TestCase):
+
+    def test_import_is_fast_and_tk_free(self):
+        # run in a fresh interpreter so nothing the test runner already imported is counted
+        code = (
+            "import sys, time; start = time.perf_counter(); import my_app.cli; "
+            "elapsed = time.perf_counter() - start; "
+            "print(elapsed, any(m.split('.')[0] in ('tkinter', '_tkinter', 'pubsub', 'numpy') for m in sys.modules))"
+        )
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=str(REPO_ROOT)).decode().split()
+        self.assertEqual('False', output[1])
+        self.assertLess(float(output[0]), 0.25)
+
+
+class TestCli(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+        self._old_data_dir = os.environ.get('EPLUS_REGRESSION_TOOL_DATA')
+        os.environ['EPLUS_REGRESSION_TOOL_DATA'] = str(self.root / 'data')
+        for rel in ['a.idf', 'b.idf', 'sub/c.idf']:
+            (self.root / 'testfiles' / rel).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / 'testfiles' / rel).write_text('')
+        (self.root / 'build').mkdir()
+
+    def tearDown(self):
+        if self._old_data_dir is None:
+            del os.environ['EPLUS_REGRESSION_TOOL_DATA']
+        else:
+            os.environ['EPLUS_REGRESSION_TOOL_DATA'] = self._old_data_dir
+        self._temp_dir.cleanup()
+
+    def test_selection(self):
+        available = ['a.idf', 'b.idf', 'sub/c.idf']
+        self.assertEqual(['sub/c.idf'], select_idfs(available, ['sub/*'], None, None))
+        idf_list = self.root / 'list.txt'
+        idf_list.write_text("b.idf\nnot_there.idf\n\n")
+        self.assertEqual(['b.idf'], select_idfs(available, None, idf_list, None))
+        self.assertEqual(2, len(select_idfs(available, None, None, 2)))
+        self.assertEqual(available, select_idfs(available, None, None, None))
+
+    def test_run_writes_json_results(self):
+        build = str(self.root / 'build')
+        results = self.root / 'results.json'
+        self.assertEqual(0, main([build, build, '--glob', 'sub/*', '-q', '-o', str(results)]))
+        data = json.loads(results.read_text())
+        self.assertTrue(data['completed'])
+        self.assertEqual(['sub/c.idf'], [r['idf'] for r in data['idf_results']])
+        self.assertEqual(1, data['summary'][ResultsTreeRoots.AllFiles])
+        self.assertEqual(1, data['run_id'])  # the first run stored in this data folder
+
+    def test_auto_threads(self):
+        parser = build_parser()
+        self.assertEqual('auto', parser.parse_args(['a', 'b', '-j', 'auto']).threads)
+        self.assertEqual(3, parser.parse_args(['a', 'b', '-j', '3']).threads)
+        build = str(self.root / 'build')
+        results = self.root / 'results.json'
+        self.assertEqual(0, main([build, build, '--glob', 'sub/*', '-q', '-j', 'auto', '-o', str(results)]))
+        self.assertTrue(json.loads(results.read_text())['completed'])
+
+    def test_bad_build_dir(self):
+        self.assertEqual(2, main([str(self.root / 'nope'), str(self.root / 'build'), '-q']))
@@ -0,0 +1,29 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.comparison import compare_outputs
+from my_app.constants import ResultsTreeRoots
+
+
+class TestCompareOutputs(TestCase):
+
+    def test_categories_from_each_stage(self):
+        with TemporaryDirectory() as temp_dir:
+            out_1 = Path(temp_dir) / '1'
+            out_2 = Path(temp_dir) / '2'
+            for out, value, warning in [(out_1, '1.0', 'A'), (out_2, '2.0', 'B')]:
+                out.mkdir()
+                (out / 'eplusout.csv').write_text(f"Date/Time,X [C](Hourly)\nt1,{value}\n")
+                (out / 'eplusout.err').write_text(f"** Warning ** {warning}\n")
+                (out / 'eplusout.eio').write_text("same\n")
+            result = compare_outputs(out_1, out_2)
+        self.assertEqual(
+            [ResultsTreeRoots.AllCompared, ResultsTreeRoots.BigMathDiff, ResultsTreeRoots.TextDiff],
+            result['categories']
+        )
+        self.assertEqual({'eplusout.csv': ResultsTreeRoots.BigMathDiff, 'eplusout.err': ResultsTreeRoots.TextDiff},
+                         result['diffs'])
+        self.assertEqual('eplusout.csv, eplusout.err', result['diff_file'])
+        self.assertAlmostEqual(1.0, result['magnitudes']['eplusout.csv']['max_abs_diff'])
+        self.assertEqual(1, result['magnitudes']['eplusout.err']['num_diffs'])
@@ -0,0 +1,123 @@
+import os
+from time import perf_counter, sleep
+from unittest import TestCase
+
+from my_app.concurrency import AdaptiveConcurrency, read_load_average, read_rss
+from my_app.run_engine import RunEngine
+
+GB = 1024 ** 3
+
+
+def pid_worker(job):
+    sleep(0.1)
+    return os.getpid()
+
+
+class TestAdaptiveConcurrency(TestCase):
+
+    def controller(self, load, available, **kwargs):
+        return AdaptiveConcurrency(
+            min_workers=1, max_workers=4, memory_headroom=2 * GB, sample_interval=0.0,
+            load_average=lambda: load[0], available_memory=lambda: available[0], rss=lambda _pid: GB, **kwargs
+        )
+
+    def test_grows_while_saturated_and_shrinks_under_load(self):
+        load = [0.2]
+        available = [16 * GB]
+        logged = []
+        c = self.controller(load, available, log=logged.append)
+        c.update([1])
+        self.assertEqual(2, c.limit)
+        # not using what it has, so no more
+        c.update([1])
+        self.assertEqual(2, c.limit)
+        c.update([1, 2])
+        c.update([1, 2, 3])
+        c.update([1, 2, 3, 4])
+        self.assertEqual(4, c.limit)  # max_workers
+        load[0] = 1.5
+        c.update([1, 2, 3, 4])
+        self.assertEqual(3, c.limit)
+        self.assertEqual(4, len(logged))
+        self.assertTrue(logged[-1].startswith("Down to 3 workers: load 1.50/CPU, 16384 MB available"))
+        self.assertEqual(logged, c.decisions)
+
+    def test_holds_back_when_memory_runs_low(self):
+        load = [0.2]
+        available = [3.5 * GB]
+        c = self.controller(load, available)
+        c.update([1])
+        self.assertEqual(2, c.limit)
+        # another worker the size of the running ones would leave less than the headroom
+        available[0] = 2.5 * GB
+        c.update([1, 2])
+        self.assertEqual(2, c.limit)
+        available[0] = 1 * GB
+        c.update([1, 2])
+        self.assertTrue(c.holding)
+        self.assertEqual(1, c.limit)
+        c.update([1])
+        self.assertEqual(1, c.limit)  # min_workers
+        available[0] = 8 * GB
+        c.update([1])
+        self.assertFalse(c.holding)
+        self.assertEqual(2, c.limit)
+        self.assertTrue(c.decisions[-2].startswith("Resuming new jobs"))
+
+    def test_samples_at_most_every_interval(self):
+        c = AdaptiveConcurrency(1, 4, sample_interval=60.0, load_average=lambda: 0.0, available_memory=lambda: None)
+        c.update([1])
+        c.update([1, 2])
+        self.assertEqual(2, c.limit)
+
+    def test_reads_our_own_rss(self):
+        if not os.path.exists('/proc/self/statm'):
+            self.skipTest("No /proc here")
+        self.assertGreater(read_rss(os.getpid()), 0)
+
+    def test_no_load_average_on_windows(self):
+        c = AdaptiveConcurrency(1, 2, sample_interval=0.0, available_memory=lambda: None)
+        getloadavg = getattr(os, 'getloadavg', None)
+        if getloadavg:
+            del os.getloadavg
+        try:
+            self.assertEqual(0.0, read_load_average())
+            c.update([1])  # so it goes by memory alone there, rather than failing the run
+        finally:
+            if getloadavg:
+                os.getloadavg = getloadavg
+        self.assertEqual(2, c.limit)
+
+    def test_engine_follows_the_limit(self):
+        # a machine that's always busy never gets past the one worker
+        busy = AdaptiveConcurrency(1, 4, sample_interval=0.0, load_average=lambda: 2.0, available_memory=lambda: None)
+        outcomes = []
+        engine = RunEngine(1, pid_worker, poll_interval=0.02, concurrency=busy)
+        self.assertTrue(engine.run(list(range(6)), lambda *o: outcomes.append(o), lambda: False))
+        self.assertEqual(1, len({pid for _, pid, _ in outcomes}))
+        # an idle one grows to use more of them
+        idle = AdaptiveConcurrency(1, 3, sample_interval=0.0, load_average=lambda: 0.0, available_memory=lambda: None)
+        outcomes = []
+        engine = RunEngine(1, pid_worker, poll_interval=0.02, concurrency=idle)
+        self.assertTrue(engine.run(list(range(12)), lambda *o: outcomes.append(o), lambda: False))
+        self.assertEqual(12, len(outcomes))
+        self.assertEqual(3, idle.limit)
+        self.assertEqual(3, len({pid for _, pid, _ in outcomes}))
+
+    def test_engine_holds_back_with_nothing_running(self):
+        available = [1 * GB]
+        low_memory = AdaptiveConcurrency(
+            1, 2, sample_interval=0.0, load_average=lambda: 0.0, available_memory=lambda: available[0]
+        )
+        start = perf_counter()
+        finished = []
+
+        def should_stop():
+            if perf_counter() - start > 0.5:
+                available[0] = 8 * GB
+            return False
+
+        engine = RunEngine(1, pid_worker, poll_interval=0.02, concurrency=low_memory)
+        self.assertTrue(engine.run(list(range(3)), lambda *_: finished.append(perf_counter() - start), should_stop))
+        self.assertEqual(3, len(finished))
+        self.assertGreater(min(finished), 0.5)  # not one started while memory was short
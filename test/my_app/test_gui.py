@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.background_operation import BackgroundOperation, run_task, SIMULATION_STAGES
+from my_app.constants import ReportingFrequency, ResultsTreeRoots, RunOptions
+from my_app.gui import MyApp
+
+
+def differing_output_worker(task, config):
+    """Simulations write an error file that differs between the builds, compares are the real thing"""
+    stage, idf = task
+    if stage not in SIMULATION_STAGES:
+        return run_task(task, config)
+    out_dir = config.idf_output_dirs(idf)[SIMULATION_STAGES.index(stage)]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / 'eplusout.err').write_text(f"** Warning ** from {stage}\n")
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': 0.0}
+
+
+class TestGuiRunConfiguration(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+        self._old_data_dir = os.environ.get('EPLUS_REGRESSION_TOOL_DATA')
+        os.environ['EPLUS_REGRESSION_TOOL_DATA'] = str(self.root / 'data')
+        for build in ('build_1', 'build_2'):
+            (self.root / build).mkdir()
+
+    def tearDown(self):
+        if self._old_data_dir is None:
+            del os.environ['EPLUS_REGRESSION_TOOL_DATA']
+        else:
+            os.environ['EPLUS_REGRESSION_TOOL_DATA'] = self._old_data_dir
+        self._temp_dir.cleanup()
+
+    def test_gui_runs_compare_outputs(self):
+        config = MyApp.run_configuration(
+            self.root / 'build_1', self.root / 'build_2', RunOptions.DONT_FORCE, ReportingFrequency.HOURLY
+        )
+        self.assertEqual(self.root / 'data' / 'outputs', config.output_dir.parent)
+        self.assertEqual(self.root / 'data' / 'store', config.output_store)
+        b = BackgroundOperation(2, ['a.idf', 'sub/b.idf'], config)
+        b.worker = differing_output_worker
+        finished = dict()
+        b.get_ready_to_go(lambda *_: None, finished.update)
+        b.run()
+        for result in finished['idf_results']:
+            self.assertIn(ResultsTreeRoots.AllCompared, result['categories'])
+            self.assertIn(ResultsTreeRoots.TextDiff, result['categories'])
+            self.assertEqual('eplusout.err', result['diff_file'])
+
+    def test_old_run_outputs_are_pruned(self):
+        for _ in range(4):
+            output_dir = MyApp.new_run_output_dir(keep=2)
+            output_dir.mkdir()
+        self.assertEqual(2, len(list((self.root / 'data' / 'outputs').iterdir())))
+
+    def test_invalid_build_dirs_listing(self):
+        build_1, missing = self.root / 'build_1', self.root / 'missing'
+        self.assertIsNone(MyApp.invalid_build_dirs_listing(build_1, self.root / 'build_2', False))
+        self.assertIn("Build folder path #2 is invalid", MyApp.invalid_build_dirs_listing(build_1, missing, False))
+        self.assertIn("Both build folders are invalid", MyApp.invalid_build_dirs_listing(missing, missing, False))
+        self.assertEqual("This will be the master list", MyApp.invalid_build_dirs_listing(missing, missing, True)[0])
+
+    def test_clean_output_store(self):
+        self.assertEqual((0, 0), MyApp.clean_output_store())
+        self.assertTrue((self.root / 'data' / 'store' / 'index.sqlite3').exists())
@@ -0,0 +1,118 @@
+from threading import Thread
+from time import perf_counter, sleep
+from unittest import TestCase
+
+from my_app.gui_dispatch import GuiDispatcher
+from my_app.tracing import tracer
+
+
+class FakeRoot:
+    """Stands in for Tk, the test plays the part of the main loop by running the scheduled callbacks"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, _ms, func):
+        self.scheduled.append(func)
+
+
+class TestGuiDispatcher(TestCase):
+
+    def test_coalesces_status_and_keeps_order(self):
+        delivered = []
+        root = FakeRoot()
+        d = GuiDispatcher(root, lambda message_type, kwargs: delivered.append((message_type, kwargs)))
+        d.post_status('1/2', 'a', 50.0)
+        d.post_status('2/2', 'b', 100.0)
+        d.post('finished', results={})
+        d.drain()
+        self.assertEqual(2, len(delivered))
+        self.assertEqual(
+            ('status', {'status': '2/2', 'objects_completed': ['a', 'b'], 'percent_complete': 100.0}), delivered[0]
+        )
+        self.assertEqual(('finished', {'results': {}}), delivered[1])
+
+    def test_batched_messages_delivered_once_per_frame_in_order(self):
+        delivered = []
+        d = GuiDispatcher(
+            FakeRoot(), lambda message_type, kwargs: delivered.append((message_type, kwargs)),
+            batched_message_types=('result',)
+        )
+        d.post_batched('result', 1)
+        d.post_batched('result', 2)
+        d.post('finished')
+        d.post_batched('result', 3)
+        d.drain()
+        self.assertEqual(
+            [('result', {'items': [1, 2]}), ('finished', {}), ('result', {'items': [3]})], delivered
+        )
+
+    def test_slow_handlers_stop_the_frame_at_the_budget(self):
+        delivered = []
+
+        def deliver(message_type, _kwargs):
+            delivered.append(message_type)
+            sleep(0.005)
+
+        d = GuiDispatcher(FakeRoot(), deliver, frame_budget_ms=10.0)
+        for i in range(20):
+            d.post(f"slow {i}")
+        start = perf_counter()
+        self.assertTrue(d.drain())
+        # slack for a slow machine's sleeps, but the budget is spent by the third message at the latest
+        self.assertLess(perf_counter() - start, 0.1)
+        self.assertLessEqual(len(delivered), 3)
+        self.assertGreaterEqual(len(delivered), 1)
+
+    def test_traces_queue_waits(self):
+        d = GuiDispatcher(FakeRoot(), lambda *_: None, batched_message_types=('result',))
+        d.post('before tracing')
+        tracer.enable()
+        try:
+            d.post_status('1/1', 'a', 100.0)
+            d.post_batched('result', 1)
+            d.post('finished')
+            d.drain()
+        finally:
+            tracer.disable()
+        self.assertEqual(3, tracer.summary()['Waiting for the GUI']['count'])
+        counters = [event for event in tracer.chrome_trace()['traceEvents'] if event['ph'] == 'C']
+        self.assertEqual([{'drained': 4, 'waiting': 0}], [event['args'] for event in counters])
+
+    def test_main_loop_stays_responsive_under_100k_events(self):
+        num_events = 100000
+        budget_ms = 10.0
+        statuses = []
+        finished = []
+
+        def deliver(message_type, kwargs):
+            if message_type == 'status':
+                statuses.append(kwargs)
+            else:
+                finished.append(kwargs)
+
+        def producer():
+            for i in range(num_events):
+                d.post_status(f"{i + 1}/{num_events}", f"Run {i} Completed", 100.0 * (i + 1) / num_events)
+            d.post('finished')
+
+        root = FakeRoot()
+        d = GuiDispatcher(root, deliver, frame_budget_ms=budget_ms)
+        d.start()
+        thread = Thread(target=producer)
+        thread.start()
+        worst_frame = 0.0
+        while not finished:
+            frame = root.scheduled.pop(0)
+            start = perf_counter()
+            frame()
+            worst_frame = max(worst_frame, perf_counter() - start)
+        thread.join()
+        d.stop()
+        # generous slack over the budget for slow CI machines, but nowhere near draining everything in one frame
+        self.assertLess(worst_frame, 5 * budget_ms / 1000.0)
+        self.assertLess(len(statuses), num_events / 10)
+        log_lines = [line for s in statuses for line in s['objects_completed']]
+        self.assertEqual(num_events, len(log_lines))
+        self.assertEqual(f"Run {num_events - 1} Completed", log_lines[-1])
+        self.assertEqual(100.0, statuses[-1]['percent_complete'])
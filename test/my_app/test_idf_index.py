@@ -0,0 +1,58 @@
+from pathlib import Path
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.idf_index import CommonIdfTracker, IdfDiscoveryIndex
+
+
+class TestIdfDiscoveryIndex(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+        self.idf_dir = self.root / 'testfiles'
+        self.index_dir = self.root / 'index'
+        self.index_dir.mkdir()
+        for rel in ['a.idf', 'b.txt', 'sub/c.idf', 'sub/deeper/d.idf', 'other/e.idf']:
+            (self.idf_dir / rel).parent.mkdir(parents=True, exist_ok=True)
+            (self.idf_dir / rel).write_text('')
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_matches_rglob_and_streams_batches(self):
+        batches = []
+        idfs = IdfDiscoveryIndex(self.idf_dir, self.index_dir).scan(batches.append)
+        expected = set(idf.relative_to(self.idf_dir) for idf in self.idf_dir.rglob('*.idf'))
+        self.assertEqual(expected, idfs)
+        self.assertEqual(expected, set(idf for batch in batches for idf in batch))
+
+    def test_rescan_only_lists_changed_directories(self):
+        IdfDiscoveryIndex(self.idf_dir, self.index_dir).scan()
+        index = IdfDiscoveryIndex(self.idf_dir, self.index_dir)
+        self.assertEqual(4, len(index.scan()))
+        self.assertEqual(0, index.num_dirs_listed)
+        (self.idf_dir / 'sub' / 'deeper' / 'new.idf').write_text('')
+        (self.idf_dir / 'other' / 'e.idf').unlink()
+        # make sure the mtimes move even on filesystems with coarse timestamps
+        for rel in ['sub/deeper', 'other']:
+            stat = os.stat(str(self.idf_dir / rel))
+            os.utime(str(self.idf_dir / rel), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        idfs = index.scan()
+        self.assertEqual(2, index.num_dirs_listed)
+        self.assertIn(Path('sub/deeper/new.idf'), idfs)
+        self.assertNotIn(Path('other/e.idf'), idfs)
+
+    def test_missing_directory(self):
+        self.assertEqual(set(), IdfDiscoveryIndex(self.root / 'nope', self.index_dir).scan())
+
+
+class TestCommonIdfTracker(TestCase):
+
+    def test_incremental_intersection(self):
+        t = CommonIdfTracker()
+        self.assertEqual([], t.add(0, [Path('a.idf'), Path('b.idf')]))
+        self.assertEqual([Path('b.idf')], t.add(1, [Path('b.idf'), Path('c.idf')]))
+        self.assertEqual([Path('c.idf')], t.add(0, [Path('c.idf'), Path('a.idf')]))
+        self.assertEqual({Path('b.idf'), Path('c.idf')}, t.common)
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from my_app.constants import IdfFilterModes
+from my_app.idf_search import IdfSearchIndex, path_tokens
+
+
+class TestIdfSearchIndex(TestCase):
+
+    def setUp(self):
+        self.paths = sorted([
+            'HVACTemplate-5ZoneVAVWaterCooled.idf', 'PlantLoop/ChillerElectric.idf', 'PlantLoop/BoilerOnly.idf',
+            'ZoneAirCooled/5ZoneAirCooled.idf', 'window_daylighting.idf', 'sub/dir/Window.idf',
+        ])
+        self.index = IdfSearchIndex(self.paths)
+
+    def found(self, query, mode):
+        return [self.paths[i] for i in self.index.search(query, mode)]
+
+    def test_path_tokens(self):
+        self.assertEqual(
+            {'5zoneaircooled', '5', 'zone', 'air', 'cooled', 'idf', 'hvac', 'sub'},
+            path_tokens('sub/HVAC/5ZoneAirCooled.idf')
+        )
+
+    def test_contains(self):
+        self.assertEqual(['sub/dir/Window.idf', 'window_daylighting.idf'],
+                         self.found('WINDOW', IdfFilterModes.CONTAINS))
+        self.assertEqual(['PlantLoop/BoilerOnly.idf', 'PlantLoop/ChillerElectric.idf'],
+                         self.found('loop/', IdfFilterModes.CONTAINS))
+        # narrowing the last query down, as typing does, finds the same as searching afresh
+        self.assertEqual(['PlantLoop/ChillerElectric.idf'], self.found('loop/c', IdfFilterModes.CONTAINS))
+        self.assertEqual([], self.found('nothing like it', IdfFilterModes.CONTAINS))
+        self.assertEqual(self.paths, self.found('', IdfFilterModes.CONTAINS))
+        # a fragment in most of the paths is looked for path by path, which has to find the same
+        self.assertEqual([p for p in self.paths if 'o' in p.lower()], self.found('o', IdfFilterModes.CONTAINS))
+
+    def test_word_starts(self):
+        self.assertEqual(['HVACTemplate-5ZoneVAVWaterCooled.idf', 'ZoneAirCooled/5ZoneAirCooled.idf'],
+                         self.found('cool', IdfFilterModes.WORD_STARTS))
+        self.assertEqual(['ZoneAirCooled/5ZoneAirCooled.idf'], self.found('zone ai', IdfFilterModes.WORD_STARTS))
+        self.assertEqual([], self.found('ooled', IdfFilterModes.WORD_STARTS))
+
+    def test_glob(self):
+        self.assertEqual(['PlantLoop/BoilerOnly.idf', 'PlantLoop/ChillerElectric.idf'],
+                         self.found('plantloop/*', IdfFilterModes.GLOB))
+        self.assertEqual(['sub/dir/Window.idf', 'window_daylighting.idf'], self.found('win*.idf', IdfFilterModes.GLOB))
+        self.assertEqual(['HVACTemplate-5ZoneVAVWaterCooled.idf', 'ZoneAirCooled/5ZoneAirCooled.idf'],
+                         self.found('*cool?d.idf', IdfFilterModes.GLOB))
+        self.assertEqual(self.paths, self.found('*', IdfFilterModes.GLOB))
+        self.assertEqual(['PlantLoop/ChillerElectric.idf'], self.found('[c]*', IdfFilterModes.GLOB))
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from my_app.constants import IdfFilterModes
+from my_app.idf_search import IdfSearchIndex
+from my_app.idf_selection import IdfSelectionModel
+
+
+class TestIdfSelectionModel(TestCase):
+
+    def setUp(self):
+        self.model = IdfSelectionModel()
+        self.model.add_available(['c.idf', 'a.idf', 'sub/b.idf'])
+        self.model.add_available(['b.idf', 'a.idf'])
+
+    def test_available_stays_sorted_and_unique(self):
+        self.assertEqual(['a.idf', 'b.idf', 'c.idf', 'sub/b.idf'], self.model.available)
+
+    def test_activate_and_deactivate(self):
+        self.assertTrue(self.model.activate('c.idf'))
+        self.assertTrue(self.model.activate('a.idf'))
+        self.assertFalse(self.model.activate('c.idf'))
+        self.assertEqual(['c.idf', 'a.idf'], self.model.active)
+        self.assertEqual('c.idf', self.model.deactivate_index(0))
+        self.assertFalse(self.model.is_active('c.idf'))
+        self.assertTrue(self.model.is_active('a.idf'))
+
+    def test_select_all_random_and_deselect(self):
+        self.model.select_all()
+        self.assertEqual(self.model.available, self.model.active)
+        self.assertIsNot(self.model.available, self.model.active)
+        self.model.select_random(2)
+        self.assertEqual(2, len(self.model.active))
+        self.assertEqual(sorted(self.model.active), self.model.active)
+        self.assertTrue(all(self.model.is_active(idf) for idf in self.model.active))
+        self.model.select_random(10)
+        self.assertEqual(4, len(self.model.active))
+        self.model.deselect_all()
+        self.assertEqual([], self.model.active)
+        self.assertFalse(self.model.is_active('a.idf'))
+
+    def test_filter_and_bulk_actions(self):
+        self.assertIs(self.model.available, self.model.filter('  '))
+        self.assertEqual(['b.idf', 'sub/b.idf'], self.model.filter('B.idf'))
+        self.model.add_available(['sub/HVACTemplate.idf'])  # the index is built again for the new listing
+        self.assertEqual(['sub/HVACTemplate.idf'], self.model.filter('temp', IdfFilterModes.WORD_STARTS))
+        self.model.activate('sub/b.idf')
+        self.assertEqual(1, self.model.activate_all(self.model.filter('sub/')))
+        self.assertEqual(['sub/b.idf', 'sub/HVACTemplate.idf'], self.model.active)
+        self.model.select_random(1, among=['a.idf', 'c.idf'])
+        self.assertEqual(1, len(self.model.active))
+        self.assertIn(self.model.active[0], ['a.idf', 'c.idf'])
+
+    def test_search_index_built_elsewhere(self):
+        index = IdfSearchIndex(list(self.model.available))
+        self.assertTrue(self.model.set_search_index(index))
+        self.assertIs(index, self.model.search_index())
+        self.model.add_available(['d.idf'])
+        self.assertFalse(self.model.set_search_index(index))  # built before d.idf came in
+        self.assertIsNot(index, self.model.search_index())
@@ -0,0 +1,41 @@
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.log_buffer import LogBuffer
+
+
+class TestLogBuffer(TestCase):
+
+    def test_ring_buffer_spills_everything_to_disk(self):
+        with TemporaryDirectory() as temp_dir:
+            b = LogBuffer(3, LogBuffer.new_spill_path(Path(temp_dir)))
+            b.append("first")
+            b.extend([f"message {i}" for i in range(5)])
+            self.assertEqual(3, len(b))
+            self.assertTrue(b[0].endswith("]: message 2"))
+            self.assertEqual([b[1], b[2]], b[1:10])
+            self.assertEqual(3, len(b.text().splitlines()))
+            exported = BytesIO()
+            b.export(exported)
+            lines = exported.getvalue().decode('utf-8').splitlines()
+            self.assertEqual(6, len(lines))
+            self.assertTrue(lines[0].endswith("]: first"))
+            b.extend([])  # nothing to log, so nothing gets written, not even a blank line
+            b.clear()
+            self.assertEqual(0, len(b))
+            b.append("after clearing")
+            exported = BytesIO()
+            b.export(exported)
+            lines = exported.getvalue().decode('utf-8').splitlines()
+            self.assertEqual(7, len(lines))  # clearing the view leaves the full history to export
+            self.assertTrue(lines[-1].endswith("]: after clearing"))
+            b.close()
+
+    def test_old_spill_files_are_pruned(self):
+        with TemporaryDirectory() as temp_dir:
+            for i in range(5):
+                (Path(temp_dir) / f"session-2020010{i}-000000-1.log").write_text('')
+            LogBuffer.new_spill_path(Path(temp_dir), keep=3)
+            self.assertEqual(2, len(list(Path(temp_dir).glob('session-*.log'))))
@@ -0,0 +1,69 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.constants import ResultsTreeRoots
+from my_app.diff_thresholds import DiffThresholds
+from my_app.math_diff import math_diff
+
+
+class TestMathDiff(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.temp_dir = Path(self._temp_dir.name)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def write_csv(self, name, header, rows):
+        path = self.temp_dir / name
+        path.write_text('\n'.join([header] + rows) + '\n')
+        return path
+
+    def diff(self, rows_1, rows_2, header_2='Date/Time,A [C](Hourly),B [W](Hourly)', **kwargs):
+        csv_1 = self.write_csv('1.csv', 'Date/Time,A [C](Hourly),B [W](Hourly)', rows_1)
+        csv_2 = self.write_csv('2.csv', header_2, rows_2)
+        return math_diff(csv_1, csv_2, DiffThresholds(), chunk_rows=2, **kwargs)
+
+    def test_identical(self):
+        rows = [f" 01/01  {h:02d}:00:00,{h}.5,{h * 100}" for h in range(1, 6)]
+        result = self.diff(rows, rows)
+        self.assertIsNone(result.category)
+        self.assertEqual(5, result.num_rows)
+
+    def test_small_and_big_diffs_across_chunks(self):
+        rows_1 = [f"t{h},{h}.5,{h * 100}" for h in range(1, 6)]
+        rows_2 = list(rows_1)
+        rows_2[4] = "t5,5.502,500"  # 0.002 absolute, 0.04% relative: not even small
+        self.assertIsNone(self.diff(rows_1, rows_2).category)
+        rows_2[4] = "t5,5.52,500"  # 0.02 absolute, 0.36% relative: small
+        result = self.diff(rows_1, rows_2)
+        self.assertEqual(ResultsTreeRoots.SmallMathDiff, result.category)
+        self.assertEqual([1, 0], list(result.small_count))
+        rows_2[4] = "t5,5.52,600"
+        result = self.diff(rows_1, rows_2)
+        self.assertEqual(ResultsTreeRoots.BigMathDiff, result.category)
+        self.assertEqual([0, 1], list(result.big_count))
+        self.assertAlmostEqual(100.0, result.max_abs_diff[1])
+
+    def test_blank_fields_and_column_order(self):
+        rows_1 = ["t1,1.0,", "t2,2.0,7", "t3,,8"]
+        rows_2 = ["t1,,1.0", "t2,7,2.0", "t3,8,"]
+        swapped_header = 'Date/Time,B [W](Hourly),A [C](Hourly)'
+        self.assertIsNone(self.diff(rows_1, rows_2, swapped_header).category)
+        rows_2[2] = "t3,8,3.0"
+        self.assertEqual(ResultsTreeRoots.BigMathDiff, self.diff(rows_1, rows_2, swapped_header).category)
+
+    def test_whitespace_only_fields_are_blank(self):
+        rows_1 = ["t1,1.0, ", "t2,\t,7", "t3,3.0,8"]
+        rows_2 = ["t1,1.0,", "t2,,7", "t3,3.0,8 "]
+        self.assertIsNone(self.diff(rows_1, rows_2).category)
+
+    def test_structural_mismatches_are_big(self):
+        rows = ["t1,1,2", "t2,3,4", "t3,5,6"]
+        self.assertTrue(self.diff(rows, rows[:2]).row_count_mismatch)
+        self.assertTrue(self.diff(rows[:2], rows).row_count_mismatch)
+        result = self.diff(rows, ["t1,1", "t2,3", "t3,5"], header_2='Date/Time,A [C](Hourly)')
+        self.assertEqual(['B [W](Hourly)'], result.unmatched_columns)
+        self.assertEqual(ResultsTreeRoots.BigMathDiff, result.category)
@@ -1,6 +1,30 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
 from unittest import TestCase
 
-from my_app.background_operation import BackgroundOperation
+from my_app.background_operation import BackgroundOperation, RunConfiguration
+from my_app.constants import PipelineStages, ResultsTreeRoots, RunOptions
+from my_app.runtime_history import RuntimeHistory
+
+
+def quick_worker(task, config):
+    stage, idf = task
+    # later files finish first, so completions arrive out of order
+    sleep(0.05 * (5 - int(idf[0])))
+    if idf.startswith('3') and stage == PipelineStages.Case1:
+        raise RuntimeError("simulation blew up")
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': None}
+
+
+def logging_worker(task, config):
+    stage, idf = task
+    with (config.output_dir / 'tasks.txt').open('a') as f:
+        f.write(f"{stage} {idf}\n")
+    if stage == PipelineStages.Compare:
+        return {'categories': [ResultsTreeRoots.AllCompared, ResultsTreeRoots.TextDiff], 'diff_file': 'eplusout.err',
+                'diffs': {'eplusout.err': ResultsTreeRoots.TextDiff}, 'magnitudes': {}}
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': None}
 
 
 class TestOperator(TestCase):
@@ -10,3 +34,85 @@ class TestOperator(TestCase):
         b.get_ready_to_go()
         self.assertFalse(b._cancel_me)
         b.run()
+
+    def test_parallel_run_reports_progress_in_order(self):
+        statuses = []
+        finished = []
+        streamed = []
+        b = BackgroundOperation(4, ['1.idf', '2.idf', '3.idf', '4.idf'])
+        b.worker = quick_worker
+        b.get_ready_to_go(lambda *args: statuses.append(args), finished.append, None, streamed.append)
+        b.run()
+        self.assertEqual(['1/4 of the way there', '2/4 of the way there', '3/4 of the way there',
+                          '4/4 of the way there'], [s[0].split(',')[0] for s in statuses])
+        self.assertEqual([25.0, 50.0, 75.0, 100.0], [s[2] for s in statuses])
+        self.assertIn("Run 3.idf Failed: Case 1: simulation blew up", [s[1] for s in statuses])
+        self.assertEqual(1, len(finished))
+        idf_results = {r['idf']: r for r in finished[0]['idf_results']}
+        self.assertEqual(4, len(idf_results))
+        self.assertEqual([ResultsTreeRoots.AllFiles, ResultsTreeRoots.Case1Fail, ResultsTreeRoots.Case2Success],
+                         idf_results['3.idf']['categories'])
+        # each result is streamed out as it comes in, numbered in that order
+        self.assertEqual([1, 2, 3, 4], [r['seq'] for r in streamed])
+        self.assertEqual([r['idf'] for r in finished[0]['idf_results']], [r['idf'] for r in streamed])
+
+    def test_longest_expected_jobs_run_first(self):
+        with TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / 'build').mkdir()
+            (root / 'testfiles').mkdir()
+            for idf, size in [('small.idf', 10), ('big.idf', 1000), ('known.idf', 10)]:
+                (root / 'testfiles' / idf).write_text('x' * size)
+            history = RuntimeHistory(root / 'history.json')
+            history.record('known.idf', str(root / 'build'), RunOptions.DONT_FORCE, 600.0, 10)
+            for other in ('other_1.idf', 'other_2.idf'):  # these set the typical runtime per byte
+                history.record(other, str(root / 'build'), RunOptions.DONT_FORCE, 1.0, 1000)
+            history.save()
+            config = RunConfiguration(root / 'build', root / 'build', history_file=root / 'history.json')
+            b = BackgroundOperation(1, ['small.idf', 'big.idf', 'known.idf'], config)
+            self.assertEqual(['known.idf', 'big.idf', 'small.idf'], b.schedule())
+            # progress is weighted by the expected runtimes: known.idf is the bulk of the suite
+            b._start_time = perf_counter()
+            b._num_completed = 1
+            percent, time_remaining = b._progress('known.idf')
+            self.assertGreater(percent, 99.0)
+            self.assertIn('remaining', time_remaining)
+
+    def test_cancel_before_run(self):
+        cancelled = []
+        b = BackgroundOperation(2, ['1.idf', '2.idf'])
+        b.worker = quick_worker
+        b.get_ready_to_go(f_cancelled=cancelled.append)
+        b.please_stop()
+        b.run()
+        self.assertEqual([[]], [c['idf_results'] for c in cancelled])
+
+    def test_compare_queued_as_soon_as_both_sides_finish(self):
+        with TemporaryDirectory() as temp_dir:
+            config = RunConfiguration(output_dir=Path(temp_dir))
+            finished = []
+            b = BackgroundOperation(1, ['1.idf', '2.idf'], config)
+            b.worker = logging_worker
+            b.get_ready_to_go(f_finished=finished.append)
+            b.run()
+            tasks = (Path(temp_dir) / 'tasks.txt').read_text().splitlines()
+        # with one worker, an IDF's compare goes ahead of the next IDF's simulations
+        self.assertEqual(['Case 1 1.idf', 'Case 2 1.idf', 'Compare 1.idf'], sorted(tasks[:3]))
+        self.assertTrue(tasks[2].startswith('Compare'))
+        self.assertEqual(
+            [ResultsTreeRoots.AllFiles, ResultsTreeRoots.Case1Success, ResultsTreeRoots.Case2Success,
+             ResultsTreeRoots.AllCompared, ResultsTreeRoots.TextDiff],
+            finished[0]['idf_results'][0]['categories']
+        )
+        stats = b.stats.snapshot()
+        self.assertEqual(2, stats[PipelineStages.Compare]['completed'])
+        self.assertEqual(0, stats[PipelineStages.Case1]['queued'])
+
+    def test_pending_compares_hold_back_new_idfs(self):
+        b = BackgroundOperation(2, ['1.idf', '2.idf'], max_pending_compares=1)
+        b._task_started((PipelineStages.Case1, '1.idf'))
+        self.assertTrue(b._admit((PipelineStages.Case1, '2.idf')))
+        b.stats.queue(PipelineStages.Compare)
+        # the sibling of a started IDF still goes, it's what lets that IDF's compare happen
+        self.assertTrue(b._admit((PipelineStages.Case2, '1.idf')))
+        self.assertFalse(b._admit((PipelineStages.Case1, '2.idf')))
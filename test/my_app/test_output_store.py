@@ -0,0 +1,156 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import TestCase
+
+from my_app.background_operation import BackgroundOperation, compare_idf, RunConfiguration, SIMULATION_STAGES
+from my_app.comparison import compare_outputs
+from my_app.constants import PipelineStages
+from my_app.output_store import _locked, OutputStore
+
+
+def out_of_date(store: OutputStore, days: float):
+    """Backdates every run and blob in the store by days"""
+    with store._connection:
+        store._connection.execute('UPDATE runs SET started = started - ?', (days * 86400.0,))
+        store._connection.execute('UPDATE blobs SET last_used = last_used - ?', (days * 86400.0,))
+
+
+def same_output_worker(task, config):
+    """Writes one output that's the same from both builds and one that isn't, then compares as the real worker does"""
+    stage, idf = task
+    if stage == PipelineStages.Compare:
+        return compare_idf(idf, config)
+    side = SIMULATION_STAGES.index(stage)
+    out_dir = config.idf_output_dirs(idf)[side]
+    OutputStore.prepare(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / 'eplusout.err').write_text('the same from both builds')
+    (out_dir / 'eplusout.end').write_text(stage)
+    store = OutputStore(config.output_store)
+    store.ingest(out_dir, config.run_key, idf, side)
+    store.close()
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': 0.0}
+
+
+class TestOutputStore(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+        self.store = OutputStore(self.root / 'store')
+
+    def tearDown(self):
+        self.store.close()
+        self._temp_dir.cleanup()
+
+    def write_outputs(self, name: str, contents: dict) -> Path:
+        out_dir = self.root / name
+        OutputStore.prepare(out_dir)
+        out_dir.mkdir(exist_ok=True)
+        for file_name, text in contents.items():
+            (out_dir / file_name).write_text(text)
+        return out_dir
+
+    def test_identical_outputs_are_stored_once(self):
+        out_1 = self.write_outputs('out_1', {'eplusout.err': 'same', 'eplusout.end': 'one'})
+        out_2 = self.write_outputs('out_2', {'eplusout.err': 'same', 'eplusout.end': 'two'})
+        hashes_1 = self.store.ingest(out_1, 'run', 'a.idf', 0)
+        hashes_2 = self.store.ingest(out_2, 'run', 'a.idf', 1)
+        self.assertEqual(hashes_1['eplusout.err'], hashes_2['eplusout.err'])
+        self.assertNotEqual(hashes_1['eplusout.end'], hashes_2['eplusout.end'])
+        self.assertTrue(os.path.samefile(str(out_1 / 'eplusout.err'), str(out_2 / 'eplusout.err')))
+        self.assertEqual('same', (out_2 / 'eplusout.err').read_text())
+        self.assertEqual(2, self.store.ref_count(hashes_1['eplusout.err']))
+        self.assertEqual({'eplusout.err'}, self.store.identical_files('run', 'a.idf'))
+        self.assertEqual(len('same') + len('one') + len('two'), self.store.total_bytes())
+
+    def test_prepare_keeps_blobs_intact(self):
+        out_dir = self.write_outputs('out', {'eplusout.err': 'first run'})
+        digest = self.store.ingest(out_dir, 'run 1', 'a.idf', 0)['eplusout.err']
+        self.write_outputs('out', {'eplusout.err': 'second run'})
+        self.assertEqual('first run', self.store.blob_path(digest).read_text())
+
+    def test_compress_and_materialize(self):
+        out_dir = self.write_outputs('out', {'eplusout.err': 'cold ' * 1000})
+        digest = self.store.ingest(out_dir, 'run', 'a.idf', 0)['eplusout.err']
+        out_of_date(self.store, 10)
+        self.assertEqual(0, self.store.compress_cold(7))  # still linked from the output folder
+        OutputStore.prepare(out_dir)
+        self.assertEqual(1, self.store.compress_cold(7))
+        self.assertFalse(self.store.blob_path(digest).exists())
+        self.assertTrue(self.store.blob_path(digest, compressed=True).exists())
+        restored = self.root / 'restored.err'
+        self.store.materialize(digest, restored)
+        self.assertEqual('cold ' * 1000, restored.read_text())
+        # the same content coming back in from a run brings the blob back uncompressed
+        self.write_outputs('out', {'eplusout.err': 'cold ' * 1000})
+        self.store.ingest(out_dir, 'run 2', 'a.idf', 0)
+        self.assertTrue(self.store.blob_path(digest).exists())
+        self.assertFalse(self.store.blob_path(digest, compressed=True).exists())
+
+    def test_collect_garbage_by_age_and_size(self):
+        old = self.write_outputs('old', {'eplusout.err': 'old run ' * 100, 'eplusout.end': 'shared'})
+        old_hashes = self.store.ingest(old, 'old run', 'a.idf', 0)
+        out_of_date(self.store, 40)
+        middle = self.write_outputs('middle', {'eplusout.err': 'middle run ' * 100})
+        middle_hash = self.store.ingest(middle, 'middle run', 'a.idf', 0)['eplusout.err']
+        new = self.write_outputs('new', {'eplusout.err': 'new run ' * 100, 'eplusout.end': 'shared'})
+        self.store.ingest(new, 'new run', 'a.idf', 0)
+        self.assertEqual(1, self.store.collect_garbage(30))
+        self.assertFalse(self.store.blob_path(old_hashes['eplusout.err']).exists())
+        self.assertTrue(self.store.blob_path(old_hashes['eplusout.end']).exists())  # the new run still refers to it
+        self.assertEqual('old run ' * 100, (old / 'eplusout.err').read_text())  # the output folder keeps its link
+        self.store.max_bytes = 1000
+        self.assertEqual(1, self.store.collect_garbage(30))
+        self.assertFalse(self.store.blob_path(middle_hash).exists())
+        self.assertEqual(0, self.store.ref_count(middle_hash))
+        self.store.max_bytes = 0
+        self.assertEqual(0, self.store.collect_garbage(30))  # the newest run is always kept
+
+    def test_collect_garbage_waits_for_ingests(self):
+        old = self.write_outputs('old', {'eplusout.err': 'old run'})
+        digest = self.store.ingest(old, 'old run', 'a.idf', 0)['eplusout.err']
+        out_of_date(self.store, 40)
+        deleted = list()
+
+        def collect_garbage():
+            store = OutputStore(self.root / 'store')
+            deleted.append(store.collect_garbage(30))
+            store.close()
+
+        # another process, part way through an ingest that has linked to the old run's blob but not referred to it yet
+        with _locked(self.store.lock_file, exclusive=False):
+            collector = Thread(target=collect_garbage)
+            collector.start()
+            collector.join(0.2)
+            self.assertTrue(collector.is_alive())
+            self.assertTrue(self.store.blob_path(digest).exists())
+            self.store.start_run('new run')
+            self.store._connection.execute(
+                'INSERT INTO refs (run_key, idf, side, file_name, hash) VALUES (?, ?, ?, ?, ?)',
+                ('new run', 'a.idf', 0, 'eplusout.err', digest)
+            )
+            self.store._connection.commit()
+        collector.join()
+        self.assertEqual([0], deleted)
+        self.assertTrue(self.store.blob_path(digest).exists())
+
+    def test_compare_skips_identical_files(self):
+        out_1 = self.write_outputs('out_1', {'eplusout.err': 'one'})
+        out_2 = self.write_outputs('out_2', {'eplusout.err': 'two'})
+        self.assertEqual({'eplusout.err'}, set(compare_outputs(out_1, out_2)['diffs']))
+        self.assertEqual({}, compare_outputs(out_1, out_2, identical_files={'eplusout.err'})['diffs'])
+
+    def test_run_with_output_store(self):
+        config = RunConfiguration(output_dir=self.root / 'outputs', output_store=self.root / 'store')
+        b = BackgroundOperation(2, ['1.idf', '2.idf'], config)
+        b.worker = same_output_worker
+        finished = dict()
+        b.get_ready_to_go(lambda *_: None, finished.update)
+        b.run()
+        self.assertTrue(config.run_key)
+        self.assertEqual({'eplusout.err'}, self.store.identical_files(config.run_key, '1.idf'))
+        self.assertEqual(2, len(finished['idf_results']))
+        self.assertEqual(str(self.root / 'store'), config.as_dict()['output_store'])
@@ -0,0 +1,117 @@
+import os
+from multiprocessing import Process
+from pathlib import Path
+import signal
+import socket
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from unittest import TestCase
+from unittest.mock import patch
+
+from my_app.remote_worker import parse_address, RemoteWorkerListener, serve
+from my_app.run_engine import RunEngine
+
+AUTHKEY = b'test key'
+
+
+def remote_job(job):
+    if isinstance(job, tuple):
+        marker = Path(job[1])
+        if not marker.exists():
+            # the first worker to get this job goes down with it, as if its machine had been switched off
+            marker.write_text('')
+            os.kill(os.getppid(), signal.SIGKILL)
+            os._exit(1)
+        return 'survived'
+    if job == 'slow':
+        sleep(60)
+    return job * 2
+
+
+class TestRemoteWorkers(TestCase):
+
+    def setUp(self):
+        self.listener = RemoteWorkerListener(('127.0.0.1', 0), AUTHKEY)
+        self.daemons = [
+            # not daemonic, a worker daemon runs its jobs in child processes of its own
+            Process(target=serve, args=(self.listener.address, AUTHKEY, f"worker {i}", 0.2, 0.05)) for i in range(2)
+        ]
+        for daemon in self.daemons:
+            daemon.start()
+        deadline = perf_counter() + 10
+        while self.listener.num_idle < 2 and perf_counter() < deadline:
+            sleep(0.01)
+        self.assertEqual(2, self.listener.num_idle)
+
+    def tearDown(self):
+        self.listener.close()
+        for daemon in self.daemons:
+            daemon.join(5)
+            if daemon.is_alive():
+                daemon.kill()
+                daemon.join()
+            self.assertFalse(daemon.is_alive())
+
+    def test_jobs_run_on_remote_workers_only(self):
+        outcomes = []
+        engine = RunEngine(0, remote_job, poll_interval=0.05, remote=self.listener)
+        self.assertTrue(engine.run(list(range(10)), lambda *o: outcomes.append(o), lambda: False))
+        self.assertEqual([(i, i * 2, None) for i in range(10)], sorted(outcomes))
+        # both workers are given back, ready for the next run
+        self.assertEqual(2, self.listener.num_idle)
+
+    def test_lost_worker_job_is_reassigned(self):
+        outcomes = []
+        with TemporaryDirectory() as temp_dir:
+            engine = RunEngine(0, remote_job, poll_interval=0.05, remote=self.listener)
+            jobs = [('die once', str(Path(temp_dir) / 'died')), 1, 2]
+            self.assertTrue(engine.run(jobs, lambda *o: outcomes.append(o), lambda: False))
+        self.assertIn((jobs[0], 'survived', None), outcomes)
+        self.assertEqual(3, len(outcomes))
+        self.assertEqual(1, len(engine.lost_workers))
+        self.assertEqual(1, self.listener.num_idle)
+
+    def test_stop_cancels_remote_jobs(self):
+        engine = RunEngine(0, remote_job, poll_interval=0.05, stop_deadline=2.0, remote=self.listener)
+        start = perf_counter()
+        self.assertFalse(engine.run(['slow', 'slow'], lambda *_: None, lambda: perf_counter() - start > 0.5))
+        self.assertLess(perf_counter() - start, 3.0)
+        self.assertEqual(['slow', 'slow'], engine.killed_jobs)
+        # having killed their jobs, the workers are good for the next run
+        self.assertEqual(2, self.listener.num_idle)
+
+    def wait_for_idle(self, num_idle: int) -> bool:
+        deadline = perf_counter() + 10
+        while self.listener.num_idle < num_idle and perf_counter() < deadline:
+            sleep(0.01)
+        return self.listener.num_idle == num_idle
+
+    def test_silent_clients_hold_up_no_one(self):
+        with patch('my_app.remote_worker.HELLO_TIMEOUT', 0.5):
+            silent = socket.create_connection(self.listener.address)
+            self.daemons.append(Process(target=serve, args=(self.listener.address, AUTHKEY, 'worker 2', 0.2, 0.05)))
+            self.daemons[-1].start()
+            self.assertTrue(self.wait_for_idle(3))
+            silent.settimeout(5.0)
+            while silent.recv(1024):  # the challenge, then the hang up
+                pass
+            silent.close()
+
+    def test_bye_during_a_job_is_kept_for_after_it(self):
+        (connection, _), other = self.listener.take()
+        self.listener.give_back(*other)
+        connection.send(('worker', remote_job))
+        connection.send(('job', 3))
+        connection.send(('bye',))
+        message = connection.recv()
+        while message[0] == 'heartbeat':
+            message = connection.recv()
+        self.assertEqual(('result', 6, None), message)
+        self.daemons[0].join(5)
+        self.daemons[1].join(5)
+        self.assertEqual(1, sum(daemon.is_alive() for daemon in self.daemons))  # the one that was told bye has gone
+        connection.close()
+
+    def test_listen_on_this_machine_unless_told_otherwise(self):
+        self.assertEqual(('127.0.0.1', 8000), parse_address('8000'))
+        self.assertEqual(('0.0.0.0', 8000), parse_address('0.0.0.0:8000'))
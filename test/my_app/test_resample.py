@@ -0,0 +1,102 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+
+from my_app.constants import ReportingFrequency, ResultsTreeRoots
+from my_app.math_diff import math_diff
+from my_app.resample import Environments, MAX, MEAN, MIN, period_keys, reduction_for, resample, SUM
+
+HEADER = 'Date/Time,Zone Air Temperature [C](TimeStep),Heating Energy [J](TimeStep),Outdoor Maximum [C](Hourly)'
+
+
+def timestep_rows(hours, temperatures=None):
+    """Four timesteps an hour, the hourly column only reported at the end of each hour"""
+    rows = list()
+    for hour in range(1, hours + 1):
+        for quarter, minutes in enumerate((15, 30, 45, 0)):
+            stamp_hour = hour - 1 if minutes else hour
+            temperature = temperatures[len(rows)] if temperatures else 20.0 + quarter
+            hourly = f"{hour}.0" if minutes == 0 else ''
+            rows.append(f" 01/01  {stamp_hour:02d}:{minutes:02d}:00,{temperature},100,{hourly}")
+    return rows
+
+
+class TestResample(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.temp_dir = Path(self._temp_dir.name)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def write_csv(self, name, rows, header=HEADER):
+        path = self.temp_dir / name
+        path.write_text('\n'.join([header] + rows) + '\n')
+        return path
+
+    def test_reductions_by_variable_type(self):
+        self.assertEqual(MEAN, reduction_for('Zone Air Temperature [C](TimeStep)'))
+        self.assertEqual(SUM, reduction_for('Electricity:Facility [J](Hourly)'))
+        self.assertEqual(MIN, reduction_for('Site Outdoor Air Drybulb Temperature Minimum [C](Daily)'))
+        self.assertEqual(MAX, reduction_for('Zone Maximum [W](Hourly)'))
+
+    def test_period_keys(self):
+        stamps = [' 01/01  00:15:00', ' 01/01  01:00:00', ' 01/01  01:15:00', ' 01/02  24:00:00', 'January']
+        hourly = period_keys(stamps, ReportingFrequency.HOURLY)
+        self.assertEqual(hourly[0], hourly[1])
+        self.assertNotEqual(hourly[1], hourly[2])
+        daily = period_keys(stamps, ReportingFrequency.DAILY)
+        self.assertEqual(3, len(set(daily)))  # two days, and the month name on its own
+        self.assertEqual(1, len(set(period_keys(stamps[:4], ReportingFrequency.RUNPERIOD))))
+
+    def test_environments_are_kept_apart(self):
+        # a summer design day, then the run period starting back in January, then a winter design day in its middle
+        stamps = [' 07/21  23:00:00', ' 07/21  24:00:00', ' 01/01  01:00:00', ' 01/01  02:00:00', ' 01/21  01:00:00']
+        run = period_keys(stamps, ReportingFrequency.RUNPERIOD)
+        self.assertEqual([0, 0, 1, 1, 2], [sorted(set(run)).index(key) for key in run])
+        monthly = period_keys(stamps[2:], ReportingFrequency.MONTHLY)
+        self.assertEqual(2, len(set(monthly)))  # both January, but not the same environment
+        # a file read in chunks keeps counting environments from one chunk to the next
+        environments = Environments()
+        chunked = np.concatenate([
+            period_keys(stamps[:2], ReportingFrequency.RUNPERIOD, 0, environments),
+            period_keys(stamps[2:], ReportingFrequency.RUNPERIOD, 2, environments)
+        ])
+        np.testing.assert_array_equal(run, chunked)
+
+    def test_resample_by_environment(self):
+        rows = [' 07/21  23:00:00,20.0,100,', ' 07/21  24:00:00,22.0,100,', ' 01/01  01:00:00,10.0,50,']
+        csv = self.write_csv('out.csv', rows)
+        for chunk_rows in (1, 100):
+            _, values = resample(csv, ReportingFrequency.RUNPERIOD, chunk_rows)
+            np.testing.assert_allclose([[21.0, 200.0, np.nan], [10.0, 50.0, np.nan]], values)
+
+    def test_whitespace_only_fields_are_not_reported(self):
+        csv = self.write_csv('out.csv', [row + '  ' if row.endswith(',') else row for row in timestep_rows(1)])
+        _, values = resample(csv, ReportingFrequency.HOURLY)
+        np.testing.assert_allclose([[21.5, 400.0, 1.0]], values)
+
+    def test_resample_across_chunks(self):
+        csv = self.write_csv('out.csv', timestep_rows(3))
+        for chunk_rows in (3, 5, 100):
+            columns, values = resample(csv, ReportingFrequency.HOURLY, chunk_rows)
+            self.assertEqual(3, len(columns))
+            np.testing.assert_allclose([[21.5, 400.0, h] for h in (1.0, 2.0, 3.0)], values)
+        _, values = resample(csv, ReportingFrequency.DAILY)
+        np.testing.assert_allclose([[21.5, 1200.0, 3.0]], values)
+
+    def test_diff_at_a_coarser_frequency(self):
+        csv_1 = self.write_csv('1.csv', timestep_rows(2))
+        # the temperatures swing within each hour, but the hourly means are the same
+        swung = [20.0, 22.0, 21.0, 23.0, 21.0, 21.0, 22.0, 22.0]
+        csv_2 = self.write_csv('2.csv', timestep_rows(2, swung))
+        self.assertEqual(ResultsTreeRoots.BigMathDiff, math_diff(csv_1, csv_2).category)
+        self.assertEqual(ResultsTreeRoots.BigMathDiff, math_diff(csv_1, csv_2, frequency='TimeStep').category)
+        result = math_diff(csv_1, csv_2, frequency=ReportingFrequency.HOURLY)
+        self.assertIsNone(result.category)
+        self.assertEqual(2, result.num_rows)
+        shorter = self.write_csv('3.csv', timestep_rows(1))
+        self.assertTrue(math_diff(csv_1, shorter, frequency=ReportingFrequency.HOURLY).row_count_mismatch)
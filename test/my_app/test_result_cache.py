@@ -0,0 +1,115 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from my_app.background_operation import BackgroundOperation, RunConfiguration, simulate_side
+from my_app.result_cache import fingerprint_build, ResultCache
+
+
+class TestResultCache(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.root = Path(self._temp_dir.name)
+        self.cache = ResultCache(self.root / 'cache')
+        self.idf = self.root / 'in.idf'
+        self.idf.write_text('Version,9.4;')
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_key_depends_on_every_input(self):
+        key = ResultCache.key('build', self.idf, 'option', 'Hourly')
+        self.assertEqual(key, ResultCache.key('build', self.idf, 'option', 'Hourly'))
+        self.assertNotEqual(key, ResultCache.key('other build', self.idf, 'option', 'Hourly'))
+        self.assertNotEqual(key, ResultCache.key('build', self.idf, 'other option', 'Hourly'))
+        self.assertNotEqual(key, ResultCache.key('build', self.idf, 'option', 'Daily'))
+        self.idf.write_text('Version,9.5;')
+        self.assertNotEqual(key, ResultCache.key('build', self.idf, 'option', 'Hourly'))
+
+    def test_store_and_restore_outputs(self):
+        out_dir = self.root / 'out'
+        out_dir.mkdir()
+        (out_dir / 'eplusout.err').write_text('no errors')
+        self.assertIsNone(self.cache.lookup('abc', None))
+        self.cache.store('abc', {'success': True}, out_dir)
+        restored = self.root / 'restored'
+        self.assertEqual({'success': True}, self.cache.lookup('abc', restored))
+        self.assertEqual('no errors', (restored / 'eplusout.err').read_text())
+
+    def test_evicts_least_recently_used(self):
+        out_dir = self.root / 'out'
+        out_dir.mkdir()
+        (out_dir / 'eplusout.csv').write_bytes(b'x' * 100)
+        for i, key in enumerate(['old', 'used', 'new']):
+            self.cache.store(key, {'success': True}, out_dir)
+            os.utime(str(self.root / 'cache' / key / 'result.json'), (1000 + i, 1000 + i))
+        self.cache.lookup('old', None)  # a hit makes it the most recently used
+        self.cache.max_bytes = 250
+        self.assertEqual(1, self.cache.evict())
+        self.assertIsNone(self.cache.lookup('used', None))
+        self.assertIsNotNone(self.cache.lookup('old', None))
+
+    def test_fingerprint_build(self):
+        build = self.root / 'build'
+        (build / 'Products').mkdir(parents=True)
+        (build / 'Products' / 'energyplus').write_text('binary')
+        fingerprint = fingerprint_build(build)
+        (build / 'Products' / 'Energy+.idd').write_text('idd')
+        self.assertNotEqual(fingerprint, fingerprint_build(build))
+
+    def test_fingerprint_build_only_reads_changed_files(self):
+        build = self.root / 'build'
+        (build / 'Products').mkdir(parents=True)
+        (build / 'Products' / 'energyplus').write_text('binary')
+        fingerprint = fingerprint_build(build)
+        with patch('my_app.result_cache.file_digest') as digest:
+            self.assertEqual(fingerprint, fingerprint_build(build))
+            digest.assert_not_called()
+        (build / 'Products' / 'energyplus').write_text('rebuilt binary')
+        self.assertNotEqual(fingerprint, fingerprint_build(build))
+
+    def test_fingerprint_build_with_a_broken_symlink(self):
+        build = self.root / 'build'
+        (build / 'Products').mkdir(parents=True)
+        (build / 'Products' / 'energyplus').write_text('binary')
+        try:
+            (build / 'Products' / 'libgone.so').symlink_to(build / 'Products' / 'libgone.so.1')
+        except (OSError, NotImplementedError):
+            self.skipTest("No symlinks here")
+        fingerprint = fingerprint_build(build)
+        self.assertEqual(fingerprint, fingerprint_build(build))
+        (build / 'Products' / 'libgone.so').unlink()
+        (build / 'Products' / 'libgone.so').symlink_to(build / 'Products' / 'libgone.so.2')
+        self.assertNotEqual(fingerprint, fingerprint_build(build))
+
+    def test_failed_runs_are_not_cached(self):
+        (self.root / 'testfiles').mkdir()
+        (self.root / 'testfiles' / 'a.idf').write_text('Version,9.4;')
+        config = RunConfiguration(self.root / 'build', self.root / 'build', cache_dir=self.root / 'cache')
+        config.build_fingerprints = ('build', 'build')
+        with patch('my_app.background_operation.simulate', return_value={'success': False}):
+            outcome = simulate_side('a.idf', 0, config)
+        self.assertEqual((False, True), (outcome['success'], outcome['cache_miss']))
+        self.assertEqual([], list((self.root / 'cache').iterdir()))
+
+    def test_second_run_is_served_from_cache(self):
+        # the two builds differ, otherwise build 2 would be served build 1's results straight away
+        for build in ('build_1', 'build_2'):
+            (self.root / build).mkdir()
+            (self.root / build / 'energyplus').write_text(build)
+        (self.root / 'testfiles').mkdir()
+        (self.root / 'testfiles' / 'a.idf').write_text('Version,9.4;')
+        config = RunConfiguration(self.root / 'build_1', self.root / 'build_2', cache_dir=self.root / 'cache')
+        stats = []
+        for _ in range(2):
+            finished = []
+            b = BackgroundOperation(2, ['a.idf'], config)
+            b.get_ready_to_go(lambda *_: None, finished.append)
+            b.run()
+            stats.append(finished[0]['cache_stats'])
+        self.assertEqual((0, 2), (stats[0]['hits'], stats[0]['misses']))
+        self.assertEqual((2, 0), (stats[1]['hits'], stats[1]['misses']))
+        self.assertEqual({'hits': 2, 'misses': 2}, stats[1]['totals'])
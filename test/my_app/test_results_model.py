@@ -0,0 +1,33 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.constants import ResultsTreeRoots
+from my_app.results_model import ResultsModel
+from my_app.results_store import ResultsStore
+
+
+class TestResultsModel(TestCase):
+
+    def test_results_grouped_by_category(self):
+        with TemporaryDirectory() as temp_dir:
+            store = ResultsStore(Path(temp_dir) / 'results.sqlite3')
+            run_id = store.start_run({})
+            store.add_idf_result(run_id, 1, {
+                'idf': 'a.idf', 'categories': [ResultsTreeRoots.AllFiles, ResultsTreeRoots.BigMathDiff],
+                'diff_file': 'a.diff'
+            })
+            store.add_idf_result(run_id, 2, {'idf': 'b.idf', 'categories': [ResultsTreeRoots.AllFiles]})
+            store.finish_run(run_id, 'finished')
+            m = ResultsModel(store)
+            self.assertFalse(m.has_run)
+            m.show_run(run_id)
+            self.assertTrue(m.has_run)
+            self.assertEqual(2, m.count(ResultsTreeRoots.AllFiles))
+            self.assertEqual(0, m.count(ResultsTreeRoots.TextDiff))
+            self.assertEqual(('', '', 'a.diff'), m.page(ResultsTreeRoots.BigMathDiff, 0, 10)[0].values)
+            self.assertEqual(['b.idf'], [row.idf for row in m.page(ResultsTreeRoots.AllFiles, 1, 10)])
+            m.clear()
+            self.assertFalse(m.has_run)
+            self.assertEqual(0, m.count(ResultsTreeRoots.AllFiles))
+            store.close()
@@ -0,0 +1,66 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.constants import ResultsTreeRoots
+from my_app.results_store import ResultsStore
+
+
+def idf_result(idf, *categories):
+    return {'idf': idf, 'categories': [ResultsTreeRoots.AllFiles] + list(categories)}
+
+
+class TestResultsStore(TestCase):
+
+    def test_batched_writes_visible_to_another_connection(self):
+        with TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / 'results.sqlite3'
+            writer = ResultsStore(db_path, batch_size=3, batch_interval=3600.0)
+            reader = ResultsStore(db_path)
+            run_id = writer.start_run({'build_dir_1': 'b1'})
+            writer.add_idf_result(run_id, 1, idf_result('a.idf'))
+            writer.add_idf_result(run_id, 2, idf_result('b.idf'))
+            self.assertEqual({}, reader.counts(run_id))  # still waiting on a full batch
+            writer.add_idf_result(run_id, 3, idf_result('c.idf'))
+            self.assertEqual({ResultsTreeRoots.AllFiles: 3}, reader.counts(run_id))
+            writer.add_idf_result(run_id, 4, idf_result('d.idf'))
+            writer.finish_run(run_id, 'finished')  # flushes the partial batch
+            self.assertEqual({ResultsTreeRoots.AllFiles: 4}, reader.counts(run_id))
+            self.assertEqual([(run_id, 'finished')], [(r[0], r[3]) for r in reader.runs()])
+            writer.close()
+            reader.close()
+
+    def test_category_and_regression_queries(self):
+        with TemporaryDirectory() as temp_dir:
+            store = ResultsStore(Path(temp_dir) / 'results.sqlite3')
+            run_x = store.start_run({})
+            store.add_idf_result(run_x, 1, idf_result('a.idf', ResultsTreeRoots.BigMathDiff))
+            store.add_idf_result(run_x, 2, idf_result('b.idf'))
+            store.add_idf_result(run_x, 3, idf_result('c.idf'))
+            store.finish_run(run_x, 'finished')
+            run_y = store.start_run({})
+            store.add_idf_result(run_y, 1, idf_result('a.idf', ResultsTreeRoots.BigMathDiff))
+            store.add_idf_result(run_y, 2, idf_result('b.idf', ResultsTreeRoots.Case2Fail))
+            store.add_idf_result(run_y, 3, idf_result('c.idf'))
+            store.add_idf_result(run_y, 4, idf_result('new.idf', ResultsTreeRoots.TextDiff))
+            result = idf_result('c.idf', ResultsTreeRoots.SmallMathDiff)
+            result.update(
+                diffs={'eplusout.csv': ResultsTreeRoots.SmallMathDiff},
+                magnitudes={'eplusout.csv': {'max_abs_diff': 0.002, 'max_rel_diff': 0.001, 'num_diffs': 4}}
+            )
+            store.add_idf_result(run_y, 5, result)  # a later result for the same IDF adds to what it had
+            store.finish_run(run_y, 'finished')
+            self.assertEqual(['a.idf'], store.idfs_in_category(run_x, ResultsTreeRoots.BigMathDiff))
+            self.assertEqual(['new.idf'], store.idfs_in_category(run_y, ResultsTreeRoots.TextDiff))
+            self.assertEqual(run_x, store.previous_finished_run(run_y))
+            self.assertIsNone(store.previous_finished_run(run_x))
+            # new.idf wasn't in run x, so it can't have regressed
+            self.assertEqual(
+                [('b.idf', ResultsTreeRoots.Case2Fail), ('c.idf', ResultsTreeRoots.SmallMathDiff)],
+                store.regressions(run_x, run_y)
+            )
+            self.assertEqual([], store.regressions(run_y, run_x))
+            magnitudes = store.diff_magnitudes(run_y, 'c.idf')
+            self.assertAlmostEqual(0.002, magnitudes['eplusout.csv']['max_abs_diff'])
+            self.assertEqual(4, magnitudes['eplusout.csv']['num_diffs'])
+            store.close()
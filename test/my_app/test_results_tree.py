@@ -0,0 +1,90 @@
+from itertools import count
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.constants import ResultsTreeRoots
+from my_app.results_model import ResultsModel
+from my_app.results_store import ResultRow, ResultsStore
+from my_app.results_tree import LazyResultsTree
+
+
+class FakeTree:
+    """Just enough of a ttk.Treeview to drive the results tree, counting the deletes"""
+
+    def __init__(self):
+        self._ids = count()
+        self.children = {'': []}
+        self.text = dict()
+        self.focused = ''
+        self.num_deleted = 0
+
+    def bind(self, _sequence, _func):
+        pass
+
+    def insert(self, parent, index, text='', values=()):
+        item = f"I{next(self._ids)}"
+        self.children[parent].append(item)
+        self.children[item] = []
+        self.text[item] = text
+        return item
+
+    def delete(self, *items):
+        for item in items:
+            for children in self.children.values():
+                if item in children:
+                    children.remove(item)
+            self.num_deleted += 1
+
+    def get_children(self, item=''):
+        return list(self.children[item])
+
+    def item(self, item, text):
+        self.text[item] = text
+
+    def focus(self):
+        return self.focused
+
+    def child_texts(self, item):
+        return [self.text[child] for child in self.children[item]]
+
+
+class TestLazyResultsTree(TestCase):
+
+    def test_live_results_stream_in_without_rebuilding(self):
+        with TemporaryDirectory() as temp_dir:
+            store = ResultsStore(Path(temp_dir) / 'results.sqlite3', batch_size=1000, batch_interval=3600.0)
+            model = ResultsModel(store)
+            tree = FakeTree()
+            view = LazyResultsTree(tree, model)
+            run_id = store.start_run({})
+            model.start_live_run(run_id)
+            view.reset()
+            all_files = view.root_items[ResultsTreeRoots.AllFiles]
+            tree.num_deleted = 0
+
+            def add(seq, idf):
+                categories = [ResultsTreeRoots.AllFiles]
+                store.add_idf_result(run_id, seq, {'idf': idf, 'categories': categories})
+                model.add_live_result(categories)
+                view.add_result(ResultRow(idf, seq=seq), categories)
+
+            add(1, 'a.idf')
+            self.assertEqual(f"{ResultsTreeRoots.AllFiles} (1)", tree.text[all_files])
+            self.assertEqual([LazyResultsTree.PLACEHOLDER], tree.child_texts(all_files))
+            # opened before the store has written anything, so the row is still on its way
+            tree.focused = all_files
+            view._on_open(None)
+            self.assertEqual(["... 1 more (double-click to show)"], tree.child_texts(all_files))
+            add(2, 'b.idf')
+            self.assertEqual(["... 2 more (double-click to show)"], tree.child_texts(all_files))
+            store.flush()
+            view._load_page(ResultsTreeRoots.AllFiles)
+            self.assertEqual(['a.idf', 'b.idf'], tree.child_texts(all_files))
+            # now that the category shows everything, new rows go straight in
+            add(3, 'c.idf')
+            self.assertEqual(['a.idf', 'b.idf', 'c.idf'], tree.child_texts(all_files))
+            self.assertEqual(f"{ResultsTreeRoots.AllFiles} (3)", tree.text[all_files])
+            # only the placeholder and the "more" row were ever deleted, no rows were rebuilt
+            self.assertEqual(2, tree.num_deleted)
+            store.close()
@@ -0,0 +1,72 @@
+import os
+import signal
+from threading import Event, Thread
+from time import perf_counter, sleep
+from unittest import TestCase
+
+from my_app.background_operation import BackgroundOperation
+from my_app.run_engine import RunEngine, WorkerDied
+
+
+def busy_worker(job):
+    if job == 'fast':
+        return job
+    if job == 'stubborn':
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # only a SIGKILL will get rid of this one
+    if job == 'crash':
+        os._exit(3)
+    sleep(60)
+    return job
+
+
+def busy_idf_worker(task, config):
+    busy_worker(task[1])
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': None}
+
+
+class TestRunEngine(TestCase):
+
+    def test_worker_crash_is_reported_and_the_rest_keep_going(self):
+        outcomes = []
+        engine = RunEngine(1, busy_worker)
+        self.assertTrue(engine.run(['crash', 'fast'], lambda *o: outcomes.append(o), lambda: False))
+        self.assertEqual('crash', outcomes[0][0])
+        self.assertIsInstance(outcomes[0][2], WorkerDied)
+        self.assertEqual(('fast', 'fast', None), outcomes[1])
+
+    def test_stop_latency_is_bounded_while_workers_are_busy(self):
+        stop = Event()
+        outcomes = []
+        deadline = 0.5
+        engine = RunEngine(3, busy_worker, poll_interval=0.05, stop_deadline=deadline)
+        returned = []
+        thread = Thread(target=lambda: returned.append(engine.run(
+            ['fast', 'slow', 'stubborn', 'slow_2'], lambda *o: outcomes.append(o), stop.is_set
+        )))
+        thread.start()
+        while not outcomes:
+            sleep(0.01)
+        sleep(0.2)  # let the workers get properly stuck in
+        stop_requested = perf_counter()
+        stop.set()
+        thread.join(10)
+        latency = perf_counter() - stop_requested
+        self.assertEqual([False], returned)
+        self.assertLess(latency, engine.poll_interval + deadline + 0.5)
+        self.assertEqual(['fast'], [o[0] for o in outcomes])
+        self.assertEqual({'slow', 'stubborn', 'slow_2'}, set(engine.killed_jobs))
+
+
+class TestCancelKeepsPartialResults(TestCase):
+
+    def test_partial_results_on_cancel(self):
+        cancelled = []
+        # both of fast's simulations and the first of slow's start together
+        b = BackgroundOperation(3, ['fast', 'slow', 'slow_2'])
+        b.worker = busy_idf_worker
+        b.get_ready_to_go(lambda *_: b.please_stop(), f_cancelled=cancelled.append)
+        start = perf_counter()
+        b.run()
+        self.assertLess(perf_counter() - start, 10)
+        self.assertEqual(['fast'], [r['idf'] for r in cancelled[0]['idf_results']])
+        self.assertEqual(['slow'], cancelled[0]['cancelled_idfs'])
@@ -0,0 +1,106 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from my_app.background_operation import BackgroundOperation, RunConfiguration
+from my_app.run_journal import RunJournal
+
+
+# the runtimes they report tell which of the two runs an IDF's result came from
+def first_worker(task, config):
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': 1.0}
+
+
+def second_worker(task, config):
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': 2.0}
+
+
+class TestRunJournal(TestCase):
+
+    def test_replay(self):
+        with TemporaryDirectory() as temp_dir:
+            path = RunJournal.path_for(Path(temp_dir), 'abc123')
+            journal = RunJournal(path, 'abc123', sync_every=2)
+            journal.open(resume=False)
+            journal.record('a.idf', {'idf': 'a.idf', 'categories': ['x']})
+            journal.record('b.idf', {'idf': 'b.idf', 'categories': ['y']})
+            journal.close()
+            # a crash part way through writing a record leaves a partial line, which is ignored
+            with path.open('a') as f:
+                f.write('{"idf":"c.id')
+            self.assertEqual(['a.idf', 'b.idf'], sorted(RunJournal(path, 'abc123').replay()))
+            self.assertEqual({}, RunJournal(path, 'different').replay())
+            # resuming carries on after the partial line without losing what's there
+            journal = RunJournal(path, 'abc123')
+            self.assertEqual(['a.idf', 'b.idf'], sorted(journal.open(resume=True)))
+            journal.record('c.idf', {'idf': 'c.idf'})
+            journal.close()
+            self.assertEqual(['a.idf', 'b.idf', 'c.idf'], sorted(RunJournal(path, 'abc123').replay()))
+            # not resuming starts the journal over
+            RunJournal(path, 'abc123').open(resume=False)
+            self.assertEqual({}, RunJournal(path, 'abc123').replay())
+
+    def test_resume_skips_completed_idfs(self):
+        with TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            for build in ('b1', 'b2'):
+                (temp_path / build).mkdir()
+
+            def run(idfs, worker, resume):
+                config = RunConfiguration(temp_path / 'b1', temp_path / 'b2', journal_dir=temp_path / 'journals')
+                (temp_path / 'journals').mkdir(exist_ok=True)
+                b = BackgroundOperation(2, idfs, config, resume)
+                b.worker = worker
+                outcome = dict()
+                statuses = list()
+                b.get_ready_to_go(lambda *args: statuses.append(args), outcome.update)
+                b.run()
+                return {r['idf']: int(r['runtimes'][0]) for r in outcome['idf_results']}, statuses
+
+            runs, _ = run(['1.idf', '2.idf'], first_worker, False)
+            self.assertEqual({'1.idf': 1, '2.idf': 1}, runs)
+            runs, statuses = run(['1.idf', '2.idf', '3.idf'], second_worker, True)
+            self.assertEqual({'1.idf': 1, '2.idf': 1, '3.idf': 2}, runs)
+            self.assertEqual("2/3 resumed from the run journal", statuses[0][0])
+            self.assertEqual(100.0, statuses[-1][2])
+            # without resuming, everything runs again
+            runs, _ = run(['1.idf', '2.idf'], second_worker, False)
+            self.assertEqual({'1.idf': 2, '2.idf': 2}, runs)
+
+    def test_resume_after_a_rebuild_runs_everything(self):
+        with TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            for build in ('b1', 'b2'):
+                (temp_path / build).mkdir()
+            (temp_path / 'journals').mkdir()
+
+            def run(worker, resume):
+                config = RunConfiguration(temp_path / 'b1', temp_path / 'b2', journal_dir=temp_path / 'journals')
+                b = BackgroundOperation(2, ['1.idf', '2.idf'], config, resume)
+                b.worker = worker
+                outcome = dict()
+                b.get_ready_to_go(lambda *_: None, outcome.update)
+                b.run()
+                return {r['idf']: int(r['runtimes'][0]) for r in outcome['idf_results']}
+
+            self.assertEqual({'1.idf': 1, '2.idf': 1}, run(first_worker, False))
+            (temp_path / 'b2' / 'energyplus').write_text('rebuilt')
+            self.assertEqual({'1.idf': 2, '2.idf': 2}, run(second_worker, True))
+
+    def test_failure_to_open_the_journal_is_reported(self):
+        with TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            for build in ('b1', 'b2'):
+                (temp_path / build).mkdir()
+            (temp_path / 'journals').mkdir()
+            config = RunConfiguration(temp_path / 'b1', temp_path / 'b2', journal_dir=temp_path / 'journals')
+            b = BackgroundOperation(2, ['1.idf'], config)
+            b.worker = first_worker
+            finished, cancelled = dict(), dict()
+            b.get_ready_to_go(lambda *_: None, finished.update, cancelled.update)
+            with patch('my_app.background_operation.RunJournal.open', side_effect=OSError('disk full')):
+                b.run()
+            self.assertEqual({}, finished)
+            self.assertEqual('OSError: disk full', cancelled['error'])
+            self.assertEqual([], cancelled['idf_results'])
@@ -0,0 +1,22 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.runtime_history import RuntimeHistory
+
+
+class TestRuntimeHistory(TestCase):
+
+    def test_record_estimate_and_persist(self):
+        with TemporaryDirectory() as temp_dir:
+            history_file = Path(temp_dir) / 'history.json'
+            h = RuntimeHistory(history_file)
+            self.assertAlmostEqual(100 * RuntimeHistory.DEFAULT_SECONDS_PER_BYTE, h.expected('a.idf', 'b1', 'x', 100))
+            h.record('a.idf', 'b1', 'x', 10.0, 1000)
+            h.record('a.idf', 'b1', 'x', 20.0, 1000)
+            self.assertAlmostEqual(15.0, h.expected('a.idf', 'b1', 'x', 1000))
+            # unseen IDFs, builds or run options are estimated from size using the measured rate
+            self.assertAlmostEqual(30.0, h.expected('c.idf', 'b1', 'x', 2000))
+            self.assertAlmostEqual(15.0, h.expected('a.idf', 'b2', 'x', 1000))
+            h.save()
+            self.assertAlmostEqual(15.0, RuntimeHistory(history_file).expected('a.idf', 'b1', 'x', 1000))
@@ -0,0 +1,81 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.constants import ResultsTreeRoots
+from my_app.table_diff import iter_report_tables, table_diff
+
+
+def report(tables):
+    parts = ["<html><body>", "<p>Report:<b> Annual Building Utility Performance Summary</b></p>",
+             "<p>For:<b> Entire Facility</b></p>", "<p>Timestamp: <b>2020-01-01 00:00:00</b></p>"]
+    for title, rows in tables:
+        parts.append(f"<b>{title}</b><br><br>\n<table border=\"1\">")
+        for row in rows:
+            parts.append("<tr>" + ''.join(f"<td align=\"right\">{cell}</td>" for cell in row) + "</tr>")
+        parts.append("</table><br><br>")
+    parts.append("</body></html>")
+    return '\n'.join(parts)
+
+
+SITE = ("Site and Source Energy", [["", "Total Energy [kWh]"], ["Total Site Energy", "  1000.00"],
+                                   ["Net Site Energy", "  900.00"]])
+AREA = ("Building Area", [["", "Area [m2]"], ["Total Building Area", "  463.60"]])
+
+
+class TestTableDiff(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.temp_dir = Path(self._temp_dir.name)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def diff(self, tables_1, tables_2):
+        path_1 = self.temp_dir / '1.htm'
+        path_1.write_text(report(tables_1))
+        path_2 = self.temp_dir / '2.htm'
+        path_2.write_text(report(tables_2))
+        return table_diff(path_1, path_2)
+
+    def test_tables_are_streamed_with_titles(self):
+        path = self.temp_dir / 'r.htm'
+        path.write_text(report([SITE, AREA, AREA]))
+        tables = list(iter_report_tables(path, chunk_size=7))
+        self.assertEqual(3, len(tables))
+        self.assertEqual("Annual Building Utility Performance Summary | Entire Facility | Site and Source Energy",
+                         tables[0].title)
+        self.assertTrue(tables[2].title.endswith("Building Area #1"))
+        self.assertEqual("1000.00", tables[0].cells()[("Total Site Energy", "Total Energy [kWh]")])
+
+    def test_identical_and_reordered(self):
+        result = self.diff([SITE, AREA], [AREA, SITE])
+        self.assertEqual(2, result.tables_compared)
+        self.assertEqual(3, result.equal)
+        self.assertIsNone(result.category)
+
+    def test_small_big_and_unmatched(self):
+        small = ("Site and Source Energy", [["", "Total Energy [kWh]"], ["Total Site Energy", "1001.5"],
+                                            ["Net Site Energy", "900.00"]])
+        result = self.diff([SITE, AREA], [small, AREA])
+        self.assertEqual((0, 1), (result.big_diffs, result.small_diffs))
+        self.assertEqual(ResultsTreeRoots.SmallTableDiff, result.category)
+        big = ("Site and Source Energy", [["", "Total Energy [kWh]"], ["Total Site Energy", "1200"],
+                                          ["Net Site Energy", "n/a"]])
+        result = self.diff([SITE, AREA], [big, AREA])
+        self.assertEqual((1, 1), (result.big_diffs, result.string_diffs))
+        self.assertEqual(ResultsTreeRoots.BigTableDiff, result.category)
+        result = self.diff([SITE, AREA], [SITE])
+        self.assertEqual(1, len(result.unmatched_tables))
+        self.assertEqual(ResultsTreeRoots.BigTableDiff, result.category)
+
+    def test_bold_cells_are_not_titles(self):
+        path = self.temp_dir / 'r.htm'
+        path.write_text(report([
+            ("Site and Source Energy", [["", "Total Energy [kWh]"], ["<b>Total Site Energy</b>", "1000.00"]])
+        ]).replace("</body>", "<table><tr><td>untitled</td></tr></table></body>"))
+        tables = list(iter_report_tables(path))
+        self.assertEqual("1000.00", tables[0].cells()[("Total Site Energy", "Total Energy [kWh]")])
+        # a table without a title of its own still goes by the last title, not by the bold cell
+        self.assertTrue(tables[1].title.endswith("| Site and Source Energy #1"))
@@ -0,0 +1,66 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.constants import ResultsTreeRoots
+from my_app.text_diff import file_digest, text_diff
+
+
+class TestTextDiff(TestCase):
+
+    def setUp(self):
+        self._temp_dir = TemporaryDirectory()
+        self.temp_dir = Path(self._temp_dir.name)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def write(self, name, lines):
+        path = self.temp_dir / name
+        path.write_text(''.join(f"{line}\n" for line in lines))
+        return path
+
+    def test_digest(self):
+        empty = self.write('empty', [])
+        self.assertEqual(file_digest(empty), file_digest(self.write('empty2', [])))
+        self.assertNotEqual(file_digest(self.write('a', ['a'])), file_digest(self.write('b', ['b'])))
+
+    def test_identical_files_short_circuit(self):
+        lines = [f"line {i}" for i in range(100)]
+        result = text_diff(self.write('1.err', lines), self.write('2.err', lines))
+        self.assertTrue(result.identical)
+        self.assertIsNone(result.category)
+
+    def test_volatile_lines_are_ignored(self):
+        result = text_diff(
+            self.write('1.err', ["Program Version,EnergyPlus, Version 9.4.0-abc, YMD=2020.01.01 10:00", "Warning A"]),
+            self.write('2.err', ["Program Version,EnergyPlus, Version 9.5.0-def, YMD=2021.02.02 11:11", "Warning A"])
+        )
+        self.assertFalse(result.identical)
+        self.assertEqual(0, result.num_diff_lines)
+        self.assertIsNone(result.category)
+
+    def test_only_known_time_stamps_are_volatile(self):
+        result = text_diff(
+            self.write('1.err', ["   ************* EnergyPlus Run Time=00hr 00min  2.30sec",
+                                 "EnergyPlus Completed Successfully-- Elapsed Time=00hr 00min  2.30sec",
+                                 "Schedule:Compact, Until: 08:00, 0.0"]),
+            self.write('2.err', ["   ************* EnergyPlus Run Time=00hr 00min  3.10sec",
+                                 "EnergyPlus Completed Successfully-- Elapsed Time=00hr 00min  3.10sec",
+                                 "Schedule:Compact, Until: 09:00, 0.0"])
+        )
+        self.assertEqual(1, result.num_diff_lines)  # the schedule's times are real content
+        self.assertEqual(["- Schedule:Compact, Until: 08:00, 0.0", "+ Schedule:Compact, Until: 09:00, 0.0"],
+                         result.sample)
+
+    def test_insertions_across_windows(self):
+        lines_1 = [f"line {i}" for i in range(50)]
+        lines_2 = lines_1[:9] + ["inserted 1", "inserted 2"] + lines_1[9:30] + lines_1[31:]
+        result = text_diff(self.write('1.audit', lines_1), self.write('2.audit', lines_2), window=10)
+        self.assertEqual(3, result.num_diff_lines)
+        self.assertEqual(["+ inserted 1", "+ inserted 2", "- line 30"], result.sample)
+        self.assertEqual(ResultsTreeRoots.TextDiff, result.category)
+
+    def test_one_side_empty(self):
+        result = text_diff(self.write('1.eio', [f"x{i}" for i in range(25)]), self.write('2.eio', []), window=10)
+        self.assertEqual(25, result.num_diff_lines)
@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from my_app.background_operation import BackgroundOperation
+from my_app.constants import PipelineStages
+from my_app.pipeline_stats import PipelineStats
+from my_app.tracing import Tracer, percentile, tracer
+
+
+def traced_worker(task, config):
+    return {'success': True, 'cache_hit': False, 'cache_miss': False, 'runtime': 0.0}
+
+
+class TestTracer(TestCase):
+
+    def tearDown(self):
+        tracer.disable()
+        tracer.reset()
+
+    def test_disabled_records_nothing(self):
+        t = Tracer()
+        with t.span('a') as first, t.span('b') as second:
+            self.assertIs(first, second)  # the one do-nothing span, nothing gets allocated
+        t.begin('key', 'c')
+        t.end('key')
+        t.counter('d', value=1)
+        self.assertEqual([], t.chrome_trace()['traceEvents'])
+
+    def test_spans_lanes_and_chrome_trace(self):
+        t = Tracer()
+        t.enable()
+        with t.span('sync', 'gui', detail=1):
+            pass
+        t.begin('x', 'first')
+        t.begin('y', 'second')
+        t.end('x', failed=False)
+        t.begin('z', 'third')  # reuses the lane x was in
+        t.end('y')
+        t.end('z')
+        t.end('never begun')
+        t.counter('queue', depth=3)
+        events = t.chrome_trace()['traceEvents']
+        spans = {e['name']: e for e in events if e['ph'] == 'X'}
+        self.assertEqual({'sync', 'first', 'second', 'third'}, set(spans))
+        self.assertEqual({'detail': 1}, spans['sync']['args'])
+        self.assertEqual({'failed': False}, spans['first']['args'])
+        self.assertEqual(spans['first']['tid'], spans['third']['tid'])
+        self.assertNotEqual(spans['first']['tid'], spans['second']['tid'])
+        self.assertEqual(1, len([e for e in events if e['ph'] == 'C']))
+        self.assertEqual(2, len([e for e in events if e['ph'] == 'M']))
+        summary = t.summary()
+        self.assertEqual(1, summary['sync']['count'])
+        self.assertEqual(5, len(Tracer.format_summary(summary)))
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(50.0, percentile(values, 0.5))
+        self.assertEqual(95.0, percentile(values, 0.95))
+        self.assertEqual(0.0, percentile([], 0.5))
+
+    def test_traced_run(self):
+        b = BackgroundOperation(2, ['1.idf', '2.idf'])
+        b.worker = traced_worker
+        b.get_ready_to_go(lambda *_: None, lambda _: None)
+        tracer.enable()
+        b.run()
+        tracer.disable()
+        summary = tracer.summary()
+        self.assertEqual(2, summary['IDF']['count'])
+        self.assertEqual(2, summary[PipelineStages.Case1]['count'])
+        self.assertEqual(1, summary['Run engine']['count'])
+        counters = [event for event in tracer.chrome_trace()['traceEvents'] if event['ph'] == 'C']
+        self.assertTrue(counters)
+        self.assertEqual({'Pipeline'}, {event['name'] for event in counters})
+        self.assertEqual(1, counters[-1]['args']['idfs_in_progress'])  # sampled as the last task finished
+        with TemporaryDirectory() as temp_dir:
+            trace_file = Path(temp_dir) / 'trace.json'
+            tracer.write(trace_file)
+            self.assertIn('traceEvents', json.loads(trace_file.read_text()))
+        overview = b.stats.overview(b.num_threads)
+        self.assertGreater(overview['idfs_per_minute'], 0.0)
+        self.assertLessEqual(overview['p50_seconds'], overview['p95_seconds'])
+        self.assertLessEqual(overview['utilization'], 1.0)
+
+    def test_overview_counts_running_tasks(self):
+        stats = PipelineStats(PipelineStages.get_all())
+        stats.queue(PipelineStages.Case1)
+        stats.idf_started('a.idf')
+        stats.start(PipelineStages.Case1, 'task')
+        self.assertGreater(stats.overview(1)['utilization'], 0.0)
+        stats.finish(PipelineStages.Case1, 'task')
+        stats.idf_finished('a.idf')
+        self.assertEqual(1, len(stats.idf_seconds))